@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Stapelverarbeitung für viele Gemeinden
+Verarbeitet die Straßen-PDFs mehrerer Gemeinden parallel in einem Prozess-Pool. Mit
+Zuordnungs-JSON entsteht eine Wahlbezirke-Karte (wahlbezirke_map), ohne Zuordnung eine Adresskarte
+(pdf_to_map). Alle Prozesse teilen sich einen OCR- und Geocoding-Cache und halten
+zusammen den Mindestabstand zwischen Nominatim-Anfragen ein. Jede Gemeinde bekommt ein eigenes
+Ausgabeverzeichnis, dazu kommen ein gemeinsamer Index (JSON und HTML) und eine Tabelle aller Straßen.
+
+Eingabe ist entweder ein Verzeichnis (ein Unterverzeichnis je Gemeinde, z.B. "51588 Nümbrecht",
+mit PDF und optional *zuordnung*.json) oder eine Manifest-Datei:
+
+    {"gemeinden": [{"name": "Nümbrecht", "plz": "51588", "pdf": "nuembrecht/strassen.pdf",
+                    "zuordnung": "nuembrecht/wahlbezirke_zuordnung.json"}]}
+"""
+
+import os
+import re
+import glob
+import json
+import html
+import time
+import argparse
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List
+import pandas as pd
+from pdf_to_map import PDFToMapConverter
+from wahlbezirke_map import WahlbezirkeMapConverter
+from verarbeitungs_cache import CACHE_PFAD, VerarbeitungsCache
+
+# Logging konfigurieren
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+VERZEICHNIS_MUSTER = re.compile(r'^(\d{5})\s+(.+)$')  # "51588 Nümbrecht"
+
+
+def lade_manifest(pfad: str) -> List[Dict]:
+    """Aufträge aus einer Manifest-Datei; relative Pfade gelten ab deren Verzeichnis"""
+    basis = os.path.dirname(os.path.abspath(pfad))
+    with open(pfad, 'r', encoding='utf-8') as f:
+        gemeinden = json.load(f)['gemeinden']
+    auftraege = []
+    for gemeinde in gemeinden:
+        auftrag = {'name': gemeinde['name'], 'plz': gemeinde.get('plz', ''),
+                   'pdf': os.path.join(basis, gemeinde['pdf']), 'zuordnung': None}
+        if gemeinde.get('zuordnung'):
+            auftrag['zuordnung'] = os.path.join(basis, gemeinde['zuordnung'])
+        auftraege.append(auftrag)
+    return auftraege
+
+
+def suche_auftraege(verzeichnis: str) -> List[Dict]:
+    """Aufträge aus einem Verzeichnis: PDFs in Unterverzeichnissen (je Gemeinde) oder direkt darin"""
+    auftraege = []
+    for pdf in sorted(glob.glob(os.path.join(verzeichnis, '**', '*.pdf'), recursive=True)):
+        ordner = os.path.dirname(pdf)
+        stamm = os.path.splitext(os.path.basename(pdf))[0]
+        if os.path.abspath(ordner) == os.path.abspath(verzeichnis):
+            name, plz = stamm, ''
+            zuordnungen = glob.glob(os.path.join(ordner, f"{glob.escape(stamm)}*zuordnung*.json"))
+        else:
+            treffer = VERZEICHNIS_MUSTER.match(os.path.basename(ordner))
+            name, plz = (treffer.group(2), treffer.group(1)) if treffer else (os.path.basename(ordner), '')
+            zuordnungen = glob.glob(os.path.join(ordner, '*zuordnung*.json'))
+        auftraege.append({'name': name, 'plz': plz, 'pdf': pdf,
+                          'zuordnung': sorted(zuordnungen)[0] if zuordnungen else None})
+    return auftraege
+
+
+def verzeichnisname(name: str) -> str:
+    """Gemeindename als Verzeichnisname"""
+    return re.sub(r'[^\w\-]+', '_', name).strip('_') or 'gemeinde'
+
+
+def verarbeite_gemeinde(auftrag: Dict, ausgabe: str, cache_pfad: str) -> Dict:
+    """Verarbeitet eine Gemeinde (läuft im Worker-Prozess)"""
+    ziel = os.path.join(ausgabe, verzeichnisname(auftrag['name']))
+    os.makedirs(ziel, exist_ok=True)
+    cache = VerarbeitungsCache(cache_pfad)
+    ergebnis = {**auftrag, 'verzeichnis': os.path.basename(ziel), 'status': 'ok', 'strassen': 0,
+                'karte': None, 'tabelle': None, 'fehler': None}
+    start = time.perf_counter()
+
+    try:
+        if auftrag['zuordnung']:
+            converter = WahlbezirkeMapConverter(auftrag['pdf'], auftrag['zuordnung'],
+                                                auftrag['plz'], auftrag['name'], cache)
+            converter.process(ziel)
+            ergebnis.update(strassen=len(converter.strassen_mit_bezirk),
+                            karte='wahlbezirke_map.html', tabelle='wahlbezirke_map.csv')
+        else:
+            converter = PDFToMapConverter(auftrag['pdf'], cache)
+            converter.process(ziel)
+            stamm = os.path.splitext(os.path.basename(auftrag['pdf']))[0]
+            ergebnis.update(strassen=len(converter.geocoded_addresses),
+                            karte=f"{stamm}_map.html", tabelle=f"{stamm}_addresses.csv")
+        if not os.path.exists(os.path.join(ziel, ergebnis['karte'])):
+            ergebnis.update(status='leer', karte=None, tabelle=None)
+    except Exception as e:
+        ergebnis.update(status='fehler', fehler=str(e), karte=None, tabelle=None)
+
+    ergebnis['dauer_s'] = round(time.perf_counter() - start, 1)
+    return ergebnis
+
+
+def schreibe_index(ergebnisse: List[Dict], ausgabe: str):
+    """index.json, index.html und alle_strassen.csv im Ausgabeverzeichnis"""
+    ergebnisse = sorted(ergebnisse, key=lambda e: e['name'])
+    with open(os.path.join(ausgabe, 'index.json'), 'w', encoding='utf-8') as f:
+        json.dump({'gemeinden': ergebnisse}, f, ensure_ascii=False, indent=2)
+
+    tabellen = []
+    for e in ergebnisse:
+        if e['tabelle'] and os.path.exists(os.path.join(ausgabe, e['verzeichnis'], e['tabelle'])):
+            df = pd.read_csv(os.path.join(ausgabe, e['verzeichnis'], e['tabelle']), dtype={'postal_code': str})
+            df.insert(0, 'gemeinde', e['name'])
+            tabellen.append(df)
+    if tabellen:
+        pd.concat(tabellen, ignore_index=True).to_csv(os.path.join(ausgabe, 'alle_strassen.csv'),
+                                                      index=False, encoding='utf-8')
+
+    zeilen = ''
+    for e in ergebnisse:
+        status = e['status'] + (f": {e['fehler']}" if e['fehler'] else '')
+        link = f'<a href="{html.escape(e["verzeichnis"] + "/" + e["karte"])}">Karte</a>' if e['karte'] else ''
+        zeilen += (f"<tr><td>{html.escape(e['name'])}</td><td>{html.escape(e['plz'])}</td>"
+                   f"<td>{html.escape(status)}</td><td style=\"text-align: right\">{e['strassen']}</td>"
+                   f"<td>{link}</td><td style=\"text-align: right\">{e['dauer_s']:.0f} s</td></tr>\n")
+    seite = f'''<!DOCTYPE html>
+<html lang="de">
+<head><meta charset="utf-8"><title>Gemeinden</title></head>
+<body style="font-family: Arial, sans-serif;">
+<h2>Gemeinden ({len(ergebnisse)})</h2>
+<table cellpadding="4" style="border-collapse: collapse;">
+<tr><th>Gemeinde</th><th>PLZ</th><th>Status</th><th>Straßen</th><th>Karte</th><th>Dauer</th></tr>
+{zeilen}</table>
+</body>
+</html>
+'''
+    with open(os.path.join(ausgabe, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write(seite)
+
+
+def main():
+    """Hauptfunktion"""
+    parser = argparse.ArgumentParser(description='Verarbeitet die Straßen-PDFs vieler Gemeinden parallel')
+    parser.add_argument('eingabe', help='Verzeichnis mit PDFs (ein Unterverzeichnis je Gemeinde) oder Manifest (JSON)')
+    parser.add_argument('--ausgabe', default='gemeinden', help='Ausgabeverzeichnis')
+    parser.add_argument('--prozesse', type=int, default=min(4, os.cpu_count() or 1), help='Anzahl Worker-Prozesse')
+    parser.add_argument('--cache', default=CACHE_PFAD, help='Gemeinsamer OCR- und Geocoding-Cache (SQLite)')
+    args = parser.parse_args()
+
+    auftraege = suche_auftraege(args.eingabe) if os.path.isdir(args.eingabe) else lade_manifest(args.eingabe)
+    if not auftraege:
+        logger.error(f"Keine PDFs gefunden: {args.eingabe}")
+        return
+    os.makedirs(args.ausgabe, exist_ok=True)
+    VerarbeitungsCache(args.cache)  # Schema anlegen, bevor mehrere Prozesse zugreifen
+    logger.info(f"{len(auftraege)} Gemeinden, {args.prozesse} Prozesse")
+
+    ergebnisse = []
+    with ProcessPoolExecutor(max_workers=args.prozesse) as pool:
+        laeufe = [pool.submit(verarbeite_gemeinde, a, args.ausgabe, args.cache) for a in auftraege]
+        for lauf in as_completed(laeufe):
+            ergebnis = lauf.result()
+            ergebnisse.append(ergebnis)
+            zeichen = '✓' if ergebnis['status'] == 'ok' else '✗'
+            print(f"{zeichen} {ergebnis['name']}: {ergebnis['status']}, {ergebnis['strassen']} Straßen "
+                  f"({ergebnis['dauer_s']:.0f} s) [{len(ergebnisse)}/{len(auftraege)}]")
+
+    schreibe_index(ergebnisse, args.ausgabe)
+    print(f"✓ Index erstellt: {os.path.join(args.ausgabe, 'index.html')}")
+
+
+if __name__ == "__main__":
+    main()
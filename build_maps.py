@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Erstellt alle Kartenansichten in einem Lauf
+Die Daten werden einmal geladen und aufbereitet, danach rendern mehrere Prozesse
+die gewünschten Ansichten parallel aus demselben Datenmodell.
+"""
+
+import os
+import sys
+import time
+import argparse
+import importlib
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional
+from kartendaten import KartenDaten
+
+# Logging konfigurieren
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Ansicht -> (Modul mit render(daten), Datenquelle)
+ANSICHTEN = {
+    'enhanced': ('create_enhanced_map', 'map'),
+    'individual': ('create_individual_map', 'map'),
+    'individual_fixed': ('create_individual_map_fixed', 'map'),
+    'kreistag': ('create_kreistags_map', 'map'),
+    'kreistag_fixed': ('create_kreistags_map_fixed', 'map'),
+    'working': ('create_working_map', 'complete'),
+    'simple_working': ('create_simple_working_map', 'complete'),
+    'final': ('create_final_working_map', 'complete'),
+}
+
+# Datenmodell im Worker-Prozess, wird einmal pro Prozess übergeben statt pro Ansicht
+_daten: Optional[KartenDaten] = None
+
+
+def _init_worker(daten: KartenDaten):
+    """Übernimmt das vorbereitete Datenmodell in den Worker-Prozess"""
+    global _daten
+    _daten = daten
+
+
+def render_ansicht(name: str) -> float:
+    """Rendert eine Ansicht aus dem Datenmodell des Prozesses und liefert die Dauer"""
+    start = time.perf_counter()
+    modul = importlib.import_module(ANSICHTEN[name][0])
+    modul.render(_daten)
+    return time.perf_counter() - start
+
+
+def build(ansichten: List[str], worker: Optional[int] = None) -> bool:
+    """Lädt die Daten einmal und rendert die Ansichten, bei worker=1 ohne Prozesspool"""
+    start = time.perf_counter()
+    daten = KartenDaten().lade({ANSICHTEN[name][1] for name in ansichten})
+    logger.info(f"Daten geladen in {time.perf_counter() - start:.2f}s")
+
+    worker = worker or min(len(ansichten), os.cpu_count() or 1)
+    fehler = []
+
+    if worker <= 1:
+        _init_worker(daten)
+        for name in ansichten:
+            try:
+                logger.info(f"Ansicht {name} erstellt in {render_ansicht(name):.2f}s")
+            except Exception as e:
+                logger.error(f"Fehler bei Ansicht {name}: {e}")
+                fehler.append(name)
+    else:
+        with ProcessPoolExecutor(max_workers=worker, initializer=_init_worker,
+                                 initargs=(daten,)) as pool:
+            auftraege = {pool.submit(render_ansicht, name): name for name in ansichten}
+            for auftrag in as_completed(auftraege):
+                name = auftraege[auftrag]
+                try:
+                    logger.info(f"Ansicht {name} erstellt in {auftrag.result():.2f}s")
+                except Exception as e:
+                    logger.error(f"Fehler bei Ansicht {name}: {e}")
+                    fehler.append(name)
+
+    logger.info(f"{len(ansichten) - len(fehler)} von {len(ansichten)} Ansichten erstellt "
+                f"in {time.perf_counter() - start:.2f}s")
+    return not fehler
+
+
+def main():
+    """Hauptfunktion"""
+    parser = argparse.ArgumentParser(description='Erstellt alle Wahlbezirke-Karten in einem Lauf')
+    parser.add_argument('ansichten', nargs='*',
+                        help=f"Zu erstellende Ansichten (Standard: alle): {', '.join(ANSICHTEN)}")
+    parser.add_argument('--worker', type=int, default=None,
+                        help='Anzahl paralleler Prozesse (1 = nacheinander im selben Prozess)')
+    args = parser.parse_args()
+
+    unbekannt = [name for name in args.ansichten if name not in ANSICHTEN]
+    if unbekannt:
+        parser.error(f"Unbekannte Ansicht(en): {', '.join(unbekannt)}")
+
+    ansichten = list(dict.fromkeys(args.ansichten)) or list(ANSICHTEN)
+    if not build(ansichten, args.worker):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Vorberechnete Punkt-Cluster pro Zoomstufe
+Hierarchisches Clustering im Stil von Supercluster (KD-Baum je Zoomstufe), damit der Browser
+nur noch die fertigen Cluster der aktuellen Zoomstufe zeichnet statt selbst zu clustern.
+"""
+
+import os
+import json
+import math
+import logging
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+import folium
+from scipy.spatial import cKDTree
+from branca.element import MacroElement
+from jinja2 import Template
+from map_output import save_map
+from lazy_popups import get_popup_daten, POPUP_TEMPLATES
+from street_store import lade_strassen
+
+# Logging konfigurieren
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+KACHEL_GROESSE = 256  # Pixel pro Kachel (Web-Mercator)
+
+# Eigenschaften der Einzelpunkte, die für Popups/Tooltips mitgeliefert werden
+PUNKT_EIGENSCHAFTEN = (
+    'street', 'original', 'house_number', 'postal_code', 'city', 'full_address', 'wbz',
+    'bezirk', 'kandidat', 'wahlberechtigte', 'farbe', 'kreistagkandidat', 'latitude', 'longitude'
+)
+
+
+def projiziere(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Rechnet WGS84 in normierte Web-Mercator-Koordinaten [0, 1] um"""
+    lat_rad = np.radians(np.clip(lat, -85.05112878, 85.05112878))
+    x = (lon + 180.0) / 360.0
+    y = (1.0 - np.log(np.tan(lat_rad) + 1.0 / np.cos(lat_rad)) / math.pi) / 2.0
+    return np.column_stack([x, y])
+
+
+def entprojiziere(xy: np.ndarray) -> np.ndarray:
+    """Rechnet normierte Web-Mercator-Koordinaten zurück in (lat, lon)"""
+    lon = xy[:, 0] * 360.0 - 180.0
+    lat = np.degrees(np.arctan(np.sinh(math.pi * (1.0 - 2.0 * xy[:, 1]))))
+    return np.column_stack([lat, lon])
+
+
+def wahlberechtigte_anteil(df: pd.DataFrame) -> np.ndarray:
+    """Verteilt die Wahlberechtigten eines Bezirks gleichmäßig auf seine Straßen"""
+    if 'wahlberechtigte' not in df.columns or 'wbz' not in df.columns:
+        return np.zeros(len(df))
+    anzahl = df.groupby('wbz')['wbz'].transform('size')
+    return (df['wahlberechtigte'].fillna(0) / anzahl).to_numpy(dtype=float)
+
+
+def build_cluster_index(df: pd.DataFrame, min_zoom: int = 8, max_zoom: int = 16,
+                        radius_px: int = 40) -> Dict:
+    """Berechnet für jede Zoomstufe die Cluster mit Anzahl und Wahlberechtigten-Summe
+
+    Ergebnis: zooms[z] ist eine Liste von [lon, lat, anzahl, wahlberechtigte, punkt_index],
+    punkt_index ist -1 für echte Cluster und sonst der Index in punkte.
+    """
+    df = df.dropna(subset=['latitude', 'longitude']).reset_index(drop=True)
+    xy = projiziere(df['latitude'].to_numpy(dtype=float), df['longitude'].to_numpy(dtype=float))
+    anzahl = np.ones(len(df), dtype=np.int64)
+    wahlber = wahlberechtigte_anteil(df)
+    punkt_index = np.arange(len(df), dtype=np.int64)
+
+    zooms = {}
+    for zoom in range(max_zoom, min_zoom - 1, -1):
+        radius = radius_px / (KACHEL_GROESSE * 2 ** zoom)
+        baum = cKDTree(xy)
+
+        besucht = np.zeros(len(xy), dtype=bool)
+        neu_xy, neu_anzahl, neu_wahlber, neu_index = [], [], [], []
+        # Große Cluster zuerst, damit sie ihre Nachbarn einsammeln (wie Supercluster)
+        for i in np.argsort(-anzahl, kind='stable'):
+            if besucht[i]:
+                continue
+            gruppe = [j for j in baum.query_ball_point(xy[i], r=radius) if not besucht[j]]
+            besucht[gruppe] = True
+            gewicht = anzahl[gruppe]
+            neu_xy.append((xy[gruppe] * gewicht[:, None]).sum(axis=0) / gewicht.sum())
+            neu_anzahl.append(gewicht.sum())
+            neu_wahlber.append(wahlber[gruppe].sum())
+            neu_index.append(punkt_index[i] if len(gruppe) == 1 else -1)
+
+        xy = np.array(neu_xy)
+        anzahl = np.array(neu_anzahl, dtype=np.int64)
+        wahlber = np.array(neu_wahlber)
+        punkt_index = np.array(neu_index, dtype=np.int64)
+
+        latlon = entprojiziere(xy)
+        zooms[zoom] = [
+            [round(float(lon), 6), round(float(lat), 6), int(n), round(float(w)), int(p)]
+            for (lat, lon), n, w, p in zip(latlon, anzahl, wahlber, punkt_index)
+        ]
+        logger.info(f"Zoom {zoom}: {len(zooms[zoom])} Cluster")
+
+    eigenschaften = [name for name in PUNKT_EIGENSCHAFTEN if name in df.columns]
+    punkte = json.loads(df[eigenschaften].to_json(orient='records', force_ascii=False))
+
+    return {
+        "minzoom": min_zoom,
+        "maxzoom": max_zoom,
+        "zooms": {str(z): cluster for z, cluster in sorted(zooms.items())},
+        "punkte": punkte
+    }
+
+
+class PrecomputedClusterLayer(MacroElement):
+    """Zeichnet die vorberechneten Cluster der aktuellen Zoomstufe im sichtbaren Ausschnitt"""
+
+    _template = Template("""
+{% macro script(this, kwargs) %}
+(function() {
+    var karte = {{ this._parent.get_name() }};
+    var index = {{ this.index|tojson }};
+    var popup = {{ this.popup|tojson }}, tooltip = {{ this.tooltip|tojson }};
+    var gruppe = L.featureGroup().addTo(karte);
+
+    function einzelpunkt(p) {
+        var farbe = p.farbe || '#3388ff';
+        var marker = L.circleMarker([p.latitude, p.longitude], {
+            radius: 8, color: farbe, fillColor: farbe, fill: true, fillOpacity: 0.7, weight: 2
+        });
+        marker.bindPopup(function() { return wahlkarteRender(popup, p); }, {maxWidth: 300});
+        if (tooltip) marker.bindTooltip(wahlkarteRender(tooltip, p), {sticky: true});
+        return marker;
+    }
+    function cluster(c, z) {
+        var marker = L.circleMarker([c[1], c[0]], {
+            radius: 10 + Math.min(20, Math.sqrt(c[2]) * 2),
+            color: '#1976D2', fillColor: '#64B5F6', fill: true, fillOpacity: 0.6, weight: 2
+        });
+        marker.bindTooltip(c[2] + ' Straßen, ca. ' + c[3] + ' Wahlberechtigte',
+                           {permanent: false, direction: 'top'});
+        marker.on('click', function() { karte.setView([c[1], c[0]], z + 1); });
+        return marker;
+    }
+    function zeichne() {
+        gruppe.clearLayers();
+        var z = Math.round(karte.getZoom());
+        var bounds = karte.getBounds().pad(0.2);
+        if (z > index.maxzoom) {
+            index.punkte.forEach(function(p) {
+                if (bounds.contains([p.latitude, p.longitude])) gruppe.addLayer(einzelpunkt(p));
+            });
+            return;
+        }
+        var stufe = Math.max(index.minzoom, z);
+        index.zooms[stufe].forEach(function(c) {
+            if (!bounds.contains([c[1], c[0]])) return;
+            gruppe.addLayer(c[4] >= 0 ? einzelpunkt(index.punkte[c[4]]) : cluster(c, stufe));
+        });
+    }
+    karte.on('moveend', zeichne);
+    karte.whenReady(zeichne);
+})();
+{% endmacro %}
+""")
+
+    def __init__(self, index: Dict, popup: str = 'basis', tooltip: Optional[str] = 'tooltip'):
+        super().__init__()
+        self._name = 'PrecomputedClusterLayer'
+        self.index = index
+        self.popup = popup
+        self.tooltip = tooltip
+
+
+def add_cluster_layer(m, df: pd.DataFrame, popup: str = 'basis', tooltip: Optional[str] = 'tooltip',
+                      **index_optionen) -> Dict:
+    """Berechnet den Cluster-Index für df und hängt den Cluster-Layer an die Karte"""
+    index = build_cluster_index(df, **index_optionen)
+    daten = get_popup_daten(m)
+    daten.templates[popup] = POPUP_TEMPLATES[popup]
+    if tooltip:
+        daten.templates[tooltip] = POPUP_TEMPLATES[tooltip]
+    m.add_child(PrecomputedClusterLayer(index, popup, tooltip))
+    return index
+
+
+def main():
+    """Hauptfunktion"""
+    input_file = 'wahlbezirke_complete.csv'
+    if not os.path.exists(input_file):
+        logger.error(f"Eingabedatei nicht gefunden: {input_file}")
+        return
+
+    df = lade_strassen(input_file)
+    m = folium.Map(location=[df['latitude'].mean(), df['longitude'].mean()], zoom_start=12,
+                   prefer_canvas=True)
+    index = add_cluster_layer(m, df)
+
+    with open('cluster_index.json', 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+    logger.info("Cluster-Index gespeichert als: cluster_index.json")
+
+    save_map(m, 'wahlbezirke_cluster_map.html')
+    logger.info("Karte gespeichert als: wahlbezirke_cluster_map.html")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,43 +6,25 @@ Erstellt eine erweiterte Wahlbezirke-Karte aus bereits geocodierten Daten
 import pandas as pd
 import folium
 from collections import defaultdict
-import json
+from kartendaten import KartenDaten
+from konfiguration import konfiguration
+from map_output import save_map
+from lazy_popups import lazy_popups_aktiv, add_lazy_markers
 
-# Kandidaten-Farben
-KANDIDATEN_FARBEN = {
-    'Gisa Hauschildt': '#FF6B6B',
-    'Christopher Seinsche': '#4ECDC4',
-    'Björn Dittich': '#45B7D1',
-    'Titzian Crisci': '#FFA07A',
-    'Stephan Rühl': '#98D8C8',
-    'Roger Adolphs': '#6C5CE7',
-    'Frank Schmitz': '#A8E6CF',
-    'Thomas Schlegel': '#FF8B94',
-    'Jörg Reintsema': '#C7CEEA',
-    'Dagmar Schmitz': '#FFDAB9',
-    'Jörg Menne': '#E8B4B8',
-    'Markus Lang': '#95E1D3',
-    'Ulrike Herrgesell': '#F38181',
-    'Thomas Hellbusch': '#AA96DA',
-    'Philipp Beck': '#FCBAD3',
-    'Manfred Henry Daub': '#FFD93D'
-}
+# Kandidaten-Farben (eigene Palette dieser Ansicht, siehe konfiguration.json)
+KANDIDATEN_FARBEN = konfiguration().kandidaten_farben_einzeln
 
-def main():
-    # Lade die bereits geocodierten Daten
-    df = pd.read_csv('wahlbezirke_map.csv')
-    
-    # Lade Wahlbezirk-Zuordnung für zusätzliche Infos
-    with open('wahlbezirke_zuordnung.json', 'r', encoding='utf-8') as f:
-        data = json.load(f)
-        wahlbezirke = data['wahlbezirke']
+def render(daten: KartenDaten):
+    # Bereits geocodierte und aufbereitete Daten aus dem gemeinsamen Modell
+    df = daten.tabelle('map')
+    wahlbezirke = daten.wahlbezirke
     
     # Gruppiere nach Kandidaten
     kandidaten_bezirke = defaultdict(list)
     for wbz_key, wbz_data in wahlbezirke.items():
         kandidaten_bezirke[wbz_data['kandidat']].append(wbz_key)
     
-    # Aktualisiere Farben in DataFrame basierend auf Kandidat
+    # Eigenes Farbschema dieser Ansicht
     df['kandidat_farbe'] = df['kandidat'].map(KANDIDATEN_FARBEN)
     
     # Zentrum berechnen
@@ -58,30 +40,36 @@ def main():
         kandidaten_groups[kandidat] = folium.FeatureGroup(name=f"CDU: {kandidat}", show=True)
     
     # Marker für jede Straße
-    for _, row in df.iterrows():
-        popup_text = f"""
-        <b>{row['street']}</b><br>
-        {row['original']}<br>
-        {row['postal_code']} {row['city']}<br>
-        <hr>
-        <b>Wahlbezirk:</b> {row['bezirk']}<br>
-        <b>CDU-Kandidat/in:</b> {row['kandidat']}<br>
-        <b>Wahlberechtigte im Bezirk:</b> {row['wahlberechtigte']}<br>
-        <small>Lat: {row['latitude']:.6f}, Lon: {row['longitude']:.6f}</small>
-        """
+    if lazy_popups_aktiv():
+        for kandidat, gruppe in df.groupby('kandidat'):
+            add_lazy_markers(m, kandidaten_groups[kandidat], gruppe, popup='basis',
+                             stil={'radius': 8, 'fill': True, 'fillOpacity': 0.7, 'weight': 2},
+                             dynamischer_stil={'color': 'kandidat_farbe', 'fillColor': 'kandidat_farbe'})
+    else:
+        for _, row in df.iterrows():
+            popup_text = f"""
+            <b>{row['street']}</b><br>
+            {row['original']}<br>
+            {row['postal_code']} {row['city']}<br>
+            <hr>
+            <b>Wahlbezirk:</b> {row['bezirk']}<br>
+            <b>CDU-Kandidat/in:</b> {row['kandidat']}<br>
+            <b>Wahlberechtigte im Bezirk:</b> {row['wahlberechtigte']}<br>
+            <small>Lat: {row['latitude']:.6f}, Lon: {row['longitude']:.6f}</small>
+            """
         
-        # Marker zum Kandidaten-Group hinzufügen
-        folium.CircleMarker(
-            location=[row['latitude'], row['longitude']],
-            radius=8,
-            popup=folium.Popup(popup_text, max_width=300),
-            tooltip=f"{row['street']} ({row['wbz']})",
-            color=row['kandidat_farbe'],
-            fill=True,
-            fillColor=row['kandidat_farbe'],
-            fillOpacity=0.7,
-            weight=2
-        ).add_to(kandidaten_groups[row['kandidat']])
+            # Marker zum Kandidaten-Group hinzufügen
+            folium.CircleMarker(
+                location=[row['latitude'], row['longitude']],
+                radius=8,
+                popup=folium.Popup(popup_text, max_width=300),
+                tooltip=f"{row['street']} ({row['wbz']})",
+                color=row['kandidat_farbe'],
+                fill=True,
+                fillColor=row['kandidat_farbe'],
+                fillOpacity=0.7,
+                weight=2
+            ).add_to(kandidaten_groups[row['kandidat']])
     
     # Feature Groups zur Karte hinzufügen
     for group in kandidaten_groups.values():
@@ -251,7 +239,7 @@ def main():
     m.get_root().html.add_child(folium.Element(legend_html))
     
     # Karte speichern
-    m.save('wahlbezirke_map_enhanced.html')
+    save_map(m, 'wahlbezirke_map_enhanced.html')
     print("✓ Erweiterte Karte erstellt: wahlbezirke_map_enhanced.html")
     
     # Kandidaten-Übersicht erstellen
@@ -273,5 +261,8 @@ def main():
     kandidaten_df.to_csv('kandidaten_uebersicht.csv', index=False, encoding='utf-8')
     print("✓ Kandidaten-Übersicht erstellt: kandidaten_uebersicht.csv")
 
+def main():
+    render(KartenDaten())
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
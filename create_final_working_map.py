@@ -3,60 +3,20 @@
 Finale funktionierende Karte mit korrekter Marker-Verwaltung über Leaflet
 """
 
-import pandas as pd
 import folium
 from folium import plugins
 import json
+from kartendaten import KartenDaten, KANDIDATEN_FARBEN
+from map_output import save_map
+from lazy_popups import lazy_popups_aktiv, add_lazy_markers
 
-# Farbschema
-KREISTAGS_FARBEN = {
-    'Marcus Schmitz': '#1976D2',
-    'Thomas Schlegel': '#D32F2F'
-}
-
-KANDIDATEN_FARBEN = {
-    # Marcus Schmitz Gruppe (Blautöne)
-    'Gisa Hauschildt': '#0D47A1',
-    'Jörg Reintsema': '#1565C0',
-    'Ulrike Herrgesell': '#1976D2',
-    'Thomas Hellbusch': '#1E88E5',
-    'Philipp Beck': '#2196F3',
-    'Manfred Henry Daub': '#42A5F5',
-    'Christopher Seinsche': '#64B5F6',
-    'Björn Dittich': '#90CAF9',
-    
-    # Thomas Schlegel Gruppe (Rottöne)
-    'Dagmar Schmitz': '#B71C1C',
-    'Jörg Menne': '#C62828',
-    'Markus Lang': '#D32F2F',
-    'Titzian Crisci': '#E53935',
-    'Stephan Rühl': '#F44336',
-    'Roger Adolphs': '#EF5350',
-    'Frank Schmitz': '#E57373',
-    'Thomas Schlegel': '#EF9A9A'
-}
-
-def main():
-    # Lade vollständige Daten
-    df = pd.read_csv('wahlbezirke_complete.csv')
+def render(daten: KartenDaten):
+    # Vollständige Daten inkl. Farben und Kreistagkandidat aus dem gemeinsamen Modell
+    df = daten.tabelle('complete')
     print(f"✓ Verwende vollständige Datei mit {len(df)} Einträgen")
     
     # Kreistagskandidaten-Zuordnung
-    kreistagskandidaten = {
-        'Marcus Schmitz': ['Gisa Hauschildt', 'Jörg Reintsema', 'Ulrike Herrgesell', 'Thomas Hellbusch',
-                          'Philipp Beck', 'Manfred Henry Daub', 'Christopher Seinsche', 'Björn Dittich'],
-        'Thomas Schlegel': ['Dagmar Schmitz', 'Jörg Menne', 'Markus Lang', 'Titzian Crisci',
-                           'Stephan Rühl', 'Roger Adolphs', 'Frank Schmitz', 'Thomas Schlegel']
-    }
-    
-    # Füge Farben hinzu
-    df['kandidat_farbe'] = df['kandidat'].map(KANDIDATEN_FARBEN)
-    
-    # Kreistagkandidat Info
-    for kreistagkandidat, kandidaten in kreistagskandidaten.items():
-        mask = df['kandidat'].isin(kandidaten)
-        df.loc[mask, 'kreistagkandidat'] = kreistagkandidat
-        df.loc[mask, 'kreistag_farbe'] = KREISTAGS_FARBEN[kreistagkandidat]
+    kreistagskandidaten = daten.kreistags_kandidaten_listen()
     
     # Karte erstellen
     center_lat = df['latitude'].mean()
@@ -74,46 +34,52 @@ def main():
     marker_id = 0
     
     # Erstelle Marker
-    for idx, row in df.iterrows():
-        popup_html = f"""
-        <div style="font-family: Arial, sans-serif; width: 250px;">
-            <b style="font-size: 14px;">{row['street']}</b><br>
-            <span style="color: #666;">{row.get('original', row['street'])}</span><br>
-            <span style="color: #666;">{row['postal_code']} {row['city']}</span><br>
-            <hr style="margin: 5px 0;">
-            <b>Wahlbezirk:</b> {row.get('bezirk', row['wbz'])}<br>
-            <b>CDU-Kandidat/in:</b> {row['kandidat']}<br>
-            <b>Kreistagkandidat:</b> <span style="color: {row['kreistag_farbe']}; font-weight: bold;">{row['kreistagkandidat']}</span><br>
-            <b>Wahlberechtigte:</b> {row['wahlberechtigte']}<br>
-            <small style="color: #999;">Koordinaten: {row['latitude']:.6f}, {row['longitude']:.6f}</small>
-        </div>
-        """
+    if lazy_popups_aktiv():
+        for kandidat, gruppe in df.groupby('kandidat'):
+            add_lazy_markers(m, kandidaten_layers[kandidat], gruppe, popup='kreistag',
+                             stil={'radius': 8, 'fill': True, 'fillOpacity': 0.8, 'weight': 3},
+                             dynamischer_stil={'color': 'kreistag_farbe', 'fillColor': 'kandidat_farbe'})
+    else:
+        for idx, row in df.iterrows():
+            popup_html = f"""
+            <div style="font-family: Arial, sans-serif; width: 250px;">
+                <b style="font-size: 14px;">{row['street']}</b><br>
+                <span style="color: #666;">{row.get('original', row['street'])}</span><br>
+                <span style="color: #666;">{row['postal_code']} {row['city']}</span><br>
+                <hr style="margin: 5px 0;">
+                <b>Wahlbezirk:</b> {row.get('bezirk', row['wbz'])}<br>
+                <b>CDU-Kandidat/in:</b> {row['kandidat']}<br>
+                <b>Kreistagkandidat:</b> <span style="color: {row['kreistag_farbe']}; font-weight: bold;">{row['kreistagkandidat']}</span><br>
+                <b>Wahlberechtigte:</b> {row['wahlberechtigte']}<br>
+                <small style="color: #999;">Koordinaten: {row['latitude']:.6f}, {row['longitude']:.6f}</small>
+            </div>
+            """
         
-        # Erstelle Marker
-        marker = folium.CircleMarker(
-            location=[row['latitude'], row['longitude']],
-            radius=8,
-            popup=folium.Popup(popup_html, max_width=300),
-            tooltip=f"{row['street']} ({row['wbz']})",
-            color=row['kreistag_farbe'],
-            fill=True,
-            fillColor=row['kandidat_farbe'],
-            fillOpacity=0.8,
-            weight=3
-        )
+            # Erstelle Marker
+            marker = folium.CircleMarker(
+                location=[row['latitude'], row['longitude']],
+                radius=8,
+                popup=folium.Popup(popup_html, max_width=300),
+                tooltip=f"{row['street']} ({row['wbz']})",
+                color=row['kreistag_farbe'],
+                fill=True,
+                fillColor=row['kandidat_farbe'],
+                fillOpacity=0.8,
+                weight=3
+            )
         
-        # Füge zu entsprechender FeatureGroup hinzu
-        marker.add_to(kandidaten_layers[row['kandidat']])
+            # Füge zu entsprechender FeatureGroup hinzu
+            marker.add_to(kandidaten_layers[row['kandidat']])
         
-        # Sammle Marker-Daten für JavaScript
-        marker_data.append({
-            'id': marker_id,
-            'kandidat': row['kandidat'],
-            'kreistagkandidat': row['kreistagkandidat'],
-            'lat': row['latitude'],
-            'lng': row['longitude']
-        })
-        marker_id += 1
+            # Sammle Marker-Daten für JavaScript
+            marker_data.append({
+                'id': marker_id,
+                'kandidat': row['kandidat'],
+                'kreistagkandidat': row['kreistagkandidat'],
+                'lat': row['latitude'],
+                'lng': row['longitude']
+            })
+            marker_id += 1
     
     # Füge alle FeatureGroups zur Karte hinzu
     for layer in kandidaten_layers.values():
@@ -421,7 +387,7 @@ def main():
     m.get_root().html.add_child(folium.Element(control_html))
     
     # Speichern
-    m.save('wahlbezirke_final_map.html')
+    save_map(m, 'wahlbezirke_final_map.html')
     print("✓ Finale funktionierende Karte erstellt: wahlbezirke_final_map.html")
     
     # Statistik
@@ -430,5 +396,8 @@ def main():
         total = len(df[df['kandidat'].isin(kandidaten)])
         print(f"  {kreistag}: {total} Punkte")
 
+def main():
+    render(KartenDaten())
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
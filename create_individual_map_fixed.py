@@ -3,79 +3,16 @@
 Korrigierte Version mit funktionierender Layer-Verwaltung
 """
 
-import pandas as pd
 import folium
 from collections import defaultdict
-import json
+from kartendaten import KartenDaten, KANDIDATEN_FARBEN
+from map_output import save_map
+from lazy_popups import lazy_popups_aktiv, add_lazy_markers
 
-# Farbschema
-KREISTAGS_FARBEN = {
-    'Marcus Schmitz': '#1976D2',  # Blau für Kreis-WBZ 1
-    'Thomas Schlegel': '#D32F2F'   # Rot für Kreis-WBZ 2
-}
-
-# Kandidaten-Farben
-KANDIDATEN_FARBEN = {
-    # Marcus Schmitz Gruppe (Blautöne)
-    'Gisa Hauschildt': '#0D47A1',
-    'Jörg Reintsema': '#1565C0',
-    'Ulrike Herrgesell': '#1976D2',
-    'Thomas Hellbusch': '#1E88E5',
-    'Philipp Beck': '#2196F3',
-    'Manfred Henry Daub': '#42A5F5',
-    'Christopher Seinsche': '#64B5F6',
-    'Björn Dittich': '#90CAF9',
-    
-    # Thomas Schlegel Gruppe (Rottöne)
-    'Dagmar Schmitz': '#B71C1C',
-    'Jörg Menne': '#C62828',
-    'Markus Lang': '#D32F2F',
-    'Titzian Crisci': '#E53935',
-    'Stephan Rühl': '#F44336',
-    'Roger Adolphs': '#EF5350',
-    'Frank Schmitz': '#E57373',
-    'Thomas Schlegel': '#EF9A9A'
-}
-
-def main():
-    # Lade Daten
-    df = pd.read_csv('wahlbezirke_map.csv')
-    
-    with open('wahlbezirke_zuordnung.json', 'r', encoding='utf-8') as f:
-        wahlbezirke_data = json.load(f)
-        wahlbezirke = wahlbezirke_data['wahlbezirke']
-    
-    # Kreistagskandidaten-Zuordnung
-    kreistagskandidaten = {
-        'Marcus Schmitz': {
-            'kreis_wbz': 1,
-            'wahlbezirke': ['WBZ 10', 'WBZ 20', 'WBZ 60', 'WBZ 70', 'WBZ 80', 'WBZ 90', 'WBZ 100', 'WBZ 110'],
-            'kandidaten': [
-                'Gisa Hauschildt', 'Jörg Reintsema', 'Ulrike Herrgesell', 'Thomas Hellbusch',
-                'Philipp Beck', 'Manfred Henry Daub', 'Christopher Seinsche', 'Björn Dittich'
-            ],
-            'farbe': '#1976D2'
-        },
-        'Thomas Schlegel': {
-            'kreis_wbz': 2,
-            'wahlbezirke': ['WBZ 30', 'WBZ 40', 'WBZ 50', 'WBZ 120', 'WBZ 130', 'WBZ 140', 'WBZ 150', 'WBZ 160'],
-            'kandidaten': [
-                'Dagmar Schmitz', 'Jörg Menne', 'Markus Lang', 'Titzian Crisci',
-                'Stephan Rühl', 'Roger Adolphs', 'Frank Schmitz', 'Thomas Schlegel'
-            ],
-            'farbe': '#D32F2F'
-        }
-    }
-    
-    # Erweitere DataFrame
-    df['kandidat_farbe'] = df['kandidat'].map(KANDIDATEN_FARBEN)
-    df['kreistagkandidat'] = ''
-    df['kreistag_farbe'] = ''
-    
-    for kreistagkandidat, info in kreistagskandidaten.items():
-        for kandidat in info['kandidaten']:
-            df.loc[df['kandidat'] == kandidat, 'kreistagkandidat'] = kreistagkandidat
-            df.loc[df['kandidat'] == kandidat, 'kreistag_farbe'] = info['farbe']
+def render(daten: KartenDaten):
+    # Aufbereitete Daten und Kreistagskandidaten-Zuordnung aus dem gemeinsamen Modell
+    df = daten.tabelle('map')
+    kreistagskandidaten = daten.kreistagskandidaten
     
     # Karte erstellen
     avg_lat = df['latitude'].mean()
@@ -104,33 +41,39 @@ def main():
             )
     
     # Erstelle Marker
-    for _, row in df.iterrows():
-        popup_text = f"""
-        <div style="font-family: Arial, sans-serif;">
-            <b style="font-size: 14px;">{row['street']}</b><br>
-            <span style="color: #666;">{row['original']}</span><br>
-            <span style="color: #666;">{row['postal_code']} {row['city']}</span><br>
-            <hr style="margin: 5px 0;">
-            <b>Wahlbezirk:</b> {row['bezirk']}<br>
-            <b>CDU-Kandidat/in:</b> {row['kandidat']}<br>
-            <b>Kreistagkandidat:</b> <span style="color: {row['kreistag_farbe']}; font-weight: bold;">{row['kreistagkandidat']}</span><br>
-            <b>Wahlberechtigte:</b> {row['wahlberechtigte']}<br>
-            <small style="color: #999;">Koordinaten: {row['latitude']:.6f}, {row['longitude']:.6f}</small>
-        </div>
-        """
+    if lazy_popups_aktiv():
+        for kandidat, gruppe in df.groupby('kandidat'):
+            add_lazy_markers(m, kandidaten_layers[kandidat], gruppe, popup='kreistag',
+                             stil={'radius': 8, 'fill': True, 'fillOpacity': 0.8, 'weight': 3},
+                             dynamischer_stil={'color': 'kreistag_farbe', 'fillColor': 'kandidat_farbe'})
+    else:
+        for _, row in df.iterrows():
+            popup_text = f"""
+            <div style="font-family: Arial, sans-serif;">
+                <b style="font-size: 14px;">{row['street']}</b><br>
+                <span style="color: #666;">{row['original']}</span><br>
+                <span style="color: #666;">{row['postal_code']} {row['city']}</span><br>
+                <hr style="margin: 5px 0;">
+                <b>Wahlbezirk:</b> {row['bezirk']}<br>
+                <b>CDU-Kandidat/in:</b> {row['kandidat']}<br>
+                <b>Kreistagkandidat:</b> <span style="color: {row['kreistag_farbe']}; font-weight: bold;">{row['kreistagkandidat']}</span><br>
+                <b>Wahlberechtigte:</b> {row['wahlberechtigte']}<br>
+                <small style="color: #999;">Koordinaten: {row['latitude']:.6f}, {row['longitude']:.6f}</small>
+            </div>
+            """
         
-        # Marker zum entsprechenden Kandidaten-Layer hinzufügen
-        folium.CircleMarker(
-            location=[row['latitude'], row['longitude']],
-            radius=8,
-            popup=folium.Popup(popup_text, max_width=300),
-            tooltip=f"{row['street']} ({row['wbz']})",
-            color=row['kreistag_farbe'],
-            fill=True,
-            fillColor=row['kandidat_farbe'],
-            fillOpacity=0.8,
-            weight=3
-        ).add_to(kandidaten_layers[row['kandidat']])
+            # Marker zum entsprechenden Kandidaten-Layer hinzufügen
+            folium.CircleMarker(
+                location=[row['latitude'], row['longitude']],
+                radius=8,
+                popup=folium.Popup(popup_text, max_width=300),
+                tooltip=f"{row['street']} ({row['wbz']})",
+                color=row['kreistag_farbe'],
+                fill=True,
+                fillColor=row['kandidat_farbe'],
+                fillOpacity=0.8,
+                weight=3
+            ).add_to(kandidaten_layers[row['kandidat']])
     
     # Alle Layer zur Karte hinzufügen
     for layer in kandidaten_layers.values():
@@ -576,8 +519,11 @@ def main():
     m.get_root().html.add_child(folium.Element(legend_html))
     
     # Karte speichern
-    m.save('wahlbezirke_individual_map_fixed.html')
+    save_map(m, 'wahlbezirke_individual_map_fixed.html')
     print("✓ Korrigierte individuelle Kandidaten-Karte erstellt: wahlbezirke_individual_map_fixed.html")
 
+def main():
+    render(KartenDaten())
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -6,57 +6,14 @@ Erstellt eine erweiterte Wahlbezirke-Karte mit Kreistagskandidaten-Zuordnung
 import pandas as pd
 import folium
 from collections import defaultdict
-import json
+from kartendaten import KartenDaten, KANDIDATEN_FARBEN
+from map_output import save_map
+from lazy_popups import lazy_popups_aktiv, add_lazy_markers
 
-# Farbschema
-KREISTAGS_FARBEN = {
-    'Marcus Schmitz': '#1976D2',  # Blau für Kreis-WBZ 1
-    'Thomas Schlegel': '#D32F2F'   # Rot für Kreis-WBZ 2
-}
-
-# Kandidaten-Farben (innerhalb der Kreistagskandidaten-Gruppen)
-KANDIDATEN_FARBEN = {
-    # Marcus Schmitz Gruppe (Blautöne)
-    'Gisa Hauschildt': '#0D47A1',
-    'Jörg Reintsema': '#1565C0',
-    'Ulrike Herrgesell': '#1976D2',
-    'Thomas Hellbusch': '#1E88E5',
-    'Philipp Beck': '#2196F3',
-    'Manfred Henry Daub': '#42A5F5',
-    'Christopher Seinsche': '#64B5F6',
-    'Björn Dittich': '#90CAF9',
-    
-    # Thomas Schlegel Gruppe (Rottöne)
-    'Dagmar Schmitz': '#B71C1C',
-    'Jörg Menne': '#C62828',
-    'Markus Lang': '#D32F2F',
-    'Titzian Crisci': '#E53935',
-    'Stephan Rühl': '#F44336',
-    'Roger Adolphs': '#EF5350',
-    'Frank Schmitz': '#E57373',
-    'Thomas Schlegel': '#EF9A9A'
-}
-
-def main():
-    # Lade die Daten
-    df = pd.read_csv('wahlbezirke_map.csv')
-    
-    with open('wahlbezirke_zuordnung.json', 'r', encoding='utf-8') as f:
-        wahlbezirke_data = json.load(f)
-        wahlbezirke = wahlbezirke_data['wahlbezirke']
-    
-    with open('kreistagskandidaten_zuordnung.json', 'r', encoding='utf-8') as f:
-        kreistags_data = json.load(f)
-        kreistagskandidaten = kreistags_data['kreistagskandidaten']
-    
-    # Aktualisiere Farben basierend auf Kreistagskandidaten-Zuordnung
-    df['kandidat_farbe'] = df['kandidat'].map(KANDIDATEN_FARBEN)
-    
-    # Füge Kreistagskandidaten-Info hinzu
-    df['kreistagkandidat'] = ''
-    for kreistagkandidat, info in kreistagskandidaten.items():
-        for kandidat in info['kandidaten']:
-            df.loc[df['kandidat'] == kandidat, 'kreistagkandidat'] = kreistagkandidat
+def render(daten: KartenDaten):
+    # Aufbereitete Daten und Kreistagskandidaten-Zuordnung aus dem gemeinsamen Modell
+    df = daten.tabelle('map')
+    kreistagskandidaten = daten.kreistagskandidaten
     
     # Zentrum berechnen
     avg_lat = df['latitude'].mean()
@@ -83,45 +40,55 @@ def main():
             )
     
     # Marker erstellen
-    for _, row in df.iterrows():
-        popup_text = f"""
-        <b>{row['street']}</b><br>
-        {row['original']}<br>
-        {row['postal_code']} {row['city']}<br>
-        <hr>
-        <b>Wahlbezirk:</b> {row['bezirk']}<br>
-        <b>CDU-Kandidat/in:</b> {row['kandidat']}<br>
-        <b>Kreistagkandidat:</b> {row['kreistagkandidat']}<br>
-        <b>Wahlberechtigte:</b> {row['wahlberechtigte']}<br>
-        <small>Lat: {row['latitude']:.6f}, Lon: {row['longitude']:.6f}</small>
-        """
+    if lazy_popups_aktiv():
+        for kreistagkandidat, gruppe in df.groupby('kreistagkandidat'):
+            add_lazy_markers(m, kreistags_groups[kreistagkandidat], gruppe, popup='kreistag',
+                             stil={'radius': 8, 'fill': True, 'fillOpacity': 0.7, 'weight': 2},
+                             dynamischer_stil={'color': 'kandidat_farbe', 'fillColor': 'kandidat_farbe'})
+        for kandidat, gruppe in df.groupby('kandidat'):
+            add_lazy_markers(m, kandidaten_groups[kandidat], gruppe, popup='kreistag',
+                             stil={'radius': 8, 'fill': True, 'fillOpacity': 0.7, 'weight': 2},
+                             dynamischer_stil={'color': 'kandidat_farbe', 'fillColor': 'kandidat_farbe'})
+    else:
+        for _, row in df.iterrows():
+            popup_text = f"""
+            <b>{row['street']}</b><br>
+            {row['original']}<br>
+            {row['postal_code']} {row['city']}<br>
+            <hr>
+            <b>Wahlbezirk:</b> {row['bezirk']}<br>
+            <b>CDU-Kandidat/in:</b> {row['kandidat']}<br>
+            <b>Kreistagkandidat:</b> {row['kreistagkandidat']}<br>
+            <b>Wahlberechtigte:</b> {row['wahlberechtigte']}<br>
+            <small>Lat: {row['latitude']:.6f}, Lon: {row['longitude']:.6f}</small>
+            """
         
-        marker = folium.CircleMarker(
-            location=[row['latitude'], row['longitude']],
-            radius=8,
-            popup=folium.Popup(popup_text, max_width=300),
-            tooltip=f"{row['street']} ({row['wbz']})",
-            color=row['kandidat_farbe'],
-            fill=True,
-            fillColor=row['kandidat_farbe'],
-            fillOpacity=0.7,
-            weight=2
-        )
+            marker = folium.CircleMarker(
+                location=[row['latitude'], row['longitude']],
+                radius=8,
+                popup=folium.Popup(popup_text, max_width=300),
+                tooltip=f"{row['street']} ({row['wbz']})",
+                color=row['kandidat_farbe'],
+                fill=True,
+                fillColor=row['kandidat_farbe'],
+                fillOpacity=0.7,
+                weight=2
+            )
         
-        # Zu beiden Groups hinzufügen
-        marker.add_to(kreistags_groups[row['kreistagkandidat']])
-        marker_copy = folium.CircleMarker(
-            location=[row['latitude'], row['longitude']],
-            radius=8,
-            popup=folium.Popup(popup_text, max_width=300),
-            tooltip=f"{row['street']} ({row['wbz']})",
-            color=row['kandidat_farbe'],
-            fill=True,
-            fillColor=row['kandidat_farbe'],
-            fillOpacity=0.7,
-            weight=2
-        )
-        marker_copy.add_to(kandidaten_groups[row['kandidat']])
+            # Zu beiden Groups hinzufügen
+            marker.add_to(kreistags_groups[row['kreistagkandidat']])
+            marker_copy = folium.CircleMarker(
+                location=[row['latitude'], row['longitude']],
+                radius=8,
+                popup=folium.Popup(popup_text, max_width=300),
+                tooltip=f"{row['street']} ({row['wbz']})",
+                color=row['kandidat_farbe'],
+                fill=True,
+                fillColor=row['kandidat_farbe'],
+                fillOpacity=0.7,
+                weight=2
+            )
+            marker_copy.add_to(kandidaten_groups[row['kandidat']])
     
     # Groups zur Karte hinzufügen
     for group in kreistags_groups.values():
@@ -435,7 +402,7 @@ def main():
     m.get_root().html.add_child(folium.Element(legend_html))
     
     # Karte speichern
-    m.save('wahlbezirke_kreistag_map.html')
+    save_map(m, 'wahlbezirke_kreistag_map.html')
     print("✓ Kreistagskandidaten-Karte erstellt: wahlbezirke_kreistag_map.html")
     
     # Kreistagskandidaten-Übersicht
@@ -465,5 +432,8 @@ def main():
     kreistag_df.to_csv('kreistagskandidaten_uebersicht.csv', index=False, encoding='utf-8')
     print("✓ Kreistagskandidaten-Übersicht: kreistagskandidaten_uebersicht.csv")
 
+def main():
+    render(KartenDaten())
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
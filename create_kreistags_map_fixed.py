@@ -6,88 +6,31 @@ Korrigierte Version der Kreistagskandidaten-Karte
 import pandas as pd
 import folium
 from collections import defaultdict
-import json
+from kartendaten import KartenDaten, KANDIDATEN_FARBEN
+from map_output import save_map
+from lazy_popups import lazy_popups_aktiv, add_lazy_markers
+from geodesy import streuung
 
-# Farbschema für Kreistagskandidaten
-KREISTAGS_FARBEN = {
-    'Marcus Schmitz': '#1976D2',  # Blau für Kreis-WBZ 1
-    'Thomas Schlegel': '#D32F2F'   # Rot für Kreis-WBZ 2
+# Räumliche Kennzahlen aus geodesy.streuung für die Statistik-CSV
+STATISTIK_SPALTEN = {
+    'kreistagkandidat': 'Kreistagkandidat',
+    'punkte_mit_koordinaten': 'Straßen mit Koordinaten',
+    'zentrum_lat': 'Zentrum Lat',
+    'zentrum_lon': 'Zentrum Lon',
+    'ausdehnung_ns_m': 'Ausdehnung Nord-Süd (m)',
+    'ausdehnung_ow_m': 'Ausdehnung Ost-West (m)',
+    'mittlerer_abstand_zentrum_m': 'Mittlerer Abstand zum Zentrum (m)',
+    'max_abstand_zentrum_m': 'Max. Abstand zum Zentrum (m)',
+    'streuradius_m': 'Streuradius (m)',
+    'kompaktheit': 'Kompaktheit',
+    'fussweg_schaetzung_m': 'Fußweg geschätzt (m)'
 }
 
-# Kandidaten-Farben (angepasst an Kreistagskandidaten)
-KANDIDATEN_FARBEN = {
-    # Marcus Schmitz Gruppe (Blautöne) - Kreis-WBZ 1
-    'Gisa Hauschildt': '#0D47A1',      # WBZ 10
-    'Jörg Reintsema': '#1565C0',       # WBZ 20
-    'Ulrike Herrgesell': '#1976D2',    # WBZ 60
-    'Thomas Hellbusch': '#1E88E5',     # WBZ 70
-    'Philipp Beck': '#2196F3',         # WBZ 80
-    'Manfred Henry Daub': '#42A5F5',   # WBZ 90
-    'Christopher Seinsche': '#64B5F6',  # WBZ 100
-    'Björn Dittich': '#90CAF9',        # WBZ 110
-    
-    # Thomas Schlegel Gruppe (Rottöne) - Kreis-WBZ 2
-    'Dagmar Schmitz': '#B71C1C',       # WBZ 30
-    'Jörg Menne': '#C62828',           # WBZ 40
-    'Markus Lang': '#D32F2F',          # WBZ 50
-    'Titzian Crisci': '#E53935',       # WBZ 120
-    'Stephan Rühl': '#F44336',         # WBZ 130
-    'Roger Adolphs': '#EF5350',        # WBZ 140
-    'Frank Schmitz': '#E57373',        # WBZ 150
-    'Thomas Schlegel': '#EF9A9A'       # WBZ 160
-}
-
-def main():
-    # Lade die Daten
-    df = pd.read_csv('wahlbezirke_map.csv')
-    
-    with open('wahlbezirke_zuordnung.json', 'r', encoding='utf-8') as f:
-        wahlbezirke_data = json.load(f)
-        wahlbezirke = wahlbezirke_data['wahlbezirke']
-    
-    # Korrekte Kreistagskandidaten-Zuordnung basierend auf PDF
-    kreistagskandidaten = {
-        'Marcus Schmitz': {
-            'kreis_wbz': 1,
-            'wahlbezirke': ['WBZ 10', 'WBZ 20', 'WBZ 60', 'WBZ 70', 'WBZ 80', 'WBZ 90', 'WBZ 100', 'WBZ 110'],
-            'kandidaten': [
-                'Gisa Hauschildt',      # WBZ 10
-                'Jörg Reintsema',       # WBZ 20
-                'Ulrike Herrgesell',    # WBZ 60
-                'Thomas Hellbusch',     # WBZ 70
-                'Philipp Beck',         # WBZ 80
-                'Manfred Henry Daub',   # WBZ 90
-                'Christopher Seinsche', # WBZ 100
-                'Björn Dittich'        # WBZ 110
-            ],
-            'farbe': '#1976D2'
-        },
-        'Thomas Schlegel': {
-            'kreis_wbz': 2,
-            'wahlbezirke': ['WBZ 30', 'WBZ 40', 'WBZ 50', 'WBZ 120', 'WBZ 130', 'WBZ 140', 'WBZ 150', 'WBZ 160'],
-            'kandidaten': [
-                'Dagmar Schmitz',    # WBZ 30
-                'Jörg Menne',        # WBZ 40
-                'Markus Lang',       # WBZ 50
-                'Titzian Crisci',    # WBZ 120
-                'Stephan Rühl',      # WBZ 130
-                'Roger Adolphs',     # WBZ 140
-                'Frank Schmitz',     # WBZ 150
-                'Thomas Schlegel'    # WBZ 160
-            ],
-            'farbe': '#D32F2F'
-        }
-    }
-    
-    # Aktualisiere Farben basierend auf Kandidat
-    df['kandidat_farbe'] = df['kandidat'].map(KANDIDATEN_FARBEN)
-    
-    # Füge Kreistagskandidaten-Info hinzu
-    df['kreistagkandidat'] = ''
-    for kreistagkandidat, info in kreistagskandidaten.items():
-        for kandidat in info['kandidaten']:
-            df.loc[df['kandidat'] == kandidat, 'kreistagkandidat'] = kreistagkandidat
-            df.loc[df['kandidat'] == kandidat, 'kreistag_farbe'] = info['farbe']
+def render(daten: KartenDaten):
+    # Aufbereitete Daten und Kreistagskandidaten-Zuordnung aus dem gemeinsamen Modell
+    df = daten.tabelle('map')
+    wahlbezirke = daten.wahlbezirke
+    kreistagskandidaten = daten.kreistagskandidaten
     
     # Zentrum berechnen
     avg_lat = df['latitude'].mean()
@@ -105,52 +48,63 @@ def main():
     kandidaten_groups = {}
     
     # Marker für alle Straßen erstellen
-    for _, row in df.iterrows():
-        # Feature Group für einzelne Kandidaten erstellen wenn noch nicht vorhanden
-        if row['kandidat'] not in kandidaten_groups:
-            kandidaten_groups[row['kandidat']] = folium.FeatureGroup(
-                name=f"CDU: {row['kandidat']}"
-            )
+    if lazy_popups_aktiv():
+        for kreistagkandidat, gruppe in df.groupby('kreistagkandidat'):
+            add_lazy_markers(m, kreistags_groups[kreistagkandidat], gruppe, popup='kreistag',
+                             stil={'radius': 8, 'fill': True, 'fillOpacity': 0.8, 'weight': 3},
+                             dynamischer_stil={'color': 'kreistag_farbe', 'fillColor': 'kandidat_farbe'})
+        for kandidat, gruppe in df.groupby('kandidat', sort=False):
+            kandidaten_groups[kandidat] = folium.FeatureGroup(name=f"CDU: {kandidat}")
+            add_lazy_markers(m, kandidaten_groups[kandidat], gruppe, popup='kreistag',
+                             stil={'radius': 8, 'fill': True, 'fillOpacity': 0.8, 'weight': 2},
+                             dynamischer_stil={'color': 'kandidat_farbe', 'fillColor': 'kandidat_farbe'})
+    else:
+        for _, row in df.iterrows():
+            # Feature Group für einzelne Kandidaten erstellen wenn noch nicht vorhanden
+            if row['kandidat'] not in kandidaten_groups:
+                kandidaten_groups[row['kandidat']] = folium.FeatureGroup(
+                    name=f"CDU: {row['kandidat']}"
+                )
         
-        popup_text = f"""
-        <div style="font-family: Arial, sans-serif;">
-            <b style="font-size: 14px;">{row['street']}</b><br>
-            <span style="color: #666;">{row['original']}</span><br>
-            <span style="color: #666;">{row['postal_code']} {row['city']}</span><br>
-            <hr style="margin: 5px 0;">
-            <b>Wahlbezirk:</b> {row['bezirk']}<br>
-            <b>CDU-Kandidat/in:</b> {row['kandidat']}<br>
-            <b>Kreistagkandidat:</b> <span style="color: {row['kreistag_farbe']}; font-weight: bold;">{row['kreistagkandidat']}</span><br>
-            <b>Wahlberechtigte:</b> {row['wahlberechtigte']}<br>
-            <small style="color: #999;">Lat: {row['latitude']:.6f}, Lon: {row['longitude']:.6f}</small>
-        </div>
-        """
+            popup_text = f"""
+            <div style="font-family: Arial, sans-serif;">
+                <b style="font-size: 14px;">{row['street']}</b><br>
+                <span style="color: #666;">{row['original']}</span><br>
+                <span style="color: #666;">{row['postal_code']} {row['city']}</span><br>
+                <hr style="margin: 5px 0;">
+                <b>Wahlbezirk:</b> {row['bezirk']}<br>
+                <b>CDU-Kandidat/in:</b> {row['kandidat']}<br>
+                <b>Kreistagkandidat:</b> <span style="color: {row['kreistag_farbe']}; font-weight: bold;">{row['kreistagkandidat']}</span><br>
+                <b>Wahlberechtigte:</b> {row['wahlberechtigte']}<br>
+                <small style="color: #999;">Lat: {row['latitude']:.6f}, Lon: {row['longitude']:.6f}</small>
+            </div>
+            """
         
-        # Marker für Kreistagskandidaten-Ansicht
-        folium.CircleMarker(
-            location=[row['latitude'], row['longitude']],
-            radius=8,
-            popup=folium.Popup(popup_text, max_width=300),
-            tooltip=f"{row['street']} ({row['wbz']})",
-            color=row['kreistag_farbe'],
-            fill=True,
-            fillColor=row['kandidat_farbe'],
-            fillOpacity=0.8,
-            weight=3
-        ).add_to(kreistags_groups[row['kreistagkandidat']])
+            # Marker für Kreistagskandidaten-Ansicht
+            folium.CircleMarker(
+                location=[row['latitude'], row['longitude']],
+                radius=8,
+                popup=folium.Popup(popup_text, max_width=300),
+                tooltip=f"{row['street']} ({row['wbz']})",
+                color=row['kreistag_farbe'],
+                fill=True,
+                fillColor=row['kandidat_farbe'],
+                fillOpacity=0.8,
+                weight=3
+            ).add_to(kreistags_groups[row['kreistagkandidat']])
         
-        # Marker für Kandidaten-Ansicht
-        folium.CircleMarker(
-            location=[row['latitude'], row['longitude']],
-            radius=8,
-            popup=folium.Popup(popup_text, max_width=300),
-            tooltip=f"{row['street']} ({row['wbz']})",
-            color=row['kandidat_farbe'],
-            fill=True,
-            fillColor=row['kandidat_farbe'],
-            fillOpacity=0.8,
-            weight=2
-        ).add_to(kandidaten_groups[row['kandidat']])
+            # Marker für Kandidaten-Ansicht
+            folium.CircleMarker(
+                location=[row['latitude'], row['longitude']],
+                radius=8,
+                popup=folium.Popup(popup_text, max_width=300),
+                tooltip=f"{row['street']} ({row['wbz']})",
+                color=row['kandidat_farbe'],
+                fill=True,
+                fillColor=row['kandidat_farbe'],
+                fillOpacity=0.8,
+                weight=2
+            ).add_to(kandidaten_groups[row['kandidat']])
     
     # Alle Feature Groups zur Karte hinzufügen
     for group in kreistags_groups.values():
@@ -556,7 +510,7 @@ def main():
     m.get_root().html.add_child(folium.Element(legend_html))
     
     # Karte speichern
-    m.save('wahlbezirke_kreistag_map_fixed.html')
+    save_map(m, 'wahlbezirke_kreistag_map_fixed.html')
     print("✓ Korrigierte Kreistagskandidaten-Karte erstellt: wahlbezirke_kreistag_map_fixed.html")
     
     # Aktualisierte Übersicht speichern
@@ -597,8 +551,15 @@ def main():
         })
     
     overview_df = pd.DataFrame(overview_data)
+    
+    # Räumliche Kennzahlen je Kreistagkandidat (ohne Ersatzkoordinaten)
+    lage = streuung(df, 'kreistagkandidat').rename(columns=STATISTIK_SPALTEN)[list(STATISTIK_SPALTEN.values())]
+    overview_df = overview_df.merge(lage, on='Kreistagkandidat', how='left')
     overview_df.to_csv('kreistagskandidaten_statistik.csv', index=False, encoding='utf-8')
     print("✓ Statistik gespeichert: kreistagskandidaten_statistik.csv")
 
+def main():
+    render(KartenDaten())
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -3,58 +3,18 @@
 Einfache, garantiert funktionierende Karte mit direkter Marker-Kontrolle
 """
 
-import pandas as pd
 import folium
 import json
+from kartendaten import KartenDaten
+from map_output import save_map
 
-# Farbschema
-KREISTAGS_FARBEN = {
-    'Marcus Schmitz': '#1976D2',
-    'Thomas Schlegel': '#D32F2F'
-}
-
-KANDIDATEN_FARBEN = {
-    # Marcus Schmitz Gruppe (Blautöne)
-    'Gisa Hauschildt': '#0D47A1',
-    'Jörg Reintsema': '#1565C0',
-    'Ulrike Herrgesell': '#1976D2',
-    'Thomas Hellbusch': '#1E88E5',
-    'Philipp Beck': '#2196F3',
-    'Manfred Henry Daub': '#42A5F5',
-    'Christopher Seinsche': '#64B5F6',
-    'Björn Dittich': '#90CAF9',
-    
-    # Thomas Schlegel Gruppe (Rottöne)
-    'Dagmar Schmitz': '#B71C1C',
-    'Jörg Menne': '#C62828',
-    'Markus Lang': '#D32F2F',
-    'Titzian Crisci': '#E53935',
-    'Stephan Rühl': '#F44336',
-    'Roger Adolphs': '#EF5350',
-    'Frank Schmitz': '#E57373',
-    'Thomas Schlegel': '#EF9A9A'
-}
-
-def main():
-    # Lade Daten
-    df = pd.read_csv('wahlbezirke_complete.csv')
+def render(daten: KartenDaten):
+    # Aufbereitete Daten aus dem gemeinsamen Modell
+    df = daten.tabelle('complete')
     print(f"✓ Verwende {len(df)} Datenpunkte")
     
     # Kreistagskandidaten
-    kreistagskandidaten = {
-        'Marcus Schmitz': ['Gisa Hauschildt', 'Jörg Reintsema', 'Ulrike Herrgesell', 'Thomas Hellbusch',
-                          'Philipp Beck', 'Manfred Henry Daub', 'Christopher Seinsche', 'Björn Dittich'],
-        'Thomas Schlegel': ['Dagmar Schmitz', 'Jörg Menne', 'Markus Lang', 'Titzian Crisci',
-                           'Stephan Rühl', 'Roger Adolphs', 'Frank Schmitz', 'Thomas Schlegel']
-    }
-    
-    # Farben hinzufügen
-    df['kandidat_farbe'] = df['kandidat'].map(KANDIDATEN_FARBEN)
-    
-    # Kreistagkandidat zuordnen
-    for kreistagkandidat, kandidaten in kreistagskandidaten.items():
-        df.loc[df['kandidat'].isin(kandidaten), 'kreistagkandidat'] = kreistagkandidat
-        df.loc[df['kandidat'].isin(kandidaten), 'kreistag_farbe'] = KREISTAGS_FARBEN[kreistagkandidat]
+    kreistagskandidaten = daten.kreistags_kandidaten_listen()
     
     # Karte erstellen
     m = folium.Map(
@@ -102,15 +62,16 @@ def main():
                     weight: 3
                 });
                 
-                var popupContent = '<div style="font-family: Arial; width: 250px;">' +
-                    '<b>' + data.street + '</b><br>' +
-                    'Wahlbezirk: ' + data.wbz + '<br>' +
-                    'Kandidat: ' + data.kandidat + '<br>' +
-                    'Kreistagkandidat: <b style="color: ' + data.kreistag_farbe + '">' + data.kreistagkandidat + '</b><br>' +
-                    'Wahlberechtigte: ' + data.wahlberechtigte +
-                    '</div>';
-                
-                marker.bindPopup(popupContent);
+                // Popup-HTML erst beim Öffnen erzeugen
+                marker.bindPopup(function() {
+                    return '<div style="font-family: Arial; width: 250px;">' +
+                        '<b>' + data.street + '</b><br>' +
+                        'Wahlbezirk: ' + data.wbz + '<br>' +
+                        'Kandidat: ' + data.kandidat + '<br>' +
+                        'Kreistagkandidat: <b style="color: ' + data.kreistag_farbe + '">' + data.kreistagkandidat + '</b><br>' +
+                        'Wahlberechtigte: ' + data.wahlberechtigte +
+                        '</div>';
+                });
                 marker.bindTooltip(data.street + ' (' + data.wbz + ')');
                 
                 // Speichere Referenz
@@ -402,8 +363,11 @@ def main():
     m.get_root().html.add_child(folium.Element(control_html))
     
     # Speichern
-    m.save('wahlbezirke_simple_working.html')
+    save_map(m, 'wahlbezirke_simple_working.html')
     print("✓ Karte erstellt: wahlbezirke_simple_working.html")
 
+def main():
+    render(KartenDaten())
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -3,58 +3,18 @@
 Erstellt eine funktionierende Karte mit korrekter Layer-Synchronisation
 """
 
-import pandas as pd
 import folium
-import json
+from kartendaten import KartenDaten, KREISTAGS_FARBEN, KANDIDATEN_FARBEN
+from map_output import save_map
+from lazy_popups import lazy_popups_aktiv, add_lazy_markers
 
-# Farbschema
-KREISTAGS_FARBEN = {
-    'Marcus Schmitz': '#1976D2',  # Blau
-    'Thomas Schlegel': '#D32F2F'   # Rot
-}
-
-KANDIDATEN_FARBEN = {
-    # Marcus Schmitz Gruppe (Blautöne)
-    'Gisa Hauschildt': '#0D47A1',
-    'Jörg Reintsema': '#1565C0',
-    'Ulrike Herrgesell': '#1976D2',
-    'Thomas Hellbusch': '#1E88E5',
-    'Philipp Beck': '#2196F3',
-    'Manfred Henry Daub': '#42A5F5',
-    'Christopher Seinsche': '#64B5F6',
-    'Björn Dittich': '#90CAF9',
-    
-    # Thomas Schlegel Gruppe (Rottöne)
-    'Dagmar Schmitz': '#B71C1C',
-    'Jörg Menne': '#C62828',
-    'Markus Lang': '#D32F2F',
-    'Titzian Crisci': '#E53935',
-    'Stephan Rühl': '#F44336',
-    'Roger Adolphs': '#EF5350',
-    'Frank Schmitz': '#E57373',
-    'Thomas Schlegel': '#EF9A9A'
-}
-
-def main():
-    # Verwende die komplette Datei
-    df = pd.read_csv('wahlbezirke_complete.csv')
+def render(daten: KartenDaten):
+    # Vollständige Daten inkl. Farben und Kreistagkandidat aus dem gemeinsamen Modell
+    df = daten.tabelle('complete')
     print(f"✓ Verwende vollständige Datei mit {len(df)} Einträgen")
     
     # Kreistagskandidaten-Zuordnung
-    kreistagskandidaten = {
-        'Marcus Schmitz': ['Gisa Hauschildt', 'Jörg Reintsema', 'Ulrike Herrgesell', 'Thomas Hellbusch',
-                          'Philipp Beck', 'Manfred Henry Daub', 'Christopher Seinsche', 'Björn Dittich'],
-        'Thomas Schlegel': ['Dagmar Schmitz', 'Jörg Menne', 'Markus Lang', 'Titzian Crisci',
-                           'Stephan Rühl', 'Roger Adolphs', 'Frank Schmitz', 'Thomas Schlegel']
-    }
-    
-    # Füge Farben und Kreistagkandidat-Info hinzu
-    df['kandidat_farbe'] = df['kandidat'].map(KANDIDATEN_FARBEN)
-    
-    # Kreistagkandidat zuordnen
-    df['kreistagkandidat'] = ''
-    for kreistagkandidat, kandidaten in kreistagskandidaten.items():
-        df.loc[df['kandidat'].isin(kandidaten), 'kreistagkandidat'] = kreistagkandidat
+    kreistagskandidaten = daten.kreistags_kandidaten_listen()
     
     # Karte erstellen
     center_lat = df['latitude'].mean()
@@ -62,39 +22,50 @@ def main():
     m = folium.Map(location=[center_lat, center_lon], zoom_start=12)
     
     # Erstelle Marker für jeden Punkt
-    for idx, row in df.iterrows():
-        # Eindeutige ID für jeden Marker
-        marker_id = f"marker_{idx}_{row['wbz']}_{row['kandidat'].replace(' ', '_')}"
+    if lazy_popups_aktiv():
+        df['kreistag_farbe'] = df['kreistagkandidat'].map(KREISTAGS_FARBEN).fillna('#808080')
+        kandidat_id = df['kandidat'].str.replace(' ', '_')
+        df['marker_klasse'] = ('kandidat-marker kandidat-' + kandidat_id
+                               + ' kreistag-' + df['kreistagkandidat'].str.replace(' ', '_')
+                               + ' marker_' + df.index.astype(str) + '_' + df['wbz'].astype(str) + '_' + kandidat_id)
+        add_lazy_markers(m, m, df, popup='kreistag',
+                         stil={'radius': 8, 'fill': True, 'fillOpacity': 0.8, 'weight': 3},
+                         dynamischer_stil={'color': 'kreistag_farbe', 'fillColor': 'kandidat_farbe',
+                                           'className': 'marker_klasse'})
+    else:
+        for idx, row in df.iterrows():
+            # Eindeutige ID für jeden Marker
+            marker_id = f"marker_{idx}_{row['wbz']}_{row['kandidat'].replace(' ', '_')}"
         
-        popup_html = f"""
-        <div style="font-family: Arial, sans-serif; width: 250px;">
-            <b style="font-size: 14px;">{row['street']}</b><br>
-            <span style="color: #666;">{row.get('original', row['street'])}</span><br>
-            <span style="color: #666;">{row['postal_code']} {row['city']}</span><br>
-            <hr style="margin: 5px 0;">
-            <b>Wahlbezirk:</b> {row.get('bezirk', row['wbz'])}<br>
-            <b>CDU-Kandidat/in:</b> {row['kandidat']}<br>
-            <b>Kreistagkandidat:</b> <span style="color: {KREISTAGS_FARBEN.get(row['kreistagkandidat'], '#000')}; font-weight: bold;">{row['kreistagkandidat']}</span><br>
-            <b>Wahlberechtigte:</b> {row['wahlberechtigte']}<br>
-            <small style="color: #999;">Koordinaten: {row['latitude']:.6f}, {row['longitude']:.6f}</small>
-        </div>
-        """
+            popup_html = f"""
+            <div style="font-family: Arial, sans-serif; width: 250px;">
+                <b style="font-size: 14px;">{row['street']}</b><br>
+                <span style="color: #666;">{row.get('original', row['street'])}</span><br>
+                <span style="color: #666;">{row['postal_code']} {row['city']}</span><br>
+                <hr style="margin: 5px 0;">
+                <b>Wahlbezirk:</b> {row.get('bezirk', row['wbz'])}<br>
+                <b>CDU-Kandidat/in:</b> {row['kandidat']}<br>
+                <b>Kreistagkandidat:</b> <span style="color: {KREISTAGS_FARBEN.get(row['kreistagkandidat'], '#000')}; font-weight: bold;">{row['kreistagkandidat']}</span><br>
+                <b>Wahlberechtigte:</b> {row['wahlberechtigte']}<br>
+                <small style="color: #999;">Koordinaten: {row['latitude']:.6f}, {row['longitude']:.6f}</small>
+            </div>
+            """
         
-        # Erstelle Marker mit custom Icon
-        marker = folium.CircleMarker(
-            location=[row['latitude'], row['longitude']],
-            radius=8,
-            popup=folium.Popup(popup_html, max_width=300),
-            tooltip=f"{row['street']} ({row['wbz']})",
-            color=KREISTAGS_FARBEN.get(row['kreistagkandidat'], '#808080'),
-            fill=True,
-            fillColor=row['kandidat_farbe'],
-            fillOpacity=0.8,
-            weight=3,
-            className=f"kandidat-marker kandidat-{row['kandidat'].replace(' ', '_')} kreistag-{row['kreistagkandidat'].replace(' ', '_')} {marker_id}"
-        )
+            # Erstelle Marker mit custom Icon
+            marker = folium.CircleMarker(
+                location=[row['latitude'], row['longitude']],
+                radius=8,
+                popup=folium.Popup(popup_html, max_width=300),
+                tooltip=f"{row['street']} ({row['wbz']})",
+                color=KREISTAGS_FARBEN.get(row['kreistagkandidat'], '#808080'),
+                fill=True,
+                fillColor=row['kandidat_farbe'],
+                fillOpacity=0.8,
+                weight=3,
+                className=f"kandidat-marker kandidat-{row['kandidat'].replace(' ', '_')} kreistag-{row['kreistagkandidat'].replace(' ', '_')} {marker_id}"
+            )
         
-        marker.add_to(m)
+            marker.add_to(m)
     
     # Custom HTML/CSS/JS für die Kontrollen
     custom_html = '''
@@ -407,8 +378,11 @@ def main():
     m.get_root().html.add_child(folium.Element(custom_html))
     
     # Speichern
-    m.save('wahlbezirke_working_map.html')
+    save_map(m, 'wahlbezirke_working_map.html')
     print("✓ Funktionierende Karte erstellt: wahlbezirke_working_map.html")
 
+def main():
+    render(KartenDaten())
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Normalisiertes Datenmodell für Straßen, Wahlbezirke und Kandidaten
+Die Straßentabellen wiederholen Bezirk, Kandidat, Farbe, Wahlberechtigte, PLZ und Ort in jeder
+Zeile. Hier stehen diese Angaben je einmal in eigenen Tabellen (Bezirke, Orte, Kandidaten,
+Kreistagskandidaten), die Straßen tragen nur ganzzahlige Schlüssel. Spalten aus den anderen
+Tabellen werden erst beim Abruf über die Schlüssel angehängt, und nur die angefragten.
+"""
+
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+
+# Angaben, die je WBZ bzw. je Ort nur einmal vorkommen dürfen
+BEZIRKS_SPALTEN = ('bezirk', 'kandidat', 'farbe', 'wahlberechtigte')
+ORTS_SPALTEN = ('postal_code', 'city')
+
+# Abgeleitete Spalten, die über die Kandidaten- und Kreistagstabelle angehängt werden
+KANDIDATEN_SPALTEN = ('kandidat_farbe',)
+KREISTAGS_SPALTEN = ('kreistagkandidat', 'kreistag_farbe')
+
+
+def _schluessel(werte: pd.Series) -> tuple:
+    """Fortlaufende Codes (int32) und die eindeutigen Werte in Sortierreihenfolge
+
+    Fehlende Werte bekommen einen eigenen, letzten Code statt -1, damit die Codes lückenlos die
+    Zeilen der Nachschlagetabelle (erste Zeile je Code) adressieren.
+    """
+    codes, eindeutig = pd.factorize(werte, sort=True, use_na_sentinel=False)
+    return codes.astype(np.int32), eindeutig
+
+
+def _nehme(spalte: pd.Series, codes: np.ndarray, index: pd.Index) -> pd.Series:
+    """Spalte einer Nachschlagetabelle über Codes auf die Straßen verteilen (Datentyp bleibt)"""
+    return pd.Series(spalte.array.take(codes), index=index, name=spalte.name)
+
+
+class Datenmodell:
+    """Straßen mit Schlüsseln auf Bezirke und Orte; Bezirke mit Schlüssel auf Kandidaten"""
+
+    def __init__(self, strassen: pd.DataFrame, bezirke: pd.DataFrame, orte: pd.DataFrame,
+                 kandidaten: pd.DataFrame, kreistag: pd.DataFrame, spalten: List[str]):
+        self.strassen = strassen
+        self.bezirke = bezirke
+        self.orte = orte
+        self.kandidaten = kandidaten
+        self.kreistag = kreistag
+        self.spalten = spalten  # Spaltenreihenfolge der ursprünglichen Tabelle
+
+    @classmethod
+    def aus_tabelle(cls, df: pd.DataFrame, kreistagskandidaten: Optional[Dict] = None,
+                    kandidaten_farben: Optional[Dict[str, str]] = None) -> 'Datenmodell':
+        """Zerlegt eine Straßentabelle (z.B. wahlbezirke_complete.csv)
+
+        Spalten, die innerhalb eines WBZ nicht einheitlich sind, bleiben bei den Straßen.
+        """
+        df = df.reset_index(drop=True)
+        spalten = list(df.columns)
+        strassen = df.copy()
+
+        # Bezirke
+        bezirk_id, _ = _schluessel(df['wbz'])
+        erste = np.unique(bezirk_id, return_index=True)[1]  # erste Straße je Bezirk
+        bezirke = pd.DataFrame({'wbz': df['wbz'].array.take(erste)})
+        einheitlich = [s for s in BEZIRKS_SPALTEN if s in df.columns
+                       and df[s].groupby(bezirk_id).nunique(dropna=False).le(1).all()]
+        for spalte in einheitlich:
+            bezirke[spalte] = df[spalte].array.take(erste)
+        strassen = strassen.drop(columns=['wbz', *einheitlich])
+        strassen['bezirk_id'] = bezirk_id
+
+        # Orte
+        orts_spalten = [s for s in ORTS_SPALTEN if s in df.columns]
+        orte = pd.DataFrame(columns=orts_spalten)
+        if orts_spalten:
+            # eigene Gruppe auch für fehlende PLZ oder Ortsnamen
+            ort_id = df.groupby(orts_spalten, sort=True, dropna=False, observed=True).ngroup()
+            ort_id = ort_id.to_numpy().astype(np.int32)
+            orte = pd.DataFrame({s: df[s].array.take(np.unique(ort_id, return_index=True)[1])
+                                 for s in orts_spalten})
+            strassen = strassen.drop(columns=orts_spalten)
+            strassen['ort_id'] = ort_id
+
+        # Kandidaten und Kreistagskandidaten
+        kreistag_namen = list(kreistagskandidaten or {})
+        kreistag = pd.DataFrame({
+            'kreistagkandidat': kreistag_namen + [''],
+            'kreistag_farbe': [kreistagskandidaten[n]['farbe'] for n in kreistag_namen] + ['']
+        })
+        kandidaten = pd.DataFrame(columns=['kandidat', 'kandidat_farbe', 'kreistag_id'])
+        # Kandidat je WBZ, oder je Straße, wenn er innerhalb eines WBZ wechselt
+        kandidat_tabelle = bezirke if 'kandidat' in bezirke.columns else strassen
+        if 'kandidat' in kandidat_tabelle.columns:
+            kandidat_id, _ = _schluessel(kandidat_tabelle['kandidat'])
+            namen = kandidat_tabelle['kandidat'].array.take(np.unique(kandidat_id, return_index=True)[1])
+            zuordnung = {k: i for i, n in enumerate(kreistag_namen)
+                         for k in kreistagskandidaten[n]['kandidaten']}
+            kandidaten = pd.DataFrame({'kandidat': namen})
+            kandidaten['kandidat_farbe'] = kandidaten['kandidat'].map(kandidaten_farben or {})
+            kandidaten['kreistag_id'] = np.array([zuordnung.get(k, len(kreistag_namen)) for k in namen],
+                                                 dtype=np.int32)
+            kandidat_tabelle['kandidat_id'] = kandidat_id
+
+        # Kreistagkandidat der Tabelle wird aus der Zuordnung abgeleitet, nicht gespeichert
+        if kreistagskandidaten is not None and 'kreistagkandidat' in strassen.columns:
+            strassen = strassen.drop(columns=['kreistagkandidat'])
+
+        return cls(strassen, bezirke, orte, kandidaten, kreistag, spalten)
+
+    def _kandidat_codes(self) -> np.ndarray:
+        if 'kandidat_id' in self.strassen.columns:
+            return self.strassen['kandidat_id'].to_numpy()
+        return self.bezirke['kandidat_id'].to_numpy()[self.strassen['bezirk_id'].to_numpy()]
+
+    def spalte(self, name: str) -> pd.Series:
+        """Eine Spalte je Straße, bei Bedarf über die Schlüssel aus den anderen Tabellen"""
+        index = self.strassen.index
+        if name in self.strassen.columns:
+            return self.strassen[name]
+        if name in self.bezirke.columns:
+            return _nehme(self.bezirke[name], self.strassen['bezirk_id'].to_numpy(), index)
+        if name in self.orte.columns:
+            return _nehme(self.orte[name], self.strassen['ort_id'].to_numpy(), index)
+        if name in KANDIDATEN_SPALTEN:
+            return _nehme(self.kandidaten[name], self._kandidat_codes(), index)
+        if name in KREISTAGS_SPALTEN:
+            kreistag_id = self.kandidaten['kreistag_id'].to_numpy()[self._kandidat_codes()]
+            return _nehme(self.kreistag[name], kreistag_id, index)
+        raise KeyError(f"Unbekannte Spalte: {name}")
+
+    def tabelle(self, spalten: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Denormalisierte Tabelle nur mit den angefragten Spalten
+
+        Ohne Angabe: alle ursprünglichen Spalten plus Kandidaten-Farbe, Kreistagkandidat und
+        Kreistags-Farbe, in der Reihenfolge der ursprünglichen Tabelle.
+        """
+        if spalten is None:
+            spalten = list(dict.fromkeys([*self.spalten, *KANDIDATEN_SPALTEN, *KREISTAGS_SPALTEN]))
+        return pd.DataFrame({name: self.spalte(name) for name in spalten})
+
+    def speicherbedarf(self) -> Dict[str, int]:
+        """Speicherbedarf in Bytes: normalisierte Tabellen gegenüber der vollen Tabelle"""
+        normalisiert = sum(int(t.memory_usage(deep=True, index=False).sum())
+                           for t in (self.strassen, self.bezirke, self.orte, self.kandidaten, self.kreistag))
+        voll = int(self.tabelle().memory_usage(deep=True, index=False).sum())
+        return {'normalisiert': normalisiert, 'denormalisiert': voll}
+
+    def abweichungen(self, df: pd.DataFrame) -> List[str]:
+        """Spalten, in denen tabelle() nicht mit der ursprünglichen Tabelle übereinstimmt
+
+        Verglichen werden die Werte; abgeleitete Spalten dürfen einen anderen Datentyp haben.
+        Die volle Tabelle wird gebaut, damit auch die abgeleiteten Spalten (Kandidaten-Farbe,
+        Kreistagkandidat) auflösbar sein müssen.
+        """
+        df = df.reset_index(drop=True)
+        tabelle = self.tabelle()
+        return [spalte for spalte in self.spalten
+                if not tabelle[spalte].reset_index(drop=True).astype(object).equals(df[spalte].astype(object))]
+
+
+def main():
+    """Hauptfunktion"""
+    import sys
+    import argparse
+    from street_store import lade_strassen
+    from konfiguration import konfiguration
+
+    parser = argparse.ArgumentParser(description='Prüft, ob Straßentabellen verlustfrei zerlegt und wieder zusammengesetzt werden')
+    parser.add_argument('csv', nargs='*', default=['wahlbezirke_map.csv', 'wahlbezirke_complete.csv'],
+                        help='Straßentabellen')
+    args = parser.parse_args()
+
+    konfig = konfiguration()
+    fehler = 0
+    for pfad in args.csv:
+        df = lade_strassen(pfad)
+        modell = Datenmodell.aus_tabelle(df, konfig.kreistagskandidaten, konfig.kandidaten_farben)
+        abweichend = modell.abweichungen(df)
+        if abweichend:
+            fehler += 1
+            print(f"✗ {pfad}: abweichende Spalten {', '.join(abweichend)}")
+        else:
+            print(f"✓ {pfad}: {len(df)} Straßen, {len(modell.bezirke)} Bezirke, "
+                  f"{len(modell.kandidaten)} Kandidaten verlustfrei")
+    sys.exit(1 if fehler else 0)
+
+
+if __name__ == "__main__":
+    main()
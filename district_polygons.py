@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Wahlbezirks-Polygone aus geocodierten Straßen
+Leitet für jeden WBZ eine Fläche ab (Voronoi-Zerlegung oder konkave Hülle), beschnitten auf die
+Gemeindegrenze. Geometrien werden pro Bezirk im Cache abgelegt und nur neu berechnet, wenn sich
+die Punkte geändert haben, von denen die Fläche abhängt.
+"""
+
+import os
+import json
+import hashlib
+import argparse
+import logging
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+import folium
+import shapely
+from shapely.geometry import MultiPoint, Point, mapping, shape
+from scipy.spatial import Delaunay
+from map_output import save_map
+from geodesy import ist_ersatzkoordinate
+from street_store import lade_strassen
+
+# Logging konfigurieren
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+METER_PRO_GRAD = 111320.0  # Meter pro Breitengrad (Näherung)
+VORONOI_AUSDEHNUNG_M = 20000.0  # Randzellen reichen so weit über die Standorte hinaus
+CACHE_VERSION = 1  # Bei Änderungen am Verfahren erhöhen, damit alte Cache-Einträge verfallen
+
+# Attribute, die aus der Tabelle in die Polygon-Features übernommen werden
+BEZIRKS_EIGENSCHAFTEN = ('bezirk', 'kandidat', 'kreistagkandidat', 'wahlberechtigte', 'farbe')
+
+
+class LokaleProjektion:
+    """Flächentreue Näherung in Metern um den Mittelpunkt des Gebiets"""
+
+    def __init__(self, lat0: float, lon0: float):
+        self.lat0 = lat0
+        self.lon0 = lon0
+        self.kx = METER_PRO_GRAD * np.cos(np.radians(lat0))
+        self.ky = METER_PRO_GRAD
+
+    def hin(self, lonlat: np.ndarray) -> np.ndarray:
+        return np.column_stack([(lonlat[:, 0] - self.lon0) * self.kx,
+                                (lonlat[:, 1] - self.lat0) * self.ky])
+
+    def zurueck(self, xy: np.ndarray) -> np.ndarray:
+        return np.column_stack([xy[:, 0] / self.kx + self.lon0, xy[:, 1] / self.ky + self.lat0])
+
+
+class PolygonCache:
+    """Legt Bezirks-Geometrien als GeoJSON unter ihrem Schlüssel ab"""
+
+    def __init__(self, cache_dir: str = '.cache/polygone'):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _pfad(self, schluessel: str) -> str:
+        return os.path.join(self.cache_dir, f"{schluessel}.geojson")
+
+    def lade(self, schluessel: str):
+        pfad = self._pfad(schluessel)
+        if not os.path.exists(pfad):
+            return None
+        with open(pfad, 'r', encoding='utf-8') as f:
+            return shape(json.load(f))
+
+    def speichere(self, schluessel: str, geometrie):
+        with open(self._pfad(schluessel), 'w', encoding='utf-8') as f:
+            json.dump(mapping(geometrie), f, separators=(',', ':'))
+
+
+def punkt_hash(*teile) -> str:
+    """Stabiler Hash über Verfahren, Parameter und Punktmengen"""
+    h = hashlib.sha256()
+    for teil in teile:
+        if isinstance(teil, np.ndarray):
+            # Auf Zentimeter runden und sortieren, damit die Reihenfolge der Zeilen egal ist
+            punkte = np.round(teil, 2)
+            punkte = punkte[np.lexsort(punkte.T[::-1])] if len(punkte) else punkte
+            h.update(np.ascontiguousarray(punkte).tobytes())
+        else:
+            h.update(json.dumps(teil, sort_keys=True).encode('utf-8'))
+        h.update(b'|')
+    return h.hexdigest()[:32]
+
+
+def lade_gemeindegrenze(grenz_datei: str, projektion: LokaleProjektion):
+    """Liest die Gemeindegrenze (erstes Polygon-Feature einer GeoJSON-Datei) in Metern ein"""
+    with open(grenz_datei, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('type') == 'FeatureCollection':
+        data = data['features'][0]
+    geometrie = shape(data.get('geometry', data))
+    return shapely.transform(geometrie, projektion.hin)
+
+
+def schaetze_gemeindegrenze(xy: np.ndarray, puffer_m: float, ratio: float):
+    """Ersatzgrenze ohne Grenzdatei: gepufferte konkave Hülle aller Punkte"""
+    return shapely.concave_hull(MultiPoint(xy), ratio=ratio).buffer(puffer_m)
+
+
+def eindeutige_standorte(xy: np.ndarray, wbz: np.ndarray):
+    """Fasst doppelte Koordinaten zusammen, ein Standort gehört dem häufigsten WBZ dort"""
+    tabelle = pd.DataFrame({'x': np.round(xy[:, 0], 2), 'y': np.round(xy[:, 1], 2), 'wbz': wbz})
+    zaehlung = tabelle.groupby(['x', 'y', 'wbz'], sort=False).size().reset_index(name='n')
+    zaehlung = zaehlung.sort_values('n', ascending=False, kind='stable')
+    standorte = zaehlung.drop_duplicates(['x', 'y'])
+
+    konflikte = len(zaehlung) - len(standorte)
+    if konflikte:
+        logger.warning(f"{konflikte} Koordinate(n) von mehreren Bezirken belegt, "
+                       f"zugeordnet nach Mehrheit")
+    return standorte[['x', 'y']].to_numpy(), standorte['wbz'].to_numpy()
+
+
+def delaunay_nachbarn(xy: np.ndarray) -> List[np.ndarray]:
+    """Nachbarn jedes Standorts in der Delaunay-Triangulierung
+
+    Die Voronoi-Zelle eines Standorts hängt nur von diesen Nachbarn ab.
+    """
+    if len(xy) < 4:
+        return [np.delete(np.arange(len(xy)), i) for i in range(len(xy))]
+    indptr, indices = Delaunay(xy).vertex_neighbor_vertices
+    return [indices[indptr[i]:indptr[i + 1]] for i in range(len(xy))]
+
+
+def voronoi_flaeche(eigene: np.ndarray, nachbarn: np.ndarray):
+    """Vereinigung der Voronoi-Zellen der eigenen Standorte, nur aus dem lokalen Umfeld berechnet
+
+    Randzellen reichen bis VORONOI_AUSDEHNUNG_M über das Umfeld hinaus und werden erst
+    danach auf die Gemeindegrenze beschnitten.
+    """
+    standorte = np.vstack([eigene, nachbarn]) if len(nachbarn) else eigene
+    ausdehnung = MultiPoint(standorte).envelope.buffer(VORONOI_AUSDEHNUNG_M)
+    if len(standorte) == 1:
+        return ausdehnung
+
+    diagramm = shapely.voronoi_polygons(MultiPoint(standorte), extend_to=ausdehnung)
+    zellen = np.array(diagramm.geoms)
+    eigene_punkte = shapely.points(eigene)
+    treffer = [zellen[shapely.contains(zellen, p)] for p in eigene_punkte]
+    return shapely.union_all(np.concatenate(treffer))
+
+
+def konkave_flaeche(eigene: np.ndarray, puffer_m: float, ratio: float):
+    """Gepufferte konkave Hülle der eigenen Standorte"""
+    if len(eigene) == 1:
+        return Point(eigene[0]).buffer(puffer_m)
+    return shapely.concave_hull(MultiPoint(eigene), ratio=ratio).buffer(puffer_m)
+
+
+def build_polygone(df: pd.DataFrame, methode: str = 'voronoi', grenz_datei: Optional[str] = None,
+                   puffer_m: float = 300.0, ratio: float = 0.3,
+                   cache: Optional[PolygonCache] = None) -> Dict:
+    """Berechnet für jeden WBZ eine Fläche und liefert eine GeoJSON-FeatureCollection
+
+    Im Cache liegt die unbeschnittene Fläche, der Schlüssel hängt nur von den Standorten ab,
+    die die Fläche bestimmen (bei Voronoi: eigene Standorte und ihre Delaunay-Nachbarn).
+    Das Beschneiden auf die Gemeindegrenze ist billig und passiert bei jedem Lauf.
+    """
+    df = df.dropna(subset=['latitude', 'longitude', 'wbz'])
+    alle_bezirke = df['wbz'].unique()
+    ersatz = ist_ersatzkoordinate(df['latitude'], df['longitude'])
+    if ersatz.any():
+        logger.info(f"{int(ersatz.sum())} Straßen mit Ersatzkoordinate (Ortsmitte) werden ignoriert")
+    df = df[~ersatz].reset_index(drop=True)
+
+    # Bezugspunkt gerundet, damit einzelne verschobene Straßen die Projektion nicht ändern
+    projektion = LokaleProjektion(round(df['latitude'].mean(), 1), round(df['longitude'].mean(), 1))
+    xy = projektion.hin(df[['longitude', 'latitude']].to_numpy(dtype=float))
+
+    if grenz_datei:
+        grenze = lade_gemeindegrenze(grenz_datei, projektion)
+    else:
+        grenze = schaetze_gemeindegrenze(xy, puffer_m, ratio)
+    grenze = shapely.transform(grenze, projektion.zurueck)
+
+    standorte, standort_wbz = eindeutige_standorte(xy, df['wbz'].to_numpy())
+    nachbarn = delaunay_nachbarn(standorte) if methode == 'voronoi' else None
+    cache = cache or PolygonCache()
+
+    features = []
+    neu, aus_cache = 0, 0
+    for wbz, gruppe in df.groupby('wbz', sort=False):
+        eigene_idx = np.flatnonzero(standort_wbz == wbz)
+        eigene = standorte[eigene_idx]
+        if not len(eigene):
+            # Alle Koordinaten des Bezirks gehören mehrheitlich anderen Bezirken
+            continue
+
+        bezug = (CACHE_VERSION, methode, projektion.lat0, projektion.lon0)
+        if methode == 'voronoi':
+            umfeld = np.setdiff1d(np.concatenate([nachbarn[i] for i in eigene_idx]), eigene_idx)
+            schluessel = punkt_hash(*bezug, VORONOI_AUSDEHNUNG_M, eigene, standorte[umfeld])
+        else:
+            schluessel = punkt_hash(*bezug, puffer_m, ratio, eigene)
+
+        flaeche = cache.lade(schluessel)
+        if flaeche is None:
+            if methode == 'voronoi':
+                flaeche = voronoi_flaeche(eigene, standorte[umfeld])
+            else:
+                flaeche = konkave_flaeche(eigene, puffer_m, ratio)
+            flaeche = shapely.set_precision(shapely.transform(flaeche, projektion.zurueck), 1e-7)
+            cache.speichere(schluessel, flaeche)
+            neu += 1
+        else:
+            aus_cache += 1
+
+        geometrie = shapely.set_precision(flaeche.intersection(grenze), 1e-6)
+
+        erste = gruppe.iloc[0]
+        eigenschaften = {'wbz': wbz, 'anzahl_strassen': len(gruppe)}
+        for spalte in BEZIRKS_EIGENSCHAFTEN:
+            if spalte in gruppe.columns and pd.notna(erste[spalte]):
+                wert = erste[spalte]
+                eigenschaften[spalte] = wert.item() if hasattr(wert, 'item') else wert
+        features.append({'type': 'Feature', 'geometry': mapping(geometrie), 'properties': eigenschaften})
+
+    logger.info(f"{len(features)} Bezirksflächen: {neu} neu berechnet, {aus_cache} aus dem Cache")
+    ohne_flaeche = set(alle_bezirke) - {feature['properties']['wbz'] for feature in features}
+    if ohne_flaeche:
+        logger.warning(f"Ohne Fläche (keine verwertbaren Koordinaten): {', '.join(sorted(ohne_flaeche))}")
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def add_polygon_layer(m, polygone: Dict, name: str = 'Wahlbezirke (Flächen)'):
+    """Zeichnet die Bezirksflächen als eigenen Layer in die Karte"""
+    folium.GeoJson(
+        polygone,
+        name=name,
+        style_function=lambda feature: {
+            'fillColor': feature['properties'].get('farbe', '#3388ff'),
+            'color': '#333333',
+            'weight': 1,
+            'fillOpacity': 0.35
+        },
+        tooltip=folium.GeoJsonTooltip(fields=['wbz', 'kandidat', 'anzahl_strassen'],
+                                      aliases=['Wahlbezirk', 'Kandidat/in', 'Straßen'])
+    ).add_to(m)
+
+
+def main():
+    """Hauptfunktion"""
+    parser = argparse.ArgumentParser(description='Leitet Wahlbezirks-Polygone aus geocodierten Straßen ab')
+    parser.add_argument('input', nargs='?', default='wahlbezirke_complete.csv', help='Eingabe-CSV')
+    parser.add_argument('--output', default='wahlbezirke_polygone.geojson', help='Ausgabe-GeoJSON')
+    parser.add_argument('--methode', choices=['voronoi', 'konkav'], default='voronoi',
+                        help='Voronoi-Zerlegung oder konkave Hülle je Bezirk')
+    parser.add_argument('--grenze', default=None,
+                        help='GeoJSON mit der Gemeindegrenze (sonst gepufferte Hülle aller Punkte)')
+    parser.add_argument('--puffer', type=float, default=300.0, help='Puffer in Metern')
+    parser.add_argument('--cache-dir', default='.cache/polygone', help='Verzeichnis für den Geometrie-Cache')
+    parser.add_argument('--karte', default='wahlbezirke_polygone_map.html',
+                        help='HTML-Karte mit den Flächen (leer = keine Karte)')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        logger.error(f"Eingabedatei nicht gefunden: {args.input}")
+        return
+
+    df = lade_strassen(args.input)
+    polygone = build_polygone(df, methode=args.methode, grenz_datei=args.grenze,
+                              puffer_m=args.puffer, cache=PolygonCache(args.cache_dir))
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(polygone, f, ensure_ascii=False, indent=2)
+    logger.info(f"Polygone gespeichert als: {args.output}")
+
+    if args.karte:
+        m = folium.Map(location=[df['latitude'].mean(), df['longitude'].mean()], zoom_start=12)
+        add_polygon_layer(m, polygone)
+        folium.LayerControl().add_to(m)
+        save_map(m, args.karte)
+        logger.info(f"Karte gespeichert als: {args.karte}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Lokaler Ortsteil-Index (Gazetteer)
+Ortsteile und Wohnplätze mit Mittelpunkt und Bounding-Box, einmal aus Offline-Quellen gebaut:
+einem OSM-Export als GeoJSON (place=*-Punkte oder -Flächen, z.B. aus Overpass oder osmium) und/oder
+einem GeoNames-Auszug (DE.txt, Klasse P). Die Ortsteile aus konfiguration.json dienen als Grundstock.
+Wahlbezirke, die nur aus Ortsteilen bestehen, werden damit ohne Nominatim-Anfragen aufgelöst.
+
+    python gazetteer.py --osm orte.geojson --geonames DE.txt
+    python gazetteer.py --suche Gaderoth Oberbröl
+"""
+
+import os
+import re
+import csv
+import json
+import math
+import argparse
+import logging
+import unicodedata
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from difflib import get_close_matches
+from konfiguration import Konfiguration, konfiguration
+
+# Logging konfigurieren
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+RADIUS_KM = 15.0         # GeoNames-Orte nur in diesem Umkreis um das Zentrum der Gemeinde
+GLEICHER_ORT_M = 2000.0  # gleichnamige Einträge verschiedener Quellen in diesem Abstand sind ein Ort
+AEHNLICHKEIT = 0.88      # Mindestähnlichkeit für Namen mit OCR- oder Schreibfehlern
+
+# Halbe Kantenlänge der Bounding-Box für Orte, die nur als Punkt vorliegen (OSM place=*)
+PUNKT_RADIUS_M = {'town': 1500, 'suburb': 800, 'village': 600, 'hamlet': 250,
+                  'isolated_dwelling': 100, 'farm': 100, 'locality': 200}
+STANDARD_RADIUS_M = 400
+
+# Quelle der ungefähren Ortsteil-Koordinaten aus konfiguration.json (kein vermessener Ort)
+QUELLE_KONFIGURATION = 'konfiguration'
+
+# Zusätze in der Zuordnung, die nicht zum Namen gehören: "Elsenroth - Hausnummern 48-56", "(Ortszentrum)"
+ZUSATZ_MUSTER = re.compile(r'\s+-\s+.*$|\s*\(.*?\)\s*$')
+
+
+@dataclass
+class Ort:
+    """Ortsteil mit Mittelpunkt und Bounding-Box (min_lat, min_lon, max_lat, max_lon)"""
+    name: str
+    lat: float
+    lon: float
+    bbox: Tuple[float, float, float, float]
+    art: str = ''
+    quelle: str = ''
+
+
+def schluessel(name: str) -> str:
+    """Vergleichsform eines Namens: ohne Zusätze, Umlaute, Groß-/Kleinschreibung und Trennzeichen"""
+    name = ZUSATZ_MUSTER.sub('', name).casefold().replace('ß', 'ss')
+    name = ''.join(z for z in unicodedata.normalize('NFKD', name) if not unicodedata.combining(z))
+    return re.sub(r'[^a-z0-9]+', '', name)
+
+
+def abstand_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Großkreisabstand in Metern"""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((p2 - p1) / 2) ** 2
+         + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * 6371008.8 * math.asin(math.sqrt(a))
+
+
+def punkt_box(lat: float, lon: float, radius_m: float) -> Tuple[float, float, float, float]:
+    """Bounding-Box um einen Punkt"""
+    dlat = radius_m / 111320.0
+    dlon = dlat / max(math.cos(math.radians(lat)), 1e-6)
+    return (round(lat - dlat, 6), round(lon - dlon, 6), round(lat + dlat, 6), round(lon + dlon, 6))
+
+
+def aus_osm(pfad: str) -> Iterator[Ort]:
+    """Orte aus einem OSM-GeoJSON-Export; Flächen ergeben Schwerpunkt und echte Bounding-Box"""
+    with open(pfad, 'r', encoding='utf-8') as f:
+        features = json.load(f)['features']
+    for feature in features:
+        eigenschaften = feature.get('properties') or {}
+        # Overpass-Exporte legen die Tags teils unter "tags" ab
+        tags = eigenschaften.get('tags', eigenschaften)
+        name, art = tags.get('name'), tags.get('place', '')
+        geometrie = feature.get('geometry')
+        if not name or not geometrie:
+            continue
+        if geometrie['type'] == 'Point':
+            lon, lat = geometrie['coordinates'][:2]
+            box = punkt_box(lat, lon, PUNKT_RADIUS_M.get(art, STANDARD_RADIUS_M))
+        else:
+            from shapely.geometry import shape
+            flaeche = shape(geometrie)
+            mitte = flaeche.centroid
+            lat, lon = mitte.y, mitte.x
+            min_lon, min_lat, max_lon, max_lat = flaeche.bounds
+            box = (round(min_lat, 6), round(min_lon, 6), round(max_lat, 6), round(max_lon, 6))
+        yield Ort(name, round(lat, 6), round(lon, 6), box, art, 'osm')
+
+
+def aus_geonames(pfad: str, zentrum: Tuple[float, float], radius_km: float = RADIUS_KM) -> Iterator[Ort]:
+    """Bewohnte Orte (Klasse P) eines GeoNames-Auszugs im Umkreis des Zentrums"""
+    with open(pfad, 'r', encoding='utf-8', newline='') as f:
+        for zeile in csv.reader(f, delimiter='\t', quoting=csv.QUOTE_NONE):
+            # geonameid, name, asciiname, alternatenames, latitude, longitude, feature class, feature code, ...
+            if len(zeile) < 8 or zeile[6] != 'P':
+                continue
+            lat, lon = float(zeile[4]), float(zeile[5])
+            if abstand_m(lat, lon, *zentrum) > radius_km * 1000:
+                continue
+            yield Ort(zeile[1], lat, lon, punkt_box(lat, lon, STANDARD_RADIUS_M), zeile[7], 'geonames')
+
+
+def aus_konfiguration(konfig: Konfiguration) -> Iterator[Ort]:
+    """Ortsteile mit ungefähren Koordinaten aus konfiguration.json"""
+    for name, (lat, lon) in konfig.ortsteile.items():
+        yield Ort(name, lat, lon, punkt_box(lat, lon, STANDARD_RADIUS_M), '', QUELLE_KONFIGURATION)
+
+
+class Gazetteer:
+    """Ortsteile nach Vergleichsname; gleichnamige, weit entfernte Orte bleiben getrennt"""
+
+    def __init__(self, orte: Iterable[Ort] = (), zentrum: Optional[Tuple[float, float]] = None):
+        self.zentrum = zentrum
+        self._index: Dict[str, List[Ort]] = {}
+        for ort in orte:
+            self.ergaenze(ort)
+
+    def ergaenze(self, ort: Ort) -> bool:
+        """Nimmt einen Ort auf, außer ein gleichnamiger aus einer früheren Quelle liegt nahebei"""
+        eintraege = self._index.setdefault(schluessel(ort.name), [])
+        if any(abstand_m(ort.lat, ort.lon, e.lat, e.lon) < GLEICHER_ORT_M for e in eintraege):
+            return False
+        eintraege.append(ort)
+        return True
+
+    def __len__(self) -> int:
+        return sum(len(eintraege) for eintraege in self._index.values())
+
+    def suche(self, name: str, nahe: Optional[Tuple[float, float]] = None) -> Optional[Ort]:
+        """Ort zu einem Namen; bei mehreren gleichnamigen der nächste zu nahe (sonst zum Zentrum)"""
+        kandidaten = self._index.get(schluessel(name))
+        if not kandidaten:
+            aehnlich = get_close_matches(schluessel(name), list(self._index), n=1, cutoff=AEHNLICHKEIT)
+            if not aehnlich:
+                return None
+            kandidaten = self._index[aehnlich[0]]
+        bezug = nahe or self.zentrum
+        if len(kandidaten) == 1 or bezug is None:
+            return kandidaten[0]
+        return min(kandidaten, key=lambda o: abstand_m(o.lat, o.lon, *bezug))
+
+    def speichere(self, pfad: str):
+        orte = [asdict(ort) for eintraege in self._index.values() for ort in eintraege]
+        with open(pfad, 'w', encoding='utf-8') as f:
+            json.dump({'zentrum': self.zentrum, 'orte': orte}, f, ensure_ascii=False, indent=1)
+
+    @classmethod
+    def lade(cls, pfad: str) -> 'Gazetteer':
+        with open(pfad, 'r', encoding='utf-8') as f:
+            daten = json.load(f)
+        zentrum = tuple(daten['zentrum']) if daten.get('zentrum') else None
+        return cls((Ort(**{**o, 'bbox': tuple(o['bbox'])}) for o in daten['orte']), zentrum)
+
+
+@lru_cache(maxsize=None)
+def gazetteer() -> Gazetteer:
+    """Gazetteer laut Konfiguration, je Prozess einmal geladen; ohne Index nur die konfigurierten Ortsteile"""
+    konfig = konfiguration()
+    pfad = konfig.datei('gazetteer') if 'gazetteer' in konfig.daten['dateien'] else None
+    if pfad and os.path.exists(pfad):
+        return Gazetteer.lade(pfad)
+    logger.warning(f"Kein Gazetteer-Index gefunden ({pfad}), nur Ortsteile aus der Konfiguration "
+                   f"(bauen mit: python gazetteer.py --osm ... / --geonames ...)")
+    return Gazetteer(aus_konfiguration(konfig), konfig.zentrum)
+
+
+def main():
+    """Hauptfunktion"""
+    parser = argparse.ArgumentParser(description='Baut den lokalen Ortsteil-Index oder sucht darin')
+    parser.add_argument('--osm', nargs='*', default=[], help='OSM-Export(e) als GeoJSON mit place=*-Objekten')
+    parser.add_argument('--geonames', nargs='*', default=[], help='GeoNames-Auszug(e), z.B. DE.txt')
+    parser.add_argument('--radius-km', type=float, default=RADIUS_KM, help='Umkreis um das Zentrum (GeoNames)')
+    parser.add_argument('--output', default=None, help='Index (Standard: laut konfiguration.json)')
+    parser.add_argument('--suche', nargs='+', default=None, help='Nur nachschlagen, nicht bauen')
+    args = parser.parse_args()
+
+    konfig = konfiguration()
+    if args.suche:
+        orte = gazetteer()
+        for name in args.suche:
+            ort = orte.suche(name)
+            if ort:
+                print(f"✓ {name}: {ort.name} {ort.lat:.5f}, {ort.lon:.5f} ({ort.art or '-'}, {ort.quelle}) Box {ort.bbox}")
+            else:
+                print(f"✗ {name}: nicht im Index")
+        return
+
+    # Reihenfolge = Vorrang: Flächen und Punkte aus OSM, dann GeoNames, dann konfigurierte Ortsteile
+    orte = Gazetteer(zentrum=konfig.zentrum)
+    for pfad in args.osm:
+        neu = sum(orte.ergaenze(ort) for ort in aus_osm(pfad))
+        logger.info(f"OSM {pfad}: {neu} Orte")
+    for pfad in args.geonames:
+        neu = sum(orte.ergaenze(ort) for ort in aus_geonames(pfad, konfig.zentrum, args.radius_km))
+        logger.info(f"GeoNames {pfad}: {neu} Orte")
+    neu = sum(orte.ergaenze(ort) for ort in aus_konfiguration(konfig))
+    logger.info(f"Konfiguration: {neu} Orte")
+
+    output_file = args.output or konfig.datei('gazetteer')
+    orte.speichere(output_file)
+    print(f"✓ Gazetteer gespeichert: {output_file} ({len(orte)} Orte)")
+
+    # Ortsteile aus der Wahlbezirk-Zuordnung, die der Index nicht kennt
+    fehlend = sorted({o for wbz in konfig.wahlbezirke.values() for o in wbz.get('ortsteile', [])
+                      if orte.suche(o) is None})
+    if fehlend:
+        print(f"Nicht im Index ({len(fehlend)}): {', '.join(fehlend)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,13 @@
 Geocodiert ALLE Straßen aus wahlbezirke_zuordnung.json
 """
 
-import json
 import time
 import pandas as pd
 from geopy.geocoders import Nominatim
 from geopy.exc import GeocoderTimedOut, GeocoderServiceError
+from street_store import schreibe_strassen
+from konfiguration import konfiguration
+from gazetteer import QUELLE_KONFIGURATION, gazetteer
 import logging
 import re
 
@@ -24,8 +26,10 @@ def extract_street_name(street_with_numbers):
     clean_street = re.sub(r'\s*-\s*(alle|\d+.*?)$', '', street_with_numbers).strip()
     return clean_street
 
-def geocode_address(street, city="Nümbrecht", postal_code="51588", retry_count=3):
-    """Geocodiert eine Adresse mit Retry-Logik"""
+def geocode_address(street, city=None, postal_code=None, retry_count=3):
+    """Geocodiert eine Adresse mit Retry-Logik (ohne Angabe Ort und PLZ aus der Konfiguration)"""
+    city = city or konfiguration().gemeinde
+    postal_code = konfiguration().plz if postal_code is None else postal_code
     
     for attempt in range(retry_count):
         try:
@@ -71,10 +75,10 @@ def geocode_address(street, city="Nümbrecht", postal_code="51588", retry_count=
     return None
 
 def main():
-    # Lade wahlbezirke_zuordnung.json
-    with open('wahlbezirke_zuordnung.json', 'r', encoding='utf-8') as f:
-        data = json.load(f)
-        wahlbezirke = data['wahlbezirke']
+    # Gemeinde, Wahlbezirke und Kreistags-Gruppen aus der Konfiguration
+    konfig = konfiguration()
+    wahlbezirke = konfig.wahlbezirke
+    orte = gazetteer()
     
     # Sammle alle Straßen
     all_streets = []
@@ -84,19 +88,30 @@ def main():
         # Für Ortsteile ohne spezifische Straßen
         if 'strassen' not in wbz_data or len(wbz_data['strassen']) == 0:
             if 'ortsteile' in wbz_data and len(wbz_data['ortsteile']) > 0:
-                # Geocodiere den Ortsteil selbst
+                # Ortsteil zuerst im gebauten Gazetteer (OSM/GeoNames), sonst über Nominatim;
+                # die ungefähren Koordinaten aus der Konfiguration nur, wenn Nominatim nichts findet
                 for ortsteil in wbz_data['ortsteile']:
-                    logger.info(f"  Geocodiere Ortsteil: {ortsteil}")
-                    coords = geocode_address(ortsteil, city="Nümbrecht")
+                    ort = orte.suche(ortsteil)
+                    coords = None
+                    if ort and ort.quelle != QUELLE_KONFIGURATION:
+                        logger.info(f"  Ortsteil aus Gazetteer: {ortsteil}")
+                    else:
+                        logger.info(f"  Geocodiere Ortsteil: {ortsteil}")
+                        coords = geocode_address(ortsteil)
+                    if not coords and ort:
+                        if ort.quelle == QUELLE_KONFIGURATION:
+                            logger.info(f"  Ungefähre Lage aus der Konfiguration: {ortsteil}")
+                        coords = {'latitude': ort.lat, 'longitude': ort.lon,
+                                  'display_name': f"Gazetteer ({ort.quelle}): {ort.name}"}
                     
                     if coords:
                         all_streets.append({
                             'street': ortsteil,
                             'original': ortsteil,
                             'house_number': '',
-                            'postal_code': '51588',
-                            'city': 'Nümbrecht',
-                            'full_address': f"{ortsteil}, 51588 Nümbrecht",
+                            'postal_code': konfig.plz,
+                            'city': konfig.gemeinde,
+                            'full_address': konfig.adresse(ortsteil),
                             'wbz': wbz_key,
                             'bezirk': f"{wbz_key} - {wbz_data['name']}",
                             'kandidat': wbz_data['kandidat'],
@@ -115,16 +130,16 @@ def main():
                 street_clean = extract_street_name(street_raw)
                 logger.info(f"  Geocodiere: {street_clean} (von: {street_raw})")
                 
-                coords = geocode_address(street_clean, city="Nümbrecht")
+                coords = geocode_address(street_clean)
                 
                 if coords:
                     all_streets.append({
                         'street': street_clean,
                         'original': street_raw,
                         'house_number': '',
-                        'postal_code': '51588',
-                        'city': 'Nümbrecht',
-                        'full_address': f"{street_clean}, 51588 Nümbrecht",
+                        'postal_code': konfig.plz,
+                        'city': konfig.gemeinde,
+                        'full_address': konfig.adresse(street_clean),
                         'wbz': wbz_key,
                         'bezirk': f"{wbz_key} - {wbz_data['name']}",
                         'kandidat': wbz_data['kandidat'],
@@ -136,26 +151,26 @@ def main():
                     logger.info(f"    ✓ Erfolgreich: {coords['latitude']:.6f}, {coords['longitude']:.6f}")
                 else:
                     logger.warning(f"    ✗ Nicht gefunden: {street_clean}")
-                    # Trotzdem speichern mit Zentrum von Nümbrecht als Fallback
+                    # Trotzdem speichern mit dem Zentrum der Gemeinde als Fallback
                     all_streets.append({
                         'street': street_clean,
                         'original': street_raw,
                         'house_number': '',
-                        'postal_code': '51588',
-                        'city': 'Nümbrecht',
-                        'full_address': f"{street_clean}, 51588 Nümbrecht",
+                        'postal_code': konfig.plz,
+                        'city': konfig.gemeinde,
+                        'full_address': konfig.adresse(street_clean),
                         'wbz': wbz_key,
                         'bezirk': f"{wbz_key} - {wbz_data['name']}",
                         'kandidat': wbz_data['kandidat'],
                         'wahlberechtigte': wbz_data['wahlberechtigte'],
-                        'latitude': 50.9033978,  # Zentrum Nümbrecht
-                        'longitude': 7.5409481,
-                        'geocode_info': 'Fallback: Zentrum Nümbrecht'
+                        'latitude': konfig.zentrum[0],
+                        'longitude': konfig.zentrum[1],
+                        'geocode_info': f"Fallback: Zentrum {konfig.gemeinde}"
                     })
     
     # Speichere als CSV
     df = pd.DataFrame(all_streets)
-    df.to_csv('wahlbezirke_all_streets_geocoded.csv', index=False, encoding='utf-8')
+    schreibe_strassen(df, 'wahlbezirke_all_streets_geocoded.csv')
     
     # Statistik
     logger.info("\n" + "="*50)
@@ -175,15 +190,9 @@ def main():
         logger.info(f"  {kandidat} ({wbz}): {stats['anzahl_strassen']} Straßen/Ortsteile, {stats['wahlberechtigte']} Wahlberechtigte")
     
     # Kreistagskandidaten-Statistik
-    kreistagskandidaten = {
-        'Marcus Schmitz': ['Gisa Hauschildt', 'Jörg Reintsema', 'Ulrike Herrgesell', 'Thomas Hellbusch',
-                          'Philipp Beck', 'Manfred Henry Daub', 'Christopher Seinsche', 'Björn Dittich'],
-        'Thomas Schlegel': ['Dagmar Schmitz', 'Jörg Menne', 'Markus Lang', 'Titzian Crisci',
-                           'Stephan Rühl', 'Roger Adolphs', 'Frank Schmitz', 'Thomas Schlegel']
-    }
-    
     logger.info("\nStatistik pro Kreistagkandidat:")
-    for kreistagkandidat, kandidaten in kreistagskandidaten.items():
+    for kreistagkandidat, info in konfig.kreistagskandidaten.items():
+        kandidaten = info['kandidaten']
         total_strassen = df[df['kandidat'].isin(kandidaten)]['street'].count()
         total_wahlber = df[df['kandidat'].isin(kandidaten)].groupby('kandidat')['wahlberechtigte'].first().sum()
         logger.info(f"  {kreistagkandidat}: {total_strassen} Straßen/Ortsteile, {total_wahlber} Wahlberechtigte")
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Vektorisierte Abstandsberechnung für Straßen und Wahlbezirke
+Haversine-Abstände, Abstandsmatrizen, Zentroide, Bounding-Boxen und Streuungsmaße pro Gruppe
+(WBZ, Kandidat, Kreistagkandidat) – alles mit NumPy, ohne Schleifen über Zeilen oder Gruppen.
+"""
+
+import numpy as np
+import pandas as pd
+from kartendaten import ERSATZ_ZENTRUM
+
+ERDRADIUS_M = 6371008.8  # Mittlerer Erdradius in Metern
+
+# Näherung der kürzesten Rundtour durch n zufällig verteilte Punkte auf Fläche A:
+# L ≈ 0.7124 * sqrt(n * A) (Beardwood-Halton-Hammersley)
+RUNDTOUR_KONSTANTE = 0.7124
+
+# Toleranz in Grad für die Ersatzkoordinate: nur Rundungsfehler, keine echten Nachbarstraßen
+ERSATZ_TOLERANZ = 1e-7
+
+
+def haversine(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Großkreisabstand in Metern, Eingaben werden nach NumPy-Regeln gebroadcastet"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(w, dtype=float)) for w in (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2.0) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2.0) ** 2)
+    return 2.0 * ERDRADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def abstandsmatrix(lat, lon, lat2=None, lon2=None) -> np.ndarray:
+    """Paarweise Abstände (Meter) zwischen zwei Punktmengen, ohne zweite Menge n x n"""
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    lat2 = lat if lat2 is None else np.asarray(lat2, dtype=float)
+    lon2 = lon if lon2 is None else np.asarray(lon2, dtype=float)
+    return haversine(lat[:, None], lon[:, None], lat2[None, :], lon2[None, :])
+
+
+def gruppen_codes(gruppen) -> tuple:
+    """Gruppenwerte in fortlaufende Codes (für bincount) und die zugehörigen Namen
+
+    Fehlende Gruppenwerte bekommen den Code -1 und müssen vor bincount ausgefiltert werden.
+    """
+    codes, namen = pd.factorize(pd.Series(gruppen), sort=True)
+    return codes, namen
+
+
+def zentroide(lat, lon, codes: np.ndarray, anzahl_gruppen: int) -> tuple:
+    """Sphärischer Mittelpunkt je Gruppe über den Mittelwert der Einheitsvektoren"""
+    lat_rad = np.radians(np.asarray(lat, dtype=float))
+    lon_rad = np.radians(np.asarray(lon, dtype=float))
+    x = np.bincount(codes, np.cos(lat_rad) * np.cos(lon_rad), anzahl_gruppen)
+    y = np.bincount(codes, np.cos(lat_rad) * np.sin(lon_rad), anzahl_gruppen)
+    z = np.bincount(codes, np.sin(lat_rad), anzahl_gruppen)
+    return np.degrees(np.arctan2(z, np.hypot(x, y))), np.degrees(np.arctan2(y, x))
+
+
+def bounding_boxes(lat, lon, codes: np.ndarray, anzahl_gruppen: int) -> dict:
+    """Minimale und maximale Koordinaten je Gruppe"""
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    box = {
+        'min_lat': np.full(anzahl_gruppen, np.inf), 'max_lat': np.full(anzahl_gruppen, -np.inf),
+        'min_lon': np.full(anzahl_gruppen, np.inf), 'max_lon': np.full(anzahl_gruppen, -np.inf),
+    }
+    np.minimum.at(box['min_lat'], codes, lat)
+    np.maximum.at(box['max_lat'], codes, lat)
+    np.minimum.at(box['min_lon'], codes, lon)
+    np.maximum.at(box['max_lon'], codes, lon)
+    return box
+
+
+def hauptachsen_verhaeltnis(lat, lon, z_lat, z_lon, codes: np.ndarray, anzahl_gruppen: int) -> np.ndarray:
+    """Wurzel aus kleinstem durch größten Eigenwert der Kovarianz je Gruppe (0 bei < 2 Punkten)"""
+    meter_pro_grad = np.radians(1.0) * ERDRADIUS_M
+    dx = (np.asarray(lon) - z_lon[codes]) * np.cos(np.radians(z_lat[codes])) * meter_pro_grad
+    dy = (np.asarray(lat) - z_lat[codes]) * meter_pro_grad
+    sxx = np.bincount(codes, dx * dx, anzahl_gruppen)
+    syy = np.bincount(codes, dy * dy, anzahl_gruppen)
+    sxy = np.bincount(codes, dx * dy, anzahl_gruppen)
+
+    # Eigenwerte der symmetrischen 2x2-Matrix in geschlossener Form
+    mitte = (sxx + syy) / 2.0
+    radius = np.sqrt(((sxx - syy) / 2.0) ** 2 + sxy ** 2)
+    gross, klein = mitte + radius, np.maximum(mitte - radius, 0.0)
+    return np.sqrt(np.divide(klein, gross, out=np.zeros(anzahl_gruppen), where=gross > 0))
+
+
+def ist_ersatzkoordinate(lat, lon) -> np.ndarray:
+    """Markiert Punkte auf der Ersatzkoordinate (Ortsmitte für nicht gefundene Straßen)"""
+    return (np.isclose(lat, ERSATZ_ZENTRUM[0], rtol=0, atol=ERSATZ_TOLERANZ)
+            & np.isclose(lon, ERSATZ_ZENTRUM[1], rtol=0, atol=ERSATZ_TOLERANZ))
+
+
+def ohne_ersatzkoordinate(df: pd.DataFrame) -> pd.DataFrame:
+    """Entfernt Zeilen ohne Koordinaten oder mit der Ersatzkoordinate (Ortsmitte)"""
+    df = df.dropna(subset=['latitude', 'longitude'])
+    return df[~ist_ersatzkoordinate(df['latitude'], df['longitude'])]
+
+
+def streuung(df: pd.DataFrame, gruppe: str = 'wbz', ohne_ersatz: bool = True) -> pd.DataFrame:
+    """Lage- und Streuungsmaße je Gruppe
+
+    Spalten: Mittelpunkt, Bounding-Box, Ausdehnung Nord-Süd/Ost-West, mittlerer und
+    maximaler Abstand der Straßen zum Mittelpunkt, Streuradius (quadratisches Mittel),
+    Kompaktheit (Verhältnis der Hauptachsen der Punktwolke, 1 = rund, 0 = linienförmig)
+    und eine grobe Schätzung des Fußwegs durch alle Straßen.
+    """
+    if ohne_ersatz:
+        df = ohne_ersatzkoordinate(df)
+    codes, namen = gruppen_codes(df[gruppe])
+    # Straßen ohne Gruppe (z.B. fehlender WBZ) gehören zu keiner Gruppe
+    gueltig = codes >= 0
+    codes = codes[gueltig]
+    lat = df['latitude'].to_numpy(dtype=float)[gueltig]
+    lon = df['longitude'].to_numpy(dtype=float)[gueltig]
+    n = len(namen)
+
+    anzahl = np.bincount(codes, minlength=n)
+    z_lat, z_lon = zentroide(lat, lon, codes, n)
+    abstand = haversine(lat, lon, z_lat[codes], z_lon[codes])
+    box = bounding_boxes(lat, lon, codes, n)
+
+    # Ausdehnung der Box in Metern, gemessen durch den Mittelpunkt
+    ns_m = haversine(box['min_lat'], z_lon, box['max_lat'], z_lon)
+    ow_m = haversine(z_lat, box['min_lon'], z_lat, box['max_lon'])
+    streuradius = np.sqrt(np.bincount(codes, abstand ** 2, n) / anzahl)
+    max_abstand = np.zeros(n)
+    np.maximum.at(max_abstand, codes, abstand)
+    kompaktheit = hauptachsen_verhaeltnis(lat, lon, z_lat, z_lon, codes, n)
+
+    return pd.DataFrame({
+        gruppe: namen,
+        'punkte_mit_koordinaten': anzahl,
+        'zentrum_lat': np.round(z_lat, 6),
+        'zentrum_lon': np.round(z_lon, 6),
+        **{name: np.round(werte, 6) for name, werte in box.items()},
+        'ausdehnung_ns_m': np.round(ns_m),
+        'ausdehnung_ow_m': np.round(ow_m),
+        'mittlerer_abstand_zentrum_m': np.round(np.bincount(codes, abstand, n) / anzahl),
+        'max_abstand_zentrum_m': np.round(max_abstand),
+        'streuradius_m': np.round(streuradius),
+        'kompaktheit': np.round(kompaktheit, 3),
+        'fussweg_schaetzung_m': np.round(RUNDTOUR_KONSTANTE * np.sqrt(anzahl * ns_m * ow_m)),
+    })
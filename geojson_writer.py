@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Streamender GeoJSON-Export
+Schreibt Features einzeln aus einem Iterator, statt die ganze FeatureCollection im Speicher
+aufzubauen. Formate: eingerückt (wie bisher json.dump mit indent=2), kompakt ohne Leerraum mit
+wählbarer Koordinatengenauigkeit, und zeilenweise (NDJSON, ein Feature pro Zeile).
+"""
+
+import os
+import json
+import argparse
+import logging
+import textwrap
+from typing import Dict, Iterable, Optional, Sequence
+
+# Logging konfigurieren
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Umgebungsvariablen für die Konverter (pdf_to_map, wahlbezirke_map, wahlbezirke_map_enhanced)
+KOMPAKT_ENV = 'GEOJSON_KOMPAKT'   # 1 = ohne Einrückung und Leerzeichen
+STELLEN_ENV = 'GEOJSON_STELLEN'   # Nachkommastellen der Koordinaten, z.B. 6 (ca. 0,1 m)
+NDJSON_ENV = 'GEOJSON_NDJSON'     # 1 = zusätzlich .ndjson schreiben
+
+EINRUECKUNG = 2
+
+
+def geojson_optionen() -> Dict:
+    """Ausgabeformat aus der Umgebung"""
+    stellen = os.environ.get(STELLEN_ENV, '').strip()
+    return {
+        'kompakt': os.environ.get(KOMPAKT_ENV, '').lower() in ('1', 'true', 'ja', 'yes'),
+        'stellen': int(stellen) if stellen else None,
+        'ndjson': os.environ.get(NDJSON_ENV, '').lower() in ('1', 'true', 'ja', 'yes'),
+    }
+
+
+def _json_wert(wert):
+    """NumPy-Skalare (z.B. aus DataFrames) wie Python-Zahlen schreiben"""
+    if hasattr(wert, 'item'):
+        return wert.item()
+    raise TypeError(f"Nicht als JSON darstellbar: {type(wert).__name__}")
+
+
+def punkt_feature(lon: float, lat: float, eigenschaften: Dict) -> Dict:
+    return {
+        "type": "Feature",
+        "geometry": {
+            "type": "Point",
+            "coordinates": [lon, lat]
+        },
+        "properties": eigenschaften
+    }
+
+
+def runde_koordinaten(geometrie: Dict, stellen: int) -> Dict:
+    """Kopie der Geometrie mit gerundeten Koordinaten (beliebig verschachtelt)"""
+    def runde(werte):
+        if isinstance(werte, (list, tuple)):
+            return [runde(w) for w in werte]
+        return round(float(werte), stellen)
+    return {**geometrie, 'coordinates': runde(geometrie['coordinates'])}
+
+
+class GeoJSONWriter:
+    """Schreibt eine FeatureCollection (oder NDJSON) Feature für Feature
+
+    with GeoJSONWriter('datei.geojson', kompakt=True, stellen=6) as writer:
+        for feature in features:
+            writer.schreibe(feature)
+    """
+
+    def __init__(self, pfad: str, kompakt: bool = False, stellen: Optional[int] = None,
+                 ndjson: bool = False):
+        self.pfad = pfad
+        self.kompakt = kompakt or ndjson
+        self.stellen = stellen
+        self.ndjson = ndjson
+        self.anzahl = 0
+        self._datei = None
+
+    def __enter__(self) -> 'GeoJSONWriter':
+        self._datei = open(self.pfad, 'w', encoding='utf-8')
+        if not self.ndjson:
+            if self.kompakt:
+                self._datei.write('{"type":"FeatureCollection","features":[')
+            else:
+                self._datei.write('{\n  "type": "FeatureCollection",\n  "features": [')
+        return self
+
+    def _text(self, feature: Dict) -> str:
+        if self.kompakt:
+            return json.dumps(feature, ensure_ascii=False, separators=(',', ':'), default=_json_wert)
+        # Gleiche Form wie json.dump(..., indent=2) der ganzen Collection
+        text = json.dumps(feature, ensure_ascii=False, indent=EINRUECKUNG, default=_json_wert)
+        return textwrap.indent(text, ' ' * 2 * EINRUECKUNG)
+
+    def schreibe(self, feature: Dict):
+        if self.stellen is not None and feature.get('geometry'):
+            feature = {**feature, 'geometry': runde_koordinaten(feature['geometry'], self.stellen)}
+        text = self._text(feature)
+
+        if self.ndjson:
+            self._datei.write(text + '\n')
+        elif self.kompakt:
+            self._datei.write((',' if self.anzahl else '') + text)
+        else:
+            self._datei.write((',\n' if self.anzahl else '\n') + text)
+        self.anzahl += 1
+
+    def __exit__(self, *exc):
+        if not self.ndjson:
+            if self.kompakt:
+                self._datei.write(']}')
+            else:
+                self._datei.write('\n  ]\n}' if self.anzahl else ']\n}')
+        self._datei.close()
+        return False
+
+
+def schreibe_features(pfad: str, features: Iterable[Dict], kompakt: bool = False,
+                      stellen: Optional[int] = None, ndjson: bool = False) -> int:
+    """Schreibt alle Features eines Iterators, liefert deren Anzahl"""
+    with GeoJSONWriter(pfad, kompakt=kompakt, stellen=stellen, ndjson=ndjson) as writer:
+        for feature in features:
+            writer.schreibe(feature)
+    return writer.anzahl
+
+
+def schreibe_punkte(pfad: str, zeilen: Iterable[Dict], eigenschaften: Sequence[str],
+                    kompakt: bool = False, stellen: Optional[int] = None, ndjson: bool = False) -> int:
+    """Punkt-Features aus Zeilen mit latitude/longitude; mit ndjson zusätzlich <pfad>.ndjson"""
+    def features():
+        for zeile in zeilen:
+            yield punkt_feature(zeile['longitude'], zeile['latitude'],
+                                {name: zeile[name] for name in eigenschaften})
+
+    anzahl = schreibe_features(pfad, features(), kompakt=kompakt, stellen=stellen)
+    if ndjson:
+        schreibe_features(f"{os.path.splitext(pfad)[0]}.ndjson", features(), stellen=stellen, ndjson=True)
+    return anzahl
+
+
+def main():
+    """Hauptfunktion"""
+    # Datenmodell (pandas) nur für den Export, die Konverter nutzen nur schreibe_punkte
+    from kartendaten import KartenDaten, QUELLEN
+
+    parser = argparse.ArgumentParser(description='Exportiert eine Straßentabelle als GeoJSON oder NDJSON')
+    parser.add_argument('quelle', nargs='?', choices=list(QUELLEN), default='complete', help='Datenquelle')
+    parser.add_argument('--output', default=None, help='Ausgabedatei (Standard: wahlbezirke_<quelle>.geojson)')
+    parser.add_argument('--eigenschaften', nargs='+',
+                        default=['street', 'wbz', 'bezirk', 'kandidat', 'kreistagkandidat', 'wahlberechtigte'],
+                        help='Spalten, die als Properties übernommen werden')
+    parser.add_argument('--kompakt', action='store_true', help='Ohne Einrückung und Leerzeichen')
+    parser.add_argument('--stellen', type=int, default=None, help='Nachkommastellen der Koordinaten')
+    parser.add_argument('--ndjson', action='store_true', help='Ein Feature pro Zeile (NDJSON)')
+    args = parser.parse_args()
+
+    endung = 'ndjson' if args.ndjson else 'geojson'
+    output_file = args.output or f"wahlbezirke_{args.quelle}.{endung}"
+
+    # Nur die benötigten Spalten aus dem Datenmodell zusammensetzen
+    df = KartenDaten().tabelle(args.quelle, ['latitude', 'longitude', *args.eigenschaften])
+    zeilen = (zeile._asdict() for zeile in df.itertuples(index=False))
+    anzahl = schreibe_features(
+        output_file,
+        (punkt_feature(z['longitude'], z['latitude'], {n: z[n] for n in args.eigenschaften}) for z in zeilen),
+        kompakt=args.kompakt, stellen=args.stellen, ndjson=args.ndjson
+    )
+    logger.info(f"{anzahl} Features gespeichert als: {output_file} "
+                f"({os.path.getsize(output_file) / 1024:.1f} KB)")
+
+
+if __name__ == "__main__":
+    main()
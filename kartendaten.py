@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Gemeinsames Datenmodell für alle Kartenansichten
+Lädt Straßentabellen und JSON-Dateien einmal in das normalisierte Datenmodell (datenmodell.py)
+und liefert daraus die Tabellen mit den abgeleiteten Spalten (Kandidaten-Farbe, Kreistagkandidat,
+Kreistags-Farbe), die bisher jedes Skript selbst berechnet hat.
+"""
+
+import json
+from typing import Dict, Iterable, Optional
+import pandas as pd
+from street_store import lade_strassen
+from datenmodell import Datenmodell
+from konfiguration import konfiguration
+
+# Farben, Kreistags-Gruppen und Zentrum kommen aus der Konfiguration (konfiguration.json)
+_konfig = konfiguration()
+
+# Farbschema für Kreistagskandidaten
+KREISTAGS_FARBEN = _konfig.kreistags_farben
+
+# Kandidaten-Farben (angepasst an Kreistagskandidaten)
+KANDIDATEN_FARBEN = _konfig.kandidaten_farben
+
+# Ersatzkoordinate für nicht gefundene Straßen (Zentrum der Gemeinde), trägt keine Lageinformation
+ERSATZ_ZENTRUM = _konfig.zentrum
+
+# Datenquellen der Ansichten
+QUELLEN = {
+    'map': 'wahlbezirke_map.csv',
+    'complete': 'wahlbezirke_complete.csv'
+}
+
+
+class KartenDaten:
+    """Einmal geladene und aufbereitete Daten, die sich alle Ansichten teilen"""
+
+    def __init__(self, wahlbezirke_file: Optional[str] = None, kreistags_file: Optional[str] = None):
+        # Ohne Angabe die Zuordnungen aus der Konfiguration (einmal je Prozess gelesen)
+        if wahlbezirke_file:
+            with open(wahlbezirke_file, 'r', encoding='utf-8') as f:
+                self.wahlbezirke = json.load(f)['wahlbezirke']
+        else:
+            self.wahlbezirke = _konfig.wahlbezirke
+
+        if kreistags_file:
+            with open(kreistags_file, 'r', encoding='utf-8') as f:
+                self.kreistagskandidaten = json.load(f)['kreistagskandidaten']
+        else:
+            self.kreistagskandidaten = _konfig.kreistagskandidaten
+
+        self._modelle: Dict[str, Datenmodell] = {}
+
+    def lade(self, quellen: Iterable[str]) -> 'KartenDaten':
+        """Lädt die angegebenen Quellen vorab, z.B. bevor die Daten an Worker gehen"""
+        for quelle in quellen:
+            self.modell(quelle)
+        return self
+
+    def modell(self, quelle: str = 'map') -> Datenmodell:
+        """Normalisiertes Modell einer Quelle, einmal geladen"""
+        if quelle not in self._modelle:
+            self._modelle[quelle] = Datenmodell.aus_tabelle(lade_strassen(QUELLEN[quelle]),
+                                                            self.kreistagskandidaten, KANDIDATEN_FARBEN)
+        return self._modelle[quelle]
+
+    def tabelle(self, quelle: str = 'map', spalten: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Neue, frei änderbare Tabelle; mit spalten werden nur diese Spalten zusammengesetzt"""
+        return self.modell(quelle).tabelle(spalten)
+
+    def kreistags_kandidaten_listen(self) -> Dict[str, list]:
+        """Kreistagkandidat -> Liste der zugehörigen CDU-Kandidaten"""
+        return {name: info['kandidaten'] for name, info in self.kreistagskandidaten.items()}
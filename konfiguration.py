@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Konfiguration für Gemeinde und Wahl
+Gemeinde (Name, PLZ, Zentrum), Farben, bekannte Ortsteile und die Pfade zu Wahlbezirk- und
+Kreistags-Zuordnung stehen in einer JSON-Datei (Standard: konfiguration.json neben diesem Modul,
+sonst WAHLKARTE_KONFIG). Eine andere Gemeinde oder Wahl braucht damit nur eine eigene Datei.
+Die Datei wird je Prozess einmal gelesen; abgeleitete Nachschlagetabellen (Kandidat ->
+Kreistagkandidat, Kreistags-Farben) werden beim ersten Zugriff einmal berechnet.
+"""
+
+import os
+import json
+import argparse
+from functools import cached_property, lru_cache
+from typing import Dict, List, Optional, Tuple
+
+KONFIG_ENV = 'WAHLKARTE_KONFIG'
+STANDARD_PFAD = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'konfiguration.json')
+
+
+class Konfiguration:
+    """Inhalt der Konfigurationsdatei; relative Pfade gelten ab deren Verzeichnis"""
+
+    def __init__(self, pfad: str):
+        self.pfad = pfad
+        with open(pfad, 'r', encoding='utf-8') as f:
+            self.daten = json.load(f)
+        gemeinde = self.daten['gemeinde']
+        self.gemeinde: str = gemeinde['name']
+        self.plz: str = gemeinde.get('plz', '')
+        # Ersatzkoordinate für nicht gefundene Straßen, trägt keine Lageinformation
+        self.zentrum: Tuple[float, float] = tuple(gemeinde['zentrum'])
+        farben = self.daten.get('farben', {})
+        self.kandidaten_farben: Dict[str, str] = farben.get('kandidaten', {})
+        self.kandidaten_farben_einzeln: Dict[str, str] = farben.get('kandidaten_einzeln', self.kandidaten_farben)
+        self.wahlbezirk_farben: List[str] = farben.get('wahlbezirke', [])
+        self.farbe_unbekannt: str = farben.get('unbekannt', '#808080')
+        self.ortsteile: Dict[str, Tuple[float, float]] = {
+            name: tuple(lage) for name, lage in self.daten.get('ortsteile', {}).items()
+        }
+
+    def datei(self, name: str) -> str:
+        """Pfad einer Datendatei aus dem Abschnitt "dateien" """
+        return os.path.join(os.path.dirname(self.pfad), self.daten['dateien'][name])
+
+    def adresse(self, strasse: str) -> str:
+        """Suchadresse, z.B. 'Poststraße, 51588 Nümbrecht'"""
+        return f"{strasse}, {self.plz} {self.gemeinde}" if self.plz else f"{strasse}, {self.gemeinde}"
+
+    @cached_property
+    def wahlbezirke(self) -> Dict[str, Dict]:
+        with open(self.datei('wahlbezirke'), 'r', encoding='utf-8') as f:
+            return json.load(f)['wahlbezirke']
+
+    @cached_property
+    def kreistagskandidaten(self) -> Dict[str, Dict]:
+        with open(self.datei('kreistagskandidaten'), 'r', encoding='utf-8') as f:
+            return json.load(f)['kreistagskandidaten']
+
+    @cached_property
+    def kreistags_farben(self) -> Dict[str, str]:
+        return {name: info['farbe'] for name, info in self.kreistagskandidaten.items()}
+
+    @cached_property
+    def kreistag_von_kandidat(self) -> Dict[str, str]:
+        """CDU-Kandidat -> Kreistagkandidat"""
+        return {kandidat: name for name, info in self.kreistagskandidaten.items()
+                for kandidat in info['kandidaten']}
+
+
+@lru_cache(maxsize=None)
+def _lade(pfad: str) -> Konfiguration:
+    return Konfiguration(pfad)
+
+
+def konfiguration(pfad: Optional[str] = None) -> Konfiguration:
+    """Konfiguration aus pfad, WAHLKARTE_KONFIG oder konfiguration.json (je Datei einmal geladen)"""
+    return _lade(os.path.abspath(pfad or os.environ.get(KONFIG_ENV) or STANDARD_PFAD))
+
+
+def main():
+    """Hauptfunktion"""
+    parser = argparse.ArgumentParser(description='Zeigt die wirksame Konfiguration')
+    parser.add_argument('pfad', nargs='?', default=None, help='Konfigurationsdatei (Standard: WAHLKARTE_KONFIG bzw. konfiguration.json)')
+    args = parser.parse_args()
+
+    konfig = konfiguration(args.pfad)
+    print(f"✓ {konfig.pfad}")
+    print(f"Gemeinde: {konfig.plz} {konfig.gemeinde}, Zentrum {konfig.zentrum[0]:.6f}, {konfig.zentrum[1]:.6f}")
+    print(f"Wahlbezirke: {len(konfig.wahlbezirke)} ({konfig.datei('wahlbezirke')})")
+    for name, info in konfig.kreistagskandidaten.items():
+        print(f"Kreistag {name}: {len(info['kandidaten'])} Kandidaten, Farbe {info['farbe']}")
+    print(f"Bekannte Ortsteile: {len(konfig.ortsteile)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Lazy Popups für Straßen-Marker
+Die Seite enthält nur kompakte Attribute pro Straße, das Popup-HTML entsteht erst beim Klick
+"""
+
+import os
+import json
+from typing import Dict, Optional, Sequence
+import pandas as pd
+from branca.element import MacroElement
+from jinja2 import Template
+
+# Umgebungsvariable für den Lazy-Popup-Modus aller Kartengeneratoren
+LAZY_POPUPS_ENV = 'KARTE_LAZY_POPUPS'
+
+# Popup-Vorlagen mit {feld}-Platzhaltern, Werte werden beim Einsetzen HTML-escaped
+POPUP_TEMPLATES = {
+    'basis': (
+        '<b>{street}</b><br>{original}<br>{postal_code} {city}<br><hr>'
+        '<b>Wahlbezirk:</b> {bezirk}<br>'
+        '<b>CDU-Kandidat/in:</b> {kandidat}<br>'
+        '<b>Wahlberechtigte im Bezirk:</b> {wahlberechtigte}<br>'
+        '<small>Lat: {latitude}, Lon: {longitude}</small>'
+    ),
+    'kreistag': (
+        '<div style="font-family: Arial, sans-serif;">'
+        '<b style="font-size: 14px;">{street}</b><br>'
+        '<span style="color: #666;">{original}</span><br>'
+        '<span style="color: #666;">{postal_code} {city}</span><br>'
+        '<hr style="margin: 5px 0;">'
+        '<b>Wahlbezirk:</b> {bezirk}<br>'
+        '<b>CDU-Kandidat/in:</b> {kandidat}<br>'
+        '<b>Kreistagkandidat:</b> <span style="color: {kreistag_farbe}; font-weight: bold;">{kreistagkandidat}</span><br>'
+        '<b>Wahlberechtigte:</b> {wahlberechtigte}<br>'
+        '<small style="color: #999;">Koordinaten: {latitude}, {longitude}</small>'
+        '</div>'
+    ),
+    'adresse': (
+        '<b>{street} {house_number}</b><br>{postal_code} {city}<br>'
+        '<small>Lat: {latitude}, Lon: {longitude}</small>'
+    ),
+    'tooltip': '{street} ({wbz})',
+    'tooltip_kandidat': '{street} ({kandidat})',
+    'tooltip_adresse': '{full_address}',
+}
+
+# Attribute, die pro Wahlbezirk gleich sind und nur einmal in der Seite stehen
+BEZIRKS_SPALTEN = (
+    'bezirk', 'kandidat', 'wahlberechtigte', 'farbe', 'postal_code', 'city',
+    'kreistagkandidat', 'kandidat_farbe', 'kreistag_farbe'
+)
+
+# Attribute, die pro Straße in die Seite geschrieben werden
+STRASSEN_SPALTEN = (
+    'street', 'original', 'house_number', 'postal_code', 'city', 'full_address', 'wbz',
+    'latitude', 'longitude'
+)
+
+
+def lazy_popups_aktiv() -> bool:
+    """Prüft, ob der Lazy-Popup-Modus über die Umgebung eingeschaltet ist"""
+    return os.environ.get(LAZY_POPUPS_ENV, '').lower() in ('1', 'true', 'ja', 'yes')
+
+
+class LazyPopupDaten(MacroElement):
+    """Gemeinsame Vorlagen, Bezirksattribute und JS-Funktionen, einmal pro Karte im <head>"""
+
+    _template = Template("""
+{% macro header(this, kwargs) %}
+<script>
+var wahlkarteDatenbasis = {
+    templates: {{ this.templates|tojson }},
+    bezirke: {{ this.bezirke|tojson }}
+};
+function wahlkarteEscape(wert) {
+    if (wert === null || wert === undefined) return '';
+    return String(wert).replace(/[&<>"']/g, function(c) {
+        return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+    });
+}
+function wahlkarteRender(name, d) {
+    return wahlkarteDatenbasis.templates[name].replace(/\\{(\\w+)\\}/g, function(_, feld) {
+        return wahlkarteEscape(d[feld]);
+    });
+}
+function wahlkarteZeile(felder, zeile) {
+    var d = {};
+    felder.forEach(function(feld, i) { d[feld] = zeile[i]; });
+    var bezirk = wahlkarteDatenbasis.bezirke[d.wbz];
+    if (bezirk) {
+        for (var feld in bezirk) {
+            if (!(feld in d)) d[feld] = bezirk[feld];
+        }
+    }
+    return d;
+}
+function wahlkarteMarker(ziel, optionen, felder, zeilen) {
+    zeilen.forEach(function(zeile) {
+        var d = wahlkarteZeile(felder, zeile);
+        var stil = {};
+        for (var opt in optionen.stil) stil[opt] = optionen.stil[opt];
+        for (var opt in optionen.dynamisch) stil[opt] = d[optionen.dynamisch[opt]];
+        var marker = optionen.typ === 'marker'
+            ? L.marker([d.latitude, d.longitude])
+            : L.circleMarker([d.latitude, d.longitude], stil);
+        // Popup-HTML erst beim Öffnen erzeugen
+        marker.bindPopup(function() { return wahlkarteRender(optionen.popup, d); }, {maxWidth: 300});
+        if (optionen.tooltip) {
+            marker.bindTooltip(wahlkarteRender(optionen.tooltip, d), {sticky: true});
+        }
+        marker.addTo(ziel);
+    });
+}
+</script>
+{% endmacro %}
+""")
+
+    def __init__(self):
+        super().__init__()
+        self._name = 'LazyPopupDaten'
+        self.templates = {}
+        self.bezirke = {}
+
+
+class LazyMarkers(MacroElement):
+    """Erzeugt die Marker einer Gruppe im Browser aus kompakten Zeilen"""
+
+    _template = Template("""
+{% macro script(this, kwargs) %}
+wahlkarteMarker({{ this._parent.get_name() }}, {{ this.optionen|tojson }}, {{ this.felder|tojson }}, {{ this.zeilen|tojson }});
+{% endmacro %}
+""")
+
+    def __init__(self, felder: Sequence[str], zeilen: list, optionen: Dict):
+        super().__init__()
+        self._name = 'LazyMarkers'
+        self.felder = list(felder)
+        self.zeilen = zeilen
+        self.optionen = optionen
+
+
+def get_popup_daten(m) -> LazyPopupDaten:
+    """Liefert das gemeinsame Datenelement der Karte und legt es bei Bedarf an"""
+    for child in m._children.values():
+        if isinstance(child, LazyPopupDaten):
+            return child
+    daten = LazyPopupDaten()
+    m.add_child(daten)
+    return daten
+
+
+def add_lazy_markers(m, ziel, df: pd.DataFrame, popup: str = 'basis',
+                     tooltip: Optional[str] = 'tooltip', stil: Optional[Dict] = None,
+                     dynamischer_stil: Optional[Dict[str, str]] = None,
+                     marker_typ: str = 'circle'):
+    """Fügt die Zeilen von df als Lazy-Marker zu ziel (Karte oder FeatureGroup) hinzu
+
+    stil enthält feste Leaflet-Optionen (radius, weight, ...), dynamischer_stil
+    ordnet Leaflet-Optionen einer Spalte zu, z.B. {'color': 'kandidat_farbe'}.
+    """
+    if df.empty:
+        return
+
+    daten = get_popup_daten(m)
+    daten.templates[popup] = POPUP_TEMPLATES[popup]
+    if tooltip:
+        daten.templates[tooltip] = POPUP_TEMPLATES[tooltip]
+
+    dynamischer_stil = dynamischer_stil or {}
+    if 'wbz' in df.columns:
+        # Nur Spalten auslagern, die innerhalb jedes Bezirks tatsächlich konstant sind
+        kandidaten_spalten = [s for s in BEZIRKS_SPALTEN if s in df.columns]
+        konstant = df.groupby('wbz')[kandidaten_spalten].nunique(dropna=False).le(1).all()
+        bezirks_spalten = [s for s in kandidaten_spalten if konstant[s]]
+        bezirke = json.loads(df.groupby('wbz')[bezirks_spalten].first().to_json(orient='index'))
+        for wbz, attribute in bezirke.items():
+            daten.bezirke.setdefault(wbz, {}).update(attribute)
+    else:
+        bezirks_spalten = []
+
+    # Pro Straße nur die Spalten, die nicht schon in der Bezirkstabelle stehen
+    felder = [s for s in dict.fromkeys(STRASSEN_SPALTEN + BEZIRKS_SPALTEN)
+              if s in df.columns and s not in bezirks_spalten]
+    felder += [s for s in dynamischer_stil.values() if s not in felder and s not in bezirks_spalten]
+
+    zeilen_df = df[felder].copy()
+    zeilen_df[['latitude', 'longitude']] = zeilen_df[['latitude', 'longitude']].round(6)
+    zeilen = json.loads(zeilen_df.to_json(orient='values', force_ascii=False))
+
+    optionen = {
+        'typ': marker_typ,
+        'popup': popup,
+        'tooltip': tooltip,
+        'stil': stil or {},
+        'dynamisch': dynamischer_stil
+    }
+    ziel.add_child(LazyMarkers(felder, zeilen, optionen))
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Kompakte Kartenausgabe
+Schreibt folium-Karten deterministisch, minifiziert und vorkomprimiert (.gz / .br)
+"""
+
+import os
+import re
+import gzip
+from collections import Counter
+from typing import Dict, Optional
+
+try:
+    import brotli
+except ImportError:  # Brotli ist optional, .br wird dann übersprungen
+    brotli = None
+
+# Umgebungsvariable für den Kompaktmodus aller Kartengeneratoren
+KOMPAKT_ENV = 'KARTE_KOMPAKT'
+
+# folium/branca vergeben zufällige 32-stellige Hex-IDs (z.B. map_3f2a...)
+ZUFALLS_ID_PATTERN = re.compile(r'_([0-9a-f]{32})(?![0-9a-zA-Z])')
+
+# Nur statische Style-Werte werden zu Klassen (keine JS-Verkettung oder Templates)
+STYLE_ATTR_PATTERN = re.compile(r'''\sstyle="([^"'<>{}+$`]*)"''')
+TAG_PATTERN = re.compile(r'<[a-zA-Z][a-zA-Z0-9]*\s[^<>]*?style="[^<>]*?>')
+CLASS_ATTR_PATTERN = re.compile(r'''\sclass="([^"'<>{}+$`]*)"''')
+
+
+def kompakt_aktiv() -> bool:
+    """Prüft, ob der Kompaktmodus über die Umgebung eingeschaltet ist"""
+    return os.environ.get(KOMPAKT_ENV, '').lower() in ('1', 'true', 'ja', 'yes')
+
+
+def stabilisiere_ids(html: str) -> str:
+    """Ersetzt die zufälligen folium-IDs durch fortlaufende Nummern"""
+    mapping = {}
+
+    def ersetze(match):
+        zufalls_id = match.group(1)
+        if zufalls_id not in mapping:
+            mapping[zufalls_id] = str(len(mapping))
+        return '_' + mapping[zufalls_id]
+
+    return ZUFALLS_ID_PATTERN.sub(ersetze, html)
+
+
+def normalisiere_style(style: str) -> str:
+    """Bringt einen Style-Wert in eine kanonische einzeilige Form"""
+    deklarationen = [d.strip() for d in style.split(';')]
+    deklarationen = [re.sub(r'\s*:\s*', ':', re.sub(r'\s+', ' ', d)) for d in deklarationen if d]
+    return ';'.join(deklarationen)
+
+
+def dedupliziere_styles(html: str, min_vorkommen: int = 2) -> str:
+    """Fasst wiederholte Inline-Styles (z.B. in Popups) zu CSS-Klassen zusammen"""
+    zaehler = Counter(normalisiere_style(s) for s in STYLE_ATTR_PATTERN.findall(html))
+    wiederholt = sorted(s for s, anzahl in zaehler.items() if s and anzahl >= min_vorkommen)
+    if not wiederholt:
+        return html
+
+    klassen = {style: f"s{i}" for i, style in enumerate(wiederholt)}
+
+    def ersetze_tag(match):
+        tag = match.group(0)
+        style_match = STYLE_ATTR_PATTERN.search(tag)
+        if not style_match:
+            return tag
+        klasse = klassen.get(normalisiere_style(style_match.group(1)))
+        if not klasse:
+            return tag
+
+        class_match = CLASS_ATTR_PATTERN.search(tag)
+        if class_match:
+            # Vorhandenes class-Attribut erweitern, Style entfernen
+            tag = tag[:style_match.start()] + tag[style_match.end():]
+            return CLASS_ATTR_PATTERN.sub(f' class="{class_match.group(1)} {klasse}"', tag, count=1)
+        if ' class=' in tag:
+            # Dynamisches class-Attribut, nicht anfassen
+            return tag
+        return tag[:style_match.start()] + f' class="{klasse}"' + tag[style_match.end():]
+
+    html = TAG_PATTERN.sub(ersetze_tag, html)
+
+    css = ''.join(f".{klasse}{{{style}}}" for style, klasse in klassen.items())
+    style_block = f"<style>{css}</style>"
+    if '</head>' in html:
+        return html.replace('</head>', style_block + '</head>', 1)
+    return style_block + html
+
+
+def minify_html(html: str) -> str:
+    """Entfernt Einrückungen, Leerzeilen und Kommentarzeilen aus HTML/JS/CSS"""
+    zeilen = []
+    in_script = False
+
+    for zeile in html.splitlines():
+        zeile = zeile.strip()
+        if not zeile:
+            continue
+
+        if '<script' in zeile:
+            in_script = True
+        if in_script and zeile.startswith('//'):
+            continue
+        if '</script>' in zeile:
+            in_script = False
+
+        # Reine HTML-Kommentarzeilen entfernen
+        if zeile.startswith('<!--') and zeile.endswith('-->'):
+            continue
+
+        zeilen.append(zeile)
+
+    # Zeilenumbrüche bleiben erhalten, damit die automatische Semikolon-Ergänzung in JS funktioniert
+    return '\n'.join(zeilen) + '\n'
+
+
+def kompaktiere_html(html: str) -> str:
+    """Wendet alle Kompaktierungsschritte in fester Reihenfolge an"""
+    html = stabilisiere_ids(html)
+    html = dedupliziere_styles(html)
+    return minify_html(html)
+
+
+def schreibe_komprimiert(output_file: str, daten: bytes) -> Dict[str, int]:
+    """Schreibt vorkomprimierte Geschwister-Dateien (.gz und, falls verfügbar, .br)"""
+    groessen = {}
+
+    # mtime=0 und leerer Dateiname, damit .gz bei gleichem Inhalt byte-identisch bleibt
+    with open(output_file + '.gz', 'wb') as f:
+        with gzip.GzipFile(filename='', mode='wb', fileobj=f, compresslevel=9, mtime=0) as gz:
+            gz.write(daten)
+    groessen['gz'] = os.path.getsize(output_file + '.gz')
+
+    if brotli is not None:
+        with open(output_file + '.br', 'wb') as f:
+            f.write(brotli.compress(daten, quality=11))
+        groessen['br'] = os.path.getsize(output_file + '.br')
+
+    return groessen
+
+
+def format_groesse(anzahl_bytes: int) -> str:
+    """Formatiert eine Dateigröße in KB"""
+    return f"{anzahl_bytes / 1024:.1f} KB"
+
+
+def print_groessenbericht(output_file: str, bericht: Dict[str, int]):
+    """Gibt die Größenreduktion einer Datei aus"""
+    original = bericht['original']
+    teile = [f"{format_groesse(original)} → {format_groesse(bericht['kompakt'])}"
+             f" ({100 * (1 - bericht['kompakt'] / original):.0f}% kleiner)"]
+    for endung in ('gz', 'br'):
+        if endung in bericht:
+            teile.append(f".{endung}: {format_groesse(bericht[endung])}"
+                         f" ({100 * (1 - bericht[endung] / original):.0f}% kleiner)")
+    print(f"  Größe {os.path.basename(output_file)}: " + ', '.join(teile))
+    if 'br' not in bericht:
+        print("  Hinweis: 'brotli' nicht installiert, keine .br-Datei geschrieben")
+
+
+def save_map(m, output_file: str, kompakt: Optional[bool] = None) -> Optional[Dict[str, int]]:
+    """Speichert eine folium-Karte, im Kompaktmodus minifiziert und vorkomprimiert
+
+    Ohne Kompaktmodus verhält sich die Funktion wie m.save(output_file).
+    Der Modus wird über den Parameter oder die Umgebungsvariable KARTE_KOMPAKT gewählt.
+    """
+    if kompakt is None:
+        kompakt = kompakt_aktiv()
+
+    if not kompakt:
+        m.save(output_file)
+        return None
+
+    html = m.get_root().render()
+    kompakt_html = kompaktiere_html(html)
+    daten = kompakt_html.encode('utf-8')
+
+    with open(output_file, 'wb') as f:
+        f.write(daten)
+
+    bericht = {'original': len(html.encode('utf-8')), 'kompakt': len(daten)}
+    bericht.update(schreibe_komprimiert(output_file, daten))
+    print_groessenbericht(output_file, bericht)
+    return bericht
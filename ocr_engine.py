@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+OCR-Backend mit dauerhaft geladener Tesseract-Engine
+pytesseract startet für jede Seite einen eigenen tesseract-Prozess, schreibt das Bild in eine
+temporäre Datei und lädt die Sprachdaten (deu.traineddata) jedes Mal neu. Ist tesserocr
+installiert, wird stattdessen je Thread eine Engine einmal initialisiert und die Seiten werden
+direkt aus dem Speicher übergeben. Ohne tesserocr wird wie bisher pytesseract verwendet.
+"""
+
+import os
+import csv
+import time
+import argparse
+import logging
+import threading
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple
+from PIL import Image
+from pdf2image import convert_from_path
+from ocr_layout import LAYOUT_DPI, analysiere, ausschnitte
+from ocr_vorverarbeitung import Vorverarbeitung, vorverarbeiten
+from seiten_cache import SeitenCache
+
+try:
+    import tesserocr
+except ImportError:  # tesserocr ist optional (braucht libtesseract), sonst pytesseract
+    tesserocr = None
+
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+# Logging konfigurieren
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SPRACHE = 'deu'
+DPI = 300
+ADAPTIV_ENV = 'OCR_ADAPTIV'  # 1 = Layout-Durchgang, dann nur Textbereiche mit passender Auflösung
+NACHERKENNUNG_ENV = 'OCR_NACHERKENNUNG'  # 1 = unsichere Zeilen gezielt erneut erkennen
+
+# Selektive Nacherkennung: Zeilen unter der Schwelle werden aus einer höher aufgelösten Seite
+# ausgeschnitten und als Einzelzeile bzw. Block erneut erkannt; das sicherere Ergebnis gilt
+KONFIDENZ_SCHWELLE = 70.0
+NACHERKENNUNG_DPI = 450
+NACHERKENNUNG_PSM = (7, 6)  # einzelne Textzeile, einheitlicher Block
+SEITEN_PSM = 3               # automatische Segmentierung wie image_to_string
+
+# Seitensegmentierung für Wortboxen aus Tabellen: ein einheitlicher Textblock
+TABELLEN_PSM = 6
+
+# Engines je Thread (eine Tesseract-API ist nicht threadsicher)
+_lokal = threading.local()
+
+
+@dataclass
+class Wort:
+    """Erkanntes Wort mit Box in Pixeln und Konfidenz (0-100)"""
+    text: str
+    links: int
+    oben: int
+    rechts: int
+    unten: int
+    konfidenz: float
+    zeile: Tuple[int, int, int] = (0, 0, 0)  # Block, Absatz, Zeile laut Tesseract
+
+
+@dataclass
+class Textzeile:
+    """Eine erkannte Zeile mit mittlerer Wort-Konfidenz"""
+    text: str
+    konfidenz: float
+    links: int
+    oben: int
+    rechts: int
+    unten: int
+    absatz: Tuple[int, int]
+    nachgelesen: bool = False
+
+
+class OCREngine:
+    """Eine Tesseract-Instanz, die über viele Seiten hinweg geladen bleibt"""
+
+    def __init__(self, sprache: str = SPRACHE, backend: Optional[str] = None,
+                 vorverarbeitung: Optional[Vorverarbeitung] = None):
+        self.sprache = sprache
+        self.backend = backend or ('tesserocr' if tesserocr is not None else 'pytesseract')
+        self.vorverarbeitung = vorverarbeitung
+        self._api = None
+
+        if self.backend == 'tesserocr':
+            if tesserocr is None:
+                raise RuntimeError("tesserocr ist nicht installiert")
+            self._api = tesserocr.PyTessBaseAPI(lang=sprache)
+        elif pytesseract is None:
+            raise RuntimeError("Weder tesserocr noch pytesseract ist installiert")
+
+    def vorbereitet(self, bild: Image.Image) -> Image.Image:
+        """Seite nach der eingestellten Vorverarbeitung (ohne: unverändert)"""
+        return vorverarbeiten(bild, self.vorverarbeitung) if self.vorverarbeitung else bild
+
+    def text(self, bild: Image.Image) -> str:
+        """OCR einer Seite"""
+        bild = self.vorbereitet(bild)
+        if self._api is None:
+            return pytesseract.image_to_string(bild, lang=self.sprache)
+        self._api.SetImage(bild)
+        return self._api.GetUTF8Text()
+
+    def woerter(self, bild: Image.Image, psm: int = TABELLEN_PSM, roh: bool = False) -> List[Wort]:
+        """Wortboxen einer Seite (Tesseract TSV bzw. Result-Iterator); roh=True ohne Vorverarbeitung"""
+        if not roh:
+            bild = self.vorbereitet(bild)
+        if self._api is None:
+            daten = pytesseract.image_to_data(bild, lang=self.sprache, config=f'--psm {psm}',
+                                              output_type=pytesseract.Output.DICT)
+            return [
+                Wort(text.strip(), links, oben, links + breite, oben + hoehe, float(konfidenz),
+                     (block, absatz, zeile))
+                for text, links, oben, breite, hoehe, konfidenz, block, absatz, zeile in zip(
+                    daten['text'], daten['left'], daten['top'], daten['width'], daten['height'], daten['conf'],
+                    daten['block_num'], daten['par_num'], daten['line_num'])
+                if text.strip()
+            ]
+
+        self._api.SetPageSegMode(psm)
+        try:
+            self._api.SetImage(bild)
+            self._api.Recognize()
+            ebene = tesserocr.RIL.WORD
+            ergebnis = []
+            block = absatz = zeile = 0
+            for wort in tesserocr.iterate_level(self._api.GetIterator(), ebene):
+                # Zeilennummern wie im TSV von Tesseract (je Absatz ab 1)
+                if wort.IsAtBeginningOf(tesserocr.RIL.BLOCK):
+                    block, absatz, zeile = block + 1, 0, 0
+                if wort.IsAtBeginningOf(tesserocr.RIL.PARA):
+                    absatz, zeile = absatz + 1, 0
+                if wort.IsAtBeginningOf(tesserocr.RIL.TEXTLINE):
+                    zeile += 1
+                text = (wort.GetUTF8Text(ebene) or '').strip()
+                if text:
+                    ergebnis.append(Wort(text, *wort.BoundingBox(ebene), float(wort.Confidence(ebene)),
+                                         (block, absatz, zeile)))
+            return ergebnis
+        finally:
+            self._api.SetPageSegMode(tesserocr.PSM.AUTO)
+
+    def schliessen(self):
+        if self._api is not None:
+            self._api.End()
+            self._api = None
+
+    def __enter__(self) -> 'OCREngine':
+        return self
+
+    def __exit__(self, *exc):
+        self.schliessen()
+        return False
+
+
+def engine(sprache: str = SPRACHE) -> OCREngine:
+    """Engine des aktuellen Threads bzw. Worker-Prozesses (wird beim ersten Aufruf geladen)
+
+    Die Bildvorverarbeitung richtet sich nach der Umgebungsvariable OCR_VORVERARBEITUNG.
+    """
+    engines = getattr(_lokal, 'engines', None)
+    if engines is None:
+        engines = _lokal.engines = {}
+    if sprache not in engines:
+        engines[sprache] = OCREngine(sprache, vorverarbeitung=Vorverarbeitung.aus_umgebung())
+        logger.info(f"OCR-Engine geladen: {engines[sprache].backend} ({sprache})")
+    return engines[sprache]
+
+
+def seiten_text(seiten: List[Image.Image], sprache: str = SPRACHE) -> str:
+    """OCR mehrerer Seiten mit derselben Engine, Seiten durch Zeilenumbruch getrennt"""
+    ocr = engine(sprache)
+    full_text = ""
+    for i, seite in enumerate(seiten):
+        logger.info(f"Verarbeite Seite {i+1}/{len(seiten)}")
+        full_text += ocr.text(seite) + "\n"
+    return full_text
+
+
+def seitenbilder(pdf_path: str, dpi: int, grau: bool = False,
+                 seiten_cache: Optional[SeitenCache] = None) -> List[Image.Image]:
+    """Alle Seiten als Bilder, aus dem Seiten-Cache (Graustufen) oder frisch gerastert"""
+    if seiten_cache is not None:
+        return seiten_cache.bilder(pdf_path, dpi)
+    return convert_from_path(pdf_path, dpi=dpi, grayscale=grau)
+
+
+def seitenbild(pdf_path: str, nummer: int, dpi: int, seiten_cache: Optional[SeitenCache] = None) -> Image.Image:
+    """Eine Seite (ab 1) in Graustufen"""
+    if seiten_cache is not None:
+        return seiten_cache.bild(pdf_path, nummer, dpi)
+    return convert_from_path(pdf_path, dpi=dpi, first_page=nummer, last_page=nummer, grayscale=True)[0]
+
+
+def mittlere_konfidenz(woerter: List[Wort]) -> float:
+    """Mittel der Wort-Konfidenzen (Tesseract liefert -1 für Wörter ohne Bewertung)"""
+    werte = [w.konfidenz for w in woerter if w.konfidenz >= 0]
+    return sum(werte) / len(werte) if werte else 0.0
+
+
+def textzeilen(woerter: List[Wort]) -> List[Textzeile]:
+    """Wörter zu Zeilen in Tesseracts Lesereihenfolge"""
+    gruppen: Dict[Tuple[int, int, int], List[Wort]] = {}
+    for wort in woerter:
+        gruppen.setdefault(wort.zeile, []).append(wort)
+    return [
+        Textzeile(' '.join(w.text for w in gruppe), mittlere_konfidenz(gruppe),
+                  min(w.links for w in gruppe), min(w.oben for w in gruppe),
+                  max(w.rechts for w in gruppe), max(w.unten for w in gruppe), schluessel[:2])
+        for schluessel, gruppe in gruppen.items()
+    ]
+
+
+def erkenne_seite(pdf_path: str, nummer: int, bild: Image.Image, sprache: str = SPRACHE,
+                  seiten_cache: Optional[SeitenCache] = None) -> List[Textzeile]:
+    """Zeilen einer Seite; unsichere Zeilen werden mit höherer Auflösung erneut erkannt"""
+    ocr = engine(sprache)
+    bild = ocr.vorbereitet(bild)
+    zeilen = textzeilen(ocr.woerter(bild, psm=SEITEN_PSM, roh=True))
+    unsicher = [z for z in zeilen if z.konfidenz < KONFIDENZ_SCHWELLE]
+    if not unsicher:
+        return zeilen
+
+    # Hoch aufgelöste Seite gleich aufbereiten, aber nicht wieder verkleinern; Boxen werden
+    # über Seitenanteile übertragen (gilt auch nach dem Geraderichten, gleicher Winkel)
+    hoch = seitenbild(pdf_path, nummer, NACHERKENNUNG_DPI, seiten_cache)
+    if ocr.vorverarbeitung:
+        hoch = vorverarbeiten(hoch, replace(ocr.vorverarbeitung, verkleinern=False))
+    fx, fy = hoch.width / bild.width, hoch.height / bild.height
+
+    for zeile in unsicher:
+        rand = 0.3 * (zeile.unten - zeile.oben)
+        ausschnitt = hoch.crop((max(0, int((zeile.links - rand) * fx)), max(0, int((zeile.oben - rand) * fy)),
+                                min(hoch.width, int((zeile.rechts + rand) * fx)),
+                                min(hoch.height, int((zeile.unten + rand) * fy))))
+        for psm in NACHERKENNUNG_PSM:
+            woerter = ocr.woerter(ausschnitt, psm=psm, roh=True)
+            konfidenz = mittlere_konfidenz(woerter)
+            if woerter and konfidenz > zeile.konfidenz:
+                zeile.text = ' '.join(w.text for w in woerter)
+                zeile.konfidenz = konfidenz
+                zeile.nachgelesen = True
+            if zeile.konfidenz >= KONFIDENZ_SCHWELLE:
+                break
+    return zeilen
+
+
+def zeilen_text(zeilen: List[Textzeile]) -> str:
+    """Zeilen als Text, Absätze durch Leerzeile getrennt (wie image_to_string)"""
+    text = ""
+    for i, zeile in enumerate(zeilen):
+        if i and zeile.absatz != zeilen[i - 1].absatz:
+            text += "\n"
+        text += zeile.text + "\n"
+    return text
+
+
+def pdf_zeilen(pdf_path: str, sprache: str = SPRACHE, dpi: int = DPI,
+               seiten_cache: Optional[SeitenCache] = None) -> List[List[Textzeile]]:
+    """Zeilen mit Konfidenz je Seite, unsichere Zeilen nacherkannt"""
+    seiten = seitenbilder(pdf_path, dpi, grau=True, seiten_cache=seiten_cache)
+    ergebnis = []
+    for i, seite in enumerate(seiten):
+        zeilen = erkenne_seite(pdf_path, i + 1, seite, sprache, seiten_cache)
+        konfidenz = sum(z.konfidenz for z in zeilen) / len(zeilen) if zeilen else 0.0
+        nachgelesen = sum(z.nachgelesen for z in zeilen)
+        unsicher = sum(z.konfidenz < KONFIDENZ_SCHWELLE for z in zeilen)
+        meldung = (f"Verarbeite Seite {i+1}/{len(seiten)}: {len(zeilen)} Zeilen, Konfidenz {konfidenz:.0f}%, "
+                   f"{nachgelesen} nacherkannt, {unsicher} weiter unsicher")
+        if zeilen and konfidenz < KONFIDENZ_SCHWELLE:
+            logger.warning(meldung)
+        else:
+            logger.info(meldung)
+        ergebnis.append(zeilen)
+    return ergebnis
+
+
+def nacherkennung_aktiv() -> bool:
+    return os.environ.get(NACHERKENNUNG_ENV, '').lower() in ('1', 'true', 'ja', 'yes')
+
+
+def adaptiv_aktiv() -> bool:
+    return os.environ.get(ADAPTIV_ENV, '').lower() in ('1', 'true', 'ja', 'yes')
+
+
+def adaptiver_text(pdf_path: str, sprache: str = SPRACHE, seiten_cache: Optional[SeitenCache] = None) -> str:
+    """OCR nur der Textbereiche, je Seite mit der zur Schriftgröße passenden Auflösung"""
+    ocr = engine(sprache)
+    vorschau = seitenbilder(pdf_path, LAYOUT_DPI, grau=True, seiten_cache=seiten_cache)
+    full_text = ""
+    pixel_gesamt = pixel_voll = 0
+    for i, bild in enumerate(vorschau):
+        layout = analysiere(bild)
+        pixel_voll += bild.width * bild.height * (DPI / LAYOUT_DPI) ** 2
+        if not layout.bereiche:
+            logger.info(f"Seite {i+1}/{len(vorschau)}: kein Text gefunden")
+            full_text += "\n"
+            continue
+
+        dpi = layout.dpi(DPI)
+        seite = seitenbild(pdf_path, i + 1, dpi, seiten_cache)
+        teile = ausschnitte(seite, layout)
+        pixel = sum(t.width * t.height for t in teile)
+        pixel_gesamt += pixel
+        logger.info(f"Verarbeite Seite {i+1}/{len(vorschau)}: {len(teile)} Bereiche, {dpi} dpi, "
+                    f"{100.0 * pixel / (bild.width * bild.height * (DPI / LAYOUT_DPI) ** 2):.0f}% der Pixel")
+        full_text += "\n".join(ocr.text(teil) for teil in teile) + "\n"
+
+    if pixel_gesamt:
+        logger.info(f"Adaptive OCR: {pixel_voll / pixel_gesamt:.1f}x weniger Pixel als ganze Seiten mit {DPI} dpi")
+    return full_text
+
+
+def pdf_text(pdf_path: str, sprache: str = SPRACHE, dpi: int = DPI, adaptiv: Optional[bool] = None,
+             cache=None, nacherkennung: Optional[bool] = None) -> str:
+    """Extrahiert Text aus PDF mittels OCR
+
+    adaptiv=None und nacherkennung=None richten sich nach den Umgebungsvariablen OCR_ADAPTIV bzw.
+    OCR_NACHERKENNUNG. Mit cache (verarbeitungs_cache.VerarbeitungsCache) wird dieselbe PDF nur
+    einmal erkannt. Ist OCR_SEITEN_CACHE gesetzt, werden die Seiten nur einmal gerastert (seiten_cache).
+    """
+    if adaptiv is None:
+        adaptiv = adaptiv_aktiv()
+    if nacherkennung is None:
+        nacherkennung = nacherkennung_aktiv()
+    if cache is not None:
+        einstellungen = f"{sprache}:{'adaptiv' if adaptiv else dpi}:{engine(sprache).vorverarbeitung}"
+        if nacherkennung and not adaptiv:
+            einstellungen += ':nacherkennung'
+        return cache.ocr_text(pdf_path, einstellungen,
+                              lambda: pdf_text(pdf_path, sprache, dpi, adaptiv, nacherkennung=nacherkennung))
+
+    logger.info(f"Starte PDF-Extraktion: {pdf_path}")
+    seiten_cache = SeitenCache.aus_umgebung()
+
+    try:
+        if adaptiv:
+            return adaptiver_text(pdf_path, sprache, seiten_cache)
+        if nacherkennung:
+            return "".join(zeilen_text(z) + "\n" for z in pdf_zeilen(pdf_path, sprache, dpi, seiten_cache))
+        # PDF in Bilder konvertieren (mit Vorverarbeitung gleich in Graustufen)
+        seiten = seitenbilder(pdf_path, dpi, engine(sprache).vorverarbeitung is not None, seiten_cache)
+        return seiten_text(seiten, sprache)
+
+    except Exception as e:
+        logger.error(f"Fehler bei PDF-Extraktion: {e}")
+        raise
+
+
+def benchmark(pdf_path: str, sprache: str = SPRACHE, dpi: int = DPI):
+    """Vergleicht die Zeit je Seite: pytesseract (Prozess je Seite) gegen dauerhafte Engine"""
+    seiten = seitenbilder(pdf_path, dpi, seiten_cache=SeitenCache.aus_umgebung())
+    backends = [b for b, modul in (('pytesseract', pytesseract), ('tesserocr', tesserocr)) if modul is not None]
+
+    ergebnisse = {}
+    for backend in backends:
+        start = time.perf_counter()
+        with OCREngine(sprache, backend) as ocr:
+            laden = time.perf_counter() - start
+            for seite in seiten:
+                ocr.text(seite)
+        gesamt = time.perf_counter() - start
+        ergebnisse[backend] = gesamt / len(seiten)
+        print(f"{backend:12s} {len(seiten)} Seiten: {gesamt:.2f} s gesamt, "
+              f"{ergebnisse[backend]:.2f} s/Seite (Laden {laden:.2f} s)")
+
+    if len(ergebnisse) == 2:
+        ersparnis = ergebnisse['pytesseract'] - ergebnisse['tesserocr']
+        print(f"✓ Ersparnis je Seite: {ersparnis:.2f} s "
+              f"({100.0 * ersparnis / ergebnisse['pytesseract']:.0f}%)")
+    else:
+        print("tesserocr nicht installiert, kein Vergleich möglich (pip install tesserocr)")
+
+
+def main():
+    """Hauptfunktion"""
+    parser = argparse.ArgumentParser(description='OCR eines PDFs mit dauerhaft geladener Tesseract-Engine')
+    parser.add_argument('pdf', help='PDF-Datei')
+    parser.add_argument('--output', default=None, help='Text in Datei schreiben statt ausgeben')
+    parser.add_argument('--sprache', default=SPRACHE, help='Tesseract-Sprache')
+    parser.add_argument('--dpi', type=int, default=DPI, help='Auflösung der Seitenbilder')
+    parser.add_argument('--adaptiv', action='store_true', help='Nur Textbereiche, Auflösung nach Schriftgröße')
+    parser.add_argument('--nacherkennung', action='store_true',
+                        help=f'Zeilen unter {KONFIDENZ_SCHWELLE:.0f}% Konfidenz mit {NACHERKENNUNG_DPI} dpi erneut erkennen')
+    parser.add_argument('--konfidenz', default=None, metavar='CSV',
+                        help='Zeilen mit Konfidenz als CSV speichern (schließt --nacherkennung ein)')
+    parser.add_argument('--benchmark', action='store_true', help='Zeit je Seite beider Backends vergleichen')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.pdf, args.sprache, args.dpi)
+        return
+
+    if args.konfidenz:
+        seiten = pdf_zeilen(args.pdf, args.sprache, args.dpi, SeitenCache.aus_umgebung())
+        with open(args.konfidenz, 'w', encoding='utf-8', newline='') as f:
+            schreiber = csv.writer(f)
+            schreiber.writerow(['seite', 'zeile', 'konfidenz', 'nachgelesen', 'text'])
+            for i, zeilen in enumerate(seiten):
+                for j, zeile in enumerate(zeilen):
+                    schreiber.writerow([i + 1, j + 1, f"{zeile.konfidenz:.1f}", int(zeile.nachgelesen), zeile.text])
+        alle = [zeile for zeilen in seiten for zeile in zeilen]
+        print(f"✓ Konfidenz gespeichert: {args.konfidenz} ({len(alle)} Zeilen, "
+              f"{sum(z.nachgelesen for z in alle)} nacherkannt, "
+              f"{sum(z.konfidenz < KONFIDENZ_SCHWELLE for z in alle)} unter {KONFIDENZ_SCHWELLE:.0f}%)")
+        text = "".join(zeilen_text(z) + "\n" for z in seiten)
+    else:
+        text = pdf_text(args.pdf, args.sprache, args.dpi, adaptiv=args.adaptiv or None,
+                        nacherkennung=args.nacherkennung or None)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+        print(f"✓ Text gespeichert: {args.output}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Layout-Analyse für adaptive OCR
+Ein schneller Durchgang mit niedriger Auflösung findet die Textbereiche einer Seite (Spalten,
+Tabellenblöcke) über Zeilen- und Spaltenprofile der dunklen Pixel. Aus der gemessenen
+Zeilenhöhe ergibt sich die Auflösung, bei der Tesseract die Schrift gut liest. Gerastert und
+erkannt werden danach nur diese Bereiche statt der ganzen Seite mit festen 300 dpi.
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+import numpy as np
+from PIL import Image
+
+LAYOUT_DPI = 72            # Auflösung des Layout-Durchgangs
+ZIEL_ZEILENHOEHE_PX = 40   # Zeilenhöhe, bei der Tesseract zuverlässig erkennt (ca. 10 pt bei 300 dpi)
+MIN_DPI = 150
+MAX_DPI = 400
+
+TINTE_SCHWELLE = 160       # Grauwert, unter dem ein Pixel als Schrift zählt
+LINIEN_ANTEIL = 0.6        # Zeilen/Spalten mit mehr Tinte sind Tabellenlinien, keine Schrift
+BILD_DICHTE = 0.35         # Bereiche mit mehr Tinte sind Logos oder Bilder
+BLOCK_ABSTAND = 1.5        # Leerraum zwischen Blöcken, in Zeilenhöhen
+SPALTEN_ABSTAND = 2.0      # Leerraum zwischen Spalten, in Zeilenhöhen
+RAND = 0.5                 # Zugabe um jeden Bereich, in Zeilenhöhen
+
+
+@dataclass
+class Bereich:
+    """Textbereich in Seitenanteilen (0..1), unabhängig von der Auflösung"""
+    links: float
+    oben: float
+    rechts: float
+    unten: float
+
+    def pixel(self, breite: int, hoehe: int) -> Tuple[int, int, int, int]:
+        """Box für Image.crop bei gegebener Bildgröße"""
+        return (int(self.links * breite), int(self.oben * hoehe),
+                int(np.ceil(self.rechts * breite)), int(np.ceil(self.unten * hoehe)))
+
+
+@dataclass
+class Layout:
+    bereiche: List[Bereich]
+    zeilenhoehe_pt: Optional[float]  # Median der Zeilenhöhe in Punkt (1/72 Zoll)
+
+    def dpi(self, standard: int = 300) -> int:
+        """Auflösung, bei der eine Textzeile etwa ZIEL_ZEILENHOEHE_PX hoch ist (in 25er-Schritten)"""
+        if not self.zeilenhoehe_pt:
+            return standard
+        dpi = ZIEL_ZEILENHOEHE_PX / self.zeilenhoehe_pt * 72
+        return int(np.clip(round(dpi / 25) * 25, MIN_DPI, MAX_DPI))
+
+    def anteil(self) -> float:
+        """Anteil der Seitenfläche, der erkannt wird"""
+        return float(sum((b.rechts - b.links) * (b.unten - b.oben) for b in self.bereiche))
+
+
+def laeufe(maske: np.ndarray) -> List[Tuple[int, int]]:
+    """Zusammenhängende True-Abschnitte als (Anfang, Ende) mit exklusivem Ende"""
+    kanten = np.diff(np.concatenate(([0], maske.astype(np.int8), [0])))
+    return list(zip(np.flatnonzero(kanten == 1), np.flatnonzero(kanten == -1)))
+
+
+def verbinde(abschnitte: List[Tuple[int, int]], luecke: float) -> List[Tuple[int, int]]:
+    """Abschnitte zusammenfassen, deren Abstand kleiner als luecke ist"""
+    verbunden = []
+    for anfang, ende in abschnitte:
+        if verbunden and anfang - verbunden[-1][1] < luecke:
+            verbunden[-1] = (verbunden[-1][0], ende)
+        else:
+            verbunden.append((anfang, ende))
+    return verbunden
+
+
+def tinte(bild: Image.Image) -> np.ndarray:
+    """Maske der Schrift-Pixel ohne durchgehende Tabellenlinien"""
+    grau = np.asarray(bild.convert('L'))
+    maske = grau < TINTE_SCHWELLE
+    hoehe, breite = maske.shape
+    maske[maske.sum(axis=1) > LINIEN_ANTEIL * breite, :] = False
+    maske[:, maske.sum(axis=0) > LINIEN_ANTEIL * hoehe] = False
+    return maske
+
+
+def analysiere(bild: Image.Image, dpi: int = LAYOUT_DPI) -> Layout:
+    """Textbereiche und Zeilenhöhe einer Seite aus einem niedrig aufgelösten Bild"""
+    maske = tinte(bild)
+    hoehe, breite = maske.shape
+
+    zeilen = laeufe(maske.any(axis=1))
+    if not zeilen:
+        return Layout([], None)
+    zeilenhoehe = float(np.median([ende - anfang for anfang, ende in zeilen]))
+
+    bereiche = []
+    for oben, unten in verbinde(zeilen, BLOCK_ABSTAND * zeilenhoehe):
+        block = maske[oben:unten]
+        spalten = verbinde(laeufe(block.any(axis=0)), SPALTEN_ABSTAND * zeilenhoehe)
+        for links, rechts in spalten:
+            teil = block[:, links:rechts]
+            zeilen_teil = np.flatnonzero(teil.any(axis=1))
+            o, u = oben + zeilen_teil[0], oben + zeilen_teil[-1] + 1
+            flaeche = (u - o) * (rechts - links)
+            # Einzelne Punkte und Flecken sowie dichte Flächen (Logos) überspringen
+            if flaeche < zeilenhoehe ** 2 or teil.sum() > BILD_DICHTE * flaeche:
+                continue
+            rand = RAND * zeilenhoehe
+            bereiche.append(Bereich(
+                float(max(0.0, (links - rand) / breite)), float(max(0.0, (o - rand) / hoehe)),
+                float(min(1.0, (rechts + rand) / breite)), float(min(1.0, (u + rand) / hoehe))
+            ))
+
+    return Layout(bereiche, zeilenhoehe * 72.0 / dpi)
+
+
+def ausschnitte(seite: Image.Image, layout: Layout) -> List[Image.Image]:
+    """Die Textbereiche als einzelne Bilder in Lesereihenfolge"""
+    return [seite.crop(b.pixel(*seite.size)) for b in layout.bereiche]
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Tabellen-OCR für das Straßenverzeichnis
+Statt den Seitentext zu glätten und Straßennamen per Regex herauszusuchen, werden die
+Wortboxen von Tesseract zu Zeilen und Spalten gruppiert. So bleibt die Zuordnung
+Straße -> Hausnummernbereich -> Wahlbezirk einer Tabellenzeile erhalten, und daraus lässt sich
+wahlbezirke_zuordnung.json direkt erzeugen.
+"""
+
+import re
+import json
+import argparse
+import logging
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from ocr_engine import DPI, SPRACHE, Wort, engine, seitenbilder
+from seiten_cache import SeitenCache
+from ocr_layout import laeufe, verbinde
+
+# Logging konfigurieren
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Kopfzeilen-Begriffe je Spaltenrolle (Kleinschreibung, Teilstring genügt)
+KOPF_BEGRIFFE = {
+    'street': ('straße', 'strasse', 'bezeichnung'),
+    'hausnummern': ('hausnummer', 'hausnr', 'nummern', 'bereich'),
+    'wbz': ('wahlbezirk', 'wbz', 'stimmbezirk', 'bezirk'),
+}
+
+ZEILEN_TOLERANZ = 0.5   # Versatz der Wortmitten innerhalb einer Zeile, in Worthöhen
+SPALTEN_ABSTAND = 1.5   # Leerraum zwischen Spalten, in Worthöhen
+SPALTEN_AUSREISSER = 0.05  # Anteil der Zeilen (mindestens eine), die eine Spaltenlücke überdecken dürfen
+
+WBZ_MUSTER = re.compile(r'^(?:WBZ|Wahlbezirk|Stimmbezirk)?\s*0*(\d{1,3})\b\s*[-–:]?\s*(.*)$', re.IGNORECASE)
+STRASSEN_MUSTER = re.compile(r'[A-Za-zÄÖÜäöüß]{3,}')
+BEREICH_MUSTER = re.compile(r'\d|gerade|ungerade|alle', re.IGNORECASE)
+
+
+def zeilen(woerter: List[Wort]) -> List[List[Wort]]:
+    """Gruppiert Wörter zu Tabellenzeilen (nach der senkrechten Mitte), von oben nach unten"""
+    if not woerter:
+        return []
+    hoehe = float(np.median([w.unten - w.oben for w in woerter]))
+    ergebnis: List[List[Wort]] = []
+    mitte_zeile = None
+    for wort in sorted(woerter, key=lambda w: (w.oben + w.unten) / 2):
+        mitte = (wort.oben + wort.unten) / 2
+        if ergebnis and abs(mitte - mitte_zeile) <= ZEILEN_TOLERANZ * hoehe:
+            ergebnis[-1].append(wort)
+            mitte_zeile = float(np.mean([(w.oben + w.unten) / 2 for w in ergebnis[-1]]))
+        else:
+            ergebnis.append([wort])
+            mitte_zeile = mitte
+    return [sorted(zeile, key=lambda w: w.links) for zeile in ergebnis]
+
+
+def spalten(tabelle: List[List[Wort]]) -> List[Tuple[int, int]]:
+    """Spaltengrenzen aus den waagerechten Lücken zwischen den Wörtern der Zeilen
+
+    Eine Lücke zählt auch, wenn einzelne Zeilen sie überdecken (Überschrift, Fußzeile), solange es
+    höchstens SPALTEN_AUSREISSER der Zeilen sind. Bleibt dabei keine Spalte übrig (z.B. eine
+    Folgeseite mit nur einer Zeile), gelten die Lücken zwischen allen Wörtern.
+    """
+    woerter = [wort for zeile in tabelle for wort in zeile]
+    if not woerter:
+        return []
+    hoehe = float(np.median([w.unten - w.oben for w in woerter]))
+    zeilen_je_x = np.zeros(max(w.rechts for w in woerter) + 1, dtype=np.int32)
+    for zeile in tabelle:
+        belegt = np.zeros_like(zeilen_je_x, dtype=bool)
+        for wort in zeile:
+            belegt[wort.links:wort.rechts] = True
+        zeilen_je_x += belegt
+    erlaubt = max(1, int(SPALTEN_AUSREISSER * len(tabelle)))
+    grenzen = verbinde(laeufe(zeilen_je_x > erlaubt), SPALTEN_ABSTAND * hoehe)
+    return grenzen or verbinde(laeufe(zeilen_je_x > 0), SPALTEN_ABSTAND * hoehe)
+
+
+def zellen(zeile: List[Wort], grenzen: List[Tuple[int, int]]) -> List[str]:
+    """Text je Spalte einer Zeile"""
+    if not grenzen:
+        return []
+    texte = [[] for _ in grenzen]
+    for wort in zeile:
+        mitte = (wort.links + wort.rechts) / 2
+        spalte = min(range(len(grenzen)),
+                     key=lambda i: 0 if grenzen[i][0] <= mitte < grenzen[i][1]
+                     else min(abs(mitte - grenzen[i][0]), abs(mitte - grenzen[i][1])))
+        texte[spalte].append(wort.text)
+    return [' '.join(t) for t in texte]
+
+
+def kopf_rollen(zellen_text: List[str]) -> Optional[Dict[str, int]]:
+    """Spaltenrollen aus einer Kopfzeile, None wenn die Zeile keine Kopfzeile ist"""
+    rollen = {}
+    for i, text in enumerate(zellen_text):
+        text = text.lower()
+        for rolle, begriffe in KOPF_BEGRIFFE.items():
+            if rolle not in rollen and any(b in text for b in begriffe):
+                rollen[rolle] = i
+                break
+    return rollen if {'street', 'wbz'} <= set(rollen) else None
+
+
+def geschaetzte_rollen(tabelle: List[List[str]]) -> Dict[str, int]:
+    """Spaltenrollen ohne Kopfzeile aus dem Inhalt: WBZ-Nummern, Straßennamen, Bereiche"""
+    anzahl = len(tabelle[0]) if tabelle else 0
+
+    def anteil(muster, spalte):
+        werte = [z[spalte] for z in tabelle if z[spalte]]
+        return sum(bool(muster.search(w)) for w in werte) / len(werte) if werte else 0.0
+
+    rollen = {}
+    nummern = [anteil(re.compile(r'^(?:WBZ\s*)?\d{1,3}\b', re.IGNORECASE), i) for i in range(anzahl)]
+    if nummern and max(nummern) > 0.5:
+        rollen['wbz'] = int(np.argmax(nummern))
+    freie = [i for i in range(anzahl) if i not in rollen.values()]
+    if freie:
+        rollen['street'] = max(freie, key=lambda i: anteil(STRASSEN_MUSTER, i))
+        freie.remove(rollen['street'])
+    if freie:
+        rollen['hausnummern'] = max(freie, key=lambda i: anteil(BEREICH_MUSTER, i))
+    return rollen
+
+
+def wbz_schluessel(text: str) -> Tuple[Optional[str], str]:
+    """'10 Nümbrecht 1' / 'WBZ 010' -> ('WBZ 10', 'Nümbrecht 1')"""
+    treffer = WBZ_MUSTER.match(text.strip())
+    if not treffer:
+        return None, ''
+    return f"WBZ {int(treffer.group(1))}", treffer.group(2).strip()
+
+
+def tabellen_zeilen(woerter: List[Wort], rollen: Optional[Dict[str, int]] = None) -> Tuple[List[Dict], Dict[str, int]]:
+    """Datensätze (street, hausnummern, wbz, name) einer Seite
+
+    rollen aus der vorherigen Seite werden übernommen, wenn die Seite keine Kopfzeile hat.
+    Zeilen ohne Straßennamen setzen die Straße der Zeile darüber fort (weitere Bereiche).
+    """
+    if not woerter:
+        # Leere Seite: Spaltenrollen bleiben für die nächste Seite erhalten
+        return [], rollen
+    wort_zeilen = zeilen(woerter)
+    grenzen = spalten(wort_zeilen)
+    tabelle = [zellen(zeile, grenzen) for zeile in wort_zeilen]
+
+    kopf = None
+    for i, zeile in enumerate(tabelle):
+        kopf = kopf_rollen(zeile)
+        if kopf:
+            # Spalten erneut nur ab der Kopfzeile bestimmen, ohne Überschriften darüber
+            rollen, tabelle = kopf, tabelle[i + 1:]
+            unterhalb = spalten(wort_zeilen[i:])
+            kopf_unterhalb = kopf_rollen(zellen(wort_zeilen[i], unterhalb))
+            if unterhalb != grenzen and kopf_unterhalb:
+                grenzen, rollen = unterhalb, kopf_unterhalb
+                tabelle = [zellen(zeile, grenzen) for zeile in wort_zeilen[i + 1:]]
+            break
+    if not kopf and (not rollen or max(rollen.values()) >= len(grenzen)):
+        rollen = geschaetzte_rollen(tabelle)
+    if 'street' not in rollen or 'wbz' not in rollen:
+        logger.warning("Keine Straßen- und WBZ-Spalte erkannt")
+        return [], rollen
+
+    datensaetze = []
+    letzte_strasse = None
+    for zeile in tabelle:
+        strasse = zeile[rollen['street']].strip()
+        bereich = zeile[rollen['hausnummern']].strip() if 'hausnummern' in rollen else ''
+        wbz, name = wbz_schluessel(zeile[rollen['wbz']])
+        if strasse:
+            letzte_strasse = strasse
+        if not wbz or not letzte_strasse:
+            continue
+        datensaetze.append({'street': letzte_strasse, 'hausnummern': bereich, 'wbz': wbz, 'name': name})
+    return datensaetze, rollen
+
+
+def pdf_tabelle(pdf_path: str, sprache: str = SPRACHE, dpi: int = DPI) -> List[Dict]:
+    """Liest das Straßenverzeichnis seitenweise als Tabelle (ein OCR-Durchgang je Seite)"""
+    logger.info(f"Starte Tabellen-Extraktion: {pdf_path}")
+    ocr = engine(sprache)
+    datensaetze = []
+    rollen = None
+    seiten = seitenbilder(pdf_path, dpi, grau=True, seiten_cache=SeitenCache.aus_umgebung())
+    for i, seite in enumerate(seiten):
+        seite_daten, rollen = tabellen_zeilen(ocr.woerter(seite), rollen)
+        logger.info(f"Seite {i+1}/{len(seiten)}: {len(seite_daten)} Tabellenzeilen")
+        datensaetze.extend(seite_daten)
+    return datensaetze
+
+
+def strassen_eintrag(datensatz: Dict) -> str:
+    """Eintrag wie in wahlbezirke_zuordnung.json: 'Bahnhofstraße - gerade Hausnummern 2-20'"""
+    if datensatz['hausnummern'] and not datensatz['hausnummern'].lower().startswith('alle'):
+        return f"{datensatz['street']} - {datensatz['hausnummern']}"
+    return datensatz['street']
+
+
+def als_zuordnung(datensaetze: List[Dict], basis: Optional[Dict] = None) -> Dict:
+    """Zuordnung im Format von wahlbezirke_zuordnung.json
+
+    Name, Kandidat, Wahlberechtigte und Ortsteile stehen nicht im Straßenverzeichnis und werden
+    aus einer bestehenden Zuordnung (basis) übernommen; ersetzt werden nur die Straßenlisten.
+    WBZ der basis ohne Straßen im Verzeichnis (z.B. nur Ortsteile) bleiben unverändert erhalten.
+    """
+    basis = (basis or {}).get('wahlbezirke', {})
+    wahlbezirke = {}
+    for datensatz in datensaetze:
+        wbz = datensatz['wbz']
+        if wbz not in wahlbezirke:
+            alt = basis.get(wbz, {})
+            wahlbezirke[wbz] = {
+                'name': datensatz['name'],
+                'kandidat': '',
+                'wahlberechtigte': 0,
+                **alt,
+                'strassen': []
+            }
+            wahlbezirke[wbz]['name'] = wahlbezirke[wbz]['name'] or datensatz['name']
+        eintrag = strassen_eintrag(datensatz)
+        if eintrag not in wahlbezirke[wbz]['strassen']:
+            wahlbezirke[wbz]['strassen'].append(eintrag)
+
+    for wbz, alt in basis.items():
+        if wbz not in wahlbezirke:
+            if alt.get('strassen'):
+                logger.warning(f"{wbz} kommt im Straßenverzeichnis nicht vor, Straßen aus der Zuordnung bleiben")
+            wahlbezirke[wbz] = dict(alt)
+    reihenfolge = sorted(wahlbezirke, key=lambda w: int(w.split()[-1]))
+    return {'wahlbezirke': {wbz: wahlbezirke[wbz] for wbz in reihenfolge}}
+
+
+def main():
+    """Hauptfunktion"""
+    parser = argparse.ArgumentParser(description='Liest das Straßenverzeichnis als Tabelle und erzeugt die WBZ-Zuordnung')
+    parser.add_argument('pdf', help='Straßenverzeichnis (PDF)')
+    parser.add_argument('--output', default='wahlbezirke_zuordnung_ocr.json', help='Zuordnung (JSON)')
+    parser.add_argument('--basis', default=None,
+                        help='Bestehende Zuordnung, aus der Name, Kandidat, Wahlberechtigte und Ortsteile übernommen werden')
+    parser.add_argument('--csv', default=None, help='Tabellenzeilen zusätzlich als CSV speichern')
+    parser.add_argument('--dpi', type=int, default=DPI, help='Auflösung der Seitenbilder')
+    args = parser.parse_args()
+
+    datensaetze = pdf_tabelle(args.pdf, dpi=args.dpi)
+    if args.csv:
+        pd.DataFrame(datensaetze, columns=['street', 'hausnummern', 'wbz', 'name']).to_csv(
+            args.csv, index=False, encoding='utf-8')
+        print(f"✓ Tabellenzeilen gespeichert: {args.csv}")
+
+    basis = None
+    if args.basis:
+        with open(args.basis, 'r', encoding='utf-8') as f:
+            basis = json.load(f)
+    zuordnung = als_zuordnung(datensaetze, basis)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(zuordnung, f, ensure_ascii=False, indent=2)
+
+    anzahl = sum(len(w['strassen']) for w in zuordnung['wahlbezirke'].values())
+    print(f"✓ Zuordnung erstellt: {args.output} ({len(zuordnung['wahlbezirke'])} Wahlbezirke, {anzahl} Straßen)")
+
+
+if __name__ == "__main__":
+    main()
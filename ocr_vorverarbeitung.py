@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Bildvorverarbeitung vor der OCR
+Die Seiten gingen bisher als RGB-Bilder direkt an Tesseract. Hier werden sie als NumPy-Array
+in Graustufen umgewandelt, mit Otsu-Schwelle binarisiert, gerade gedreht, von einzelnen
+Störpixeln befreit und auf eine für Tesseract günstige Zeilenhöhe verkleinert. Alle Schritte
+arbeiten vektorisiert auf dem ganzen Seitenpuffer.
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+from PIL import Image
+from ocr_layout import ZIEL_ZEILENHOEHE_PX, laeufe
+
+SCHRITTE_ENV = 'OCR_VORVERARBEITUNG'  # 1/alle oder z.B. "binaer,entzerren"
+
+MAX_WINKEL = 5.0        # größte erkannte Schräglage in Grad
+WINKEL_SCHRITT = 0.1
+MIN_WINKEL = 0.1        # kleinere Schräglagen werden nicht korrigiert
+MAX_PUNKTE = 20000      # Stichprobe der Schriftpixel für die Winkelsuche
+VERKLEINERN_AB = 1.5    # erst verkleinern, wenn Zeilen so viel höher als das Ziel sind
+ZEILEN_ANTEIL = 0.002   # Mindestanteil Schriftpixel einer Pixelzeile, die zu einer Textzeile gehört
+
+
+@dataclass
+class Vorverarbeitung:
+    """Welche Schritte ausgeführt werden (Graustufen immer)"""
+    binaer: bool = True
+    entzerren: bool = True
+    entflecken: bool = True
+    verkleinern: bool = True
+
+    @classmethod
+    def aus_umgebung(cls) -> Optional['Vorverarbeitung']:
+        """Schritte aus OCR_VORVERARBEITUNG, None wenn nicht gesetzt"""
+        wert = os.environ.get(SCHRITTE_ENV, '').strip().lower()
+        if not wert or wert in ('0', 'false', 'nein', 'no'):
+            return None
+        if wert in ('1', 'true', 'ja', 'yes', 'alle'):
+            return cls()
+        schritte = {s.strip() for s in wert.split(',')}
+        return cls(**{name: name in schritte for name in cls.__dataclass_fields__})
+
+
+def graustufen(bild: Image.Image) -> np.ndarray:
+    """Seite als uint8-Array in Graustufen (Gewichte nach ITU-R 601 wie PIL)"""
+    pixel = np.asarray(bild)
+    if pixel.ndim == 2:
+        return pixel.astype(np.uint8, copy=False)
+    rgb = pixel[..., :3].astype(np.float32)
+    return (rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)).round().astype(np.uint8)
+
+
+def otsu_schwelle(grau: np.ndarray) -> int:
+    """Schwelle, die die Varianz zwischen Schrift und Hintergrund maximiert
+
+    Bei einer einfarbigen Seite (z.B. leere weiße Seite) ist das der eine Grauwert selbst,
+    es gibt dann keine Schrift-Pixel.
+    """
+    haeufigkeit = np.bincount(grau.ravel(), minlength=256).astype(np.float64)
+    if np.count_nonzero(haeufigkeit) < 2:
+        return int(np.argmax(haeufigkeit))
+    p = haeufigkeit / haeufigkeit.sum()
+    omega = np.cumsum(p)
+    mu = np.cumsum(p * np.arange(256))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        varianz = (mu[-1] * omega - mu) ** 2 / (omega * (1.0 - omega))
+    return int(np.nanargmax(varianz))
+
+
+def schraeglage(tinte: np.ndarray) -> float:
+    """Winkel in Grad, bei dem die Zeilenprofile der Schrift am schärfsten sind"""
+    ys, xs = np.nonzero(tinte)
+    if len(ys) < 100:
+        return 0.0
+    if len(ys) > MAX_PUNKTE:
+        auswahl = np.random.default_rng(0).choice(len(ys), MAX_PUNKTE, replace=False)
+        ys, xs = ys[auswahl], xs[auswahl]
+
+    winkel = np.arange(-MAX_WINKEL, MAX_WINKEL + WINKEL_SCHRITT / 2, WINKEL_SCHRITT)
+    # Alle Winkel auf einmal: gescherte Zeilenkoordinate je Punkt und Winkel
+    versatz = ys[None, :] - xs[None, :] * np.tan(np.radians(winkel))[:, None]
+    zeile = np.floor(versatz - versatz.min()).astype(np.int64)
+    breite = int(zeile.max()) + 1
+    profile = np.bincount((zeile + np.arange(len(winkel))[:, None] * breite).ravel(),
+                          minlength=len(winkel) * breite).reshape(len(winkel), breite)
+    return float(winkel[np.argmax((profile.astype(np.float64) ** 2).sum(axis=1))])
+
+
+def entflecke(tinte: np.ndarray) -> np.ndarray:
+    """Entfernt Schriftpixel mit höchstens einem Nachbarn (3x3-Summe über verschobene Ansichten)"""
+    rand = np.pad(tinte.astype(np.uint8), 1)
+    hoehe, breite = tinte.shape
+    nachbarn = sum(rand[dy:dy + hoehe, dx:dx + breite] for dy in range(3) for dx in range(3))
+    return tinte & (nachbarn > 2)
+
+
+def zeilenhoehe(tinte: np.ndarray) -> Optional[float]:
+    """Median der Höhe der Textzeilen in Pixeln (Zeilen mit nur vereinzelten Pixeln zählen nicht)"""
+    abschnitte = laeufe(tinte.sum(axis=1) > max(2, ZEILEN_ANTEIL * tinte.shape[1]))
+    if not abschnitte:
+        return None
+    return float(np.median([ende - anfang for anfang, ende in abschnitte]))
+
+
+def vorverarbeiten(bild: Image.Image, schritte: Optional[Vorverarbeitung] = None) -> Image.Image:
+    """Bereitet eine Seite für Tesseract auf; Ergebnis ist ein Graustufenbild (binär: 0/255)"""
+    schritte = schritte or Vorverarbeitung()
+    grau = graustufen(bild)
+
+    if schritte.entzerren:
+        winkel = schraeglage(grau < otsu_schwelle(grau))
+        if abs(winkel) >= MIN_WINKEL:
+            grau = np.asarray(Image.fromarray(grau).rotate(
+                winkel, resample=Image.Resampling.BILINEAR, expand=True, fillcolor=255))
+
+    if schritte.verkleinern:
+        hoehe = zeilenhoehe(entflecke(grau < otsu_schwelle(grau)))
+        if hoehe and hoehe > VERKLEINERN_AB * ZIEL_ZEILENHOEHE_PX:
+            faktor = ZIEL_ZEILENHOEHE_PX / hoehe
+            groesse = (max(1, round(grau.shape[1] * faktor)), max(1, round(grau.shape[0] * faktor)))
+            grau = np.asarray(Image.fromarray(grau).resize(groesse, Image.Resampling.BOX))
+
+    if schritte.binaer or schritte.entflecken:
+        tinte = grau < otsu_schwelle(grau)
+        bereinigt = entflecke(tinte) if schritte.entflecken else tinte
+        if schritte.binaer:
+            grau = np.where(bereinigt, 0, 255).astype(np.uint8)
+        else:
+            grau = np.where(tinte & ~bereinigt, 255, grau).astype(np.uint8)
+
+    return Image.fromarray(grau)
@@ -6,50 +6,45 @@ Extrahiert Adressinformationen aus PDF und erstellt eine interaktive Karte
 
 import os
 import re
-import json
-import time
+import argparse
 from typing import List, Dict, Tuple, Optional
-import pytesseract
-from pdf2image import convert_from_path
-from PIL import Image
-import pandas as pd
-import folium
-from folium.plugins import MarkerCluster
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut, GeocoderServiceError
 import logging
+from verarbeitungs_cache import GecachterGeocoder, VerarbeitungsCache
+from konfiguration import konfiguration
+
+# pandas, folium, geopy und die OCR werden erst in den Schritten importiert, die sie brauchen
+# (Startzeit der Kommandozeile, siehe wahlkarte.py)
 
 # Logging konfigurieren
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+STANDARD_PDF = "/Users/marcelgaertner/Desktop/Arbeit/Markus schmitz/marcus-call-agent/Nümbrecht straßengenau.pdf"
+
+# Properties je Straße im GeoJSON-Export
+GEOJSON_EIGENSCHAFTEN = ['street', 'house_number', 'postal_code', 'city', 'full_address']
+
+
 class PDFToMapConverter:
-    def __init__(self, pdf_path: str):
+    def __init__(self, pdf_path: str, cache: Optional[VerarbeitungsCache] = None):
         self.pdf_path = pdf_path
-        self.geocoder = Nominatim(user_agent="pdf_to_map_converter")
+        self.cache = cache
+        self._geocoder = None
         self.addresses = []
         self.geocoded_addresses = []
+
+    @property
+    def geocoder(self) -> GecachterGeocoder:
+        # Mindestabstand zwischen Nominatim-Anfragen, Treffer aus dem Cache ohne Wartezeit
+        if self._geocoder is None:
+            from geopy.geocoders import Nominatim
+            self._geocoder = GecachterGeocoder(Nominatim(user_agent="pdf_to_map_converter"), self.cache)
+        return self._geocoder
         
     def extract_text_from_pdf(self) -> str:
-        """Extrahiert Text aus PDF mittels OCR"""
-        logger.info(f"Starte PDF-Extraktion: {self.pdf_path}")
-        
-        try:
-            # PDF in Bilder konvertieren
-            pages = convert_from_path(self.pdf_path, dpi=300)
-            
-            full_text = ""
-            for i, page in enumerate(pages):
-                logger.info(f"Verarbeite Seite {i+1}/{len(pages)}")
-                # OCR auf jeder Seite ausführen
-                text = pytesseract.image_to_string(page, lang='deu')
-                full_text += text + "\n"
-            
-            return full_text
-            
-        except Exception as e:
-            logger.error(f"Fehler bei PDF-Extraktion: {e}")
-            raise
+        """Extrahiert Text aus PDF mittels OCR (eine Tesseract-Engine für alle Seiten)"""
+        from ocr_engine import pdf_text
+        return pdf_text(self.pdf_path, cache=self.cache)
     
     def extract_addresses(self, text: str) -> List[Dict[str, str]]:
         """Extrahiert Adressen aus dem Text"""
@@ -77,14 +72,15 @@ class PDFToMapConverter:
         
         # Nach Straßennamen suchen (falls keine vollständigen Adressen gefunden)
         if not addresses:
+            konfig = konfiguration()
             for match in re.finditer(street_pattern, text, re.IGNORECASE):
-                # Versuche Nümbrecht als Standardort zu verwenden
+                # Gemeinde aus der Konfiguration als Standardort verwenden
                 address = {
                     'street': match.group(1).strip(),
                     'house_number': '',
-                    'postal_code': '51588',  # PLZ von Nümbrecht
-                    'city': 'Nümbrecht',
-                    'full_address': f"{match.group(1)}, 51588 Nümbrecht"
+                    'postal_code': konfig.plz,
+                    'city': konfig.gemeinde,
+                    'full_address': konfig.adresse(match.group(1))
                 }
                 addresses.append(address)
         
@@ -101,9 +97,8 @@ class PDFToMapConverter:
     
     def geocode_address(self, address: Dict[str, str]) -> Optional[Tuple[float, float]]:
         """Geocodiert eine Adresse zu Koordinaten"""
+        from geopy.exc import GeocoderTimedOut, GeocoderServiceError
         try:
-            time.sleep(1)  # Rate limiting für Nominatim
-            
             # Zuerst vollständige Adresse versuchen
             location = self.geocoder.geocode(address['full_address'])
             
@@ -141,8 +136,19 @@ class PDFToMapConverter:
             else:
                 logger.warning(f"✗ Nicht gefunden: {address['full_address']}")
     
-    def create_map(self, output_file: str = "map.html"):
-        """Erstellt eine interaktive Karte mit den geocodierten Adressen"""
+    def create_map(self, output_file: str = "map.html", clustering: str = "server"):
+        """Erstellt eine interaktive Karte mit den geocodierten Adressen
+
+        clustering: 'server' zeichnet vorberechnete Cluster (cluster_index),
+        'browser' verwendet wie bisher MarkerCluster.
+        """
+        import pandas as pd
+        import folium
+        from folium.plugins import MarkerCluster
+        from map_output import save_map
+        from lazy_popups import lazy_popups_aktiv, add_lazy_markers
+        from cluster_index import add_cluster_layer
+
         if not self.geocoded_addresses:
             logger.error("Keine geocodierten Adressen vorhanden!")
             return
@@ -156,25 +162,34 @@ class PDFToMapConverter:
         # Karte erstellen
         m = folium.Map(location=[avg_lat, avg_lon], zoom_start=13)
         
-        # Marker-Cluster hinzufügen
-        marker_cluster = MarkerCluster().add_to(m)
+        if clustering == 'server':
+            # Vorberechnete Cluster pro Zoomstufe, der Browser clustert nicht mehr selbst
+            add_cluster_layer(m, pd.DataFrame(self.geocoded_addresses), popup='adresse',
+                              tooltip='tooltip_adresse')
+        else:
+            # Marker-Cluster hinzufügen
+            marker_cluster = MarkerCluster().add_to(m)
         
-        # Marker für jede Adresse
-        for addr in self.geocoded_addresses:
-            popup_text = f"""
-            <b>{addr['street']} {addr['house_number']}</b><br>
-            {addr['postal_code']} {addr['city']}<br>
-            <small>Lat: {addr['latitude']:.6f}, Lon: {addr['longitude']:.6f}</small>
-            """
+            # Marker für jede Adresse
+            if lazy_popups_aktiv():
+                add_lazy_markers(m, marker_cluster, pd.DataFrame(self.geocoded_addresses), popup='adresse',
+                                 tooltip='tooltip_adresse', marker_typ='marker')
+            else:
+                for addr in self.geocoded_addresses:
+                    popup_text = f"""
+                    <b>{addr['street']} {addr['house_number']}</b><br>
+                    {addr['postal_code']} {addr['city']}<br>
+                    <small>Lat: {addr['latitude']:.6f}, Lon: {addr['longitude']:.6f}</small>
+                    """
             
-            folium.Marker(
-                location=[addr['latitude'], addr['longitude']],
-                popup=folium.Popup(popup_text, max_width=300),
-                tooltip=addr['full_address']
-            ).add_to(marker_cluster)
+                    folium.Marker(
+                        location=[addr['latitude'], addr['longitude']],
+                        popup=folium.Popup(popup_text, max_width=300),
+                        tooltip=addr['full_address']
+                    ).add_to(marker_cluster)
         
         # Karte speichern
-        m.save(output_file)
+        save_map(m, output_file)
         logger.info(f"Karte gespeichert als: {output_file}")
         
         # Zusätzlich als GeoJSON speichern
@@ -182,44 +197,22 @@ class PDFToMapConverter:
         self.save_as_geojson(geojson_file)
     
     def save_as_geojson(self, output_file: str):
-        """Speichert die Daten als GeoJSON für weitere Verwendung"""
-        features = []
-        
-        for addr in self.geocoded_addresses:
-            feature = {
-                "type": "Feature",
-                "geometry": {
-                    "type": "Point",
-                    "coordinates": [addr['longitude'], addr['latitude']]
-                },
-                "properties": {
-                    "street": addr['street'],
-                    "house_number": addr['house_number'],
-                    "postal_code": addr['postal_code'],
-                    "city": addr['city'],
-                    "full_address": addr['full_address']
-                }
-            }
-            features.append(feature)
-        
-        geojson = {
-            "type": "FeatureCollection",
-            "features": features
-        }
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(geojson, f, ensure_ascii=False, indent=2)
+        """Speichert die Daten als GeoJSON für weitere Verwendung (Format siehe geojson_writer)"""
+        from geojson_writer import schreibe_punkte, geojson_optionen
+        schreibe_punkte(output_file, self.geocoded_addresses, GEOJSON_EIGENSCHAFTEN, **geojson_optionen())
         
         logger.info(f"GeoJSON gespeichert als: {output_file}")
     
     def save_as_csv(self, output_file: str):
         """Speichert die Daten als CSV"""
         if self.geocoded_addresses:
+            import pandas as pd
+            from street_store import schreibe_strassen
             df = pd.DataFrame(self.geocoded_addresses)
-            df.to_csv(output_file, index=False, encoding='utf-8')
+            schreibe_strassen(df, output_file)
             logger.info(f"CSV gespeichert als: {output_file}")
     
-    def process(self):
+    def process(self, ausgabe_verzeichnis: str = '.'):
         """Hauptprozess: PDF -> Text -> Adressen -> Geocoding -> Karte"""
         try:
             # Text aus PDF extrahieren
@@ -240,7 +233,7 @@ class PDFToMapConverter:
                 return
             
             # Karte erstellen
-            base_name = os.path.splitext(os.path.basename(self.pdf_path))[0]
+            base_name = os.path.join(ausgabe_verzeichnis, os.path.splitext(os.path.basename(self.pdf_path))[0])
             map_file = f"{base_name}_map.html"
             self.create_map(map_file)
             
@@ -260,14 +253,20 @@ class PDFToMapConverter:
 
 def main():
     """Hauptfunktion"""
-    pdf_path = "/Users/marcelgaertner/Desktop/Arbeit/Markus schmitz/marcus-call-agent/Nümbrecht straßengenau.pdf"
+    parser = argparse.ArgumentParser(description='Erstellt aus einem Adress-PDF eine interaktive Karte')
+    parser.add_argument('pdf', nargs='?', default=STANDARD_PDF, help='PDF-Datei')
+    parser.add_argument('--ausgabe', default='.', help='Verzeichnis für Karte, CSV und GeoJSON')
+    parser.add_argument('--cache', default=None, help='OCR- und Geocoding-Cache (SQLite), z.B. .cache/verarbeitung.sqlite')
+    args = parser.parse_args()
+    pdf_path = args.pdf
     
     if not os.path.exists(pdf_path):
         logger.error(f"PDF-Datei nicht gefunden: {pdf_path}")
         return
     
-    converter = PDFToMapConverter(pdf_path)
-    converter.process()
+    cache = VerarbeitungsCache(args.cache) if args.cache else None
+    converter = PDFToMapConverter(pdf_path, cache)
+    converter.process(args.ausgabe)
 
 
 if __name__ == "__main__":
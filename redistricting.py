@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Was-wäre-wenn für den Zuschnitt der Kreistags-Wahlbezirke
+Hält die Kennzahlen je Kreistagkandidat (Wahlberechtigte, Straßen, Bezirke, Mittelpunkt) als
+Summen über die WBZ und aktualisiert sie beim Verschieben eines WBZ in O(1), statt die Tabelle
+pro Kandidat neu zu filtern. Beim Neuzeichnen werden nur die Ebenen der betroffenen
+Kreistagkandidaten neu aufgebaut.
+"""
+
+import json
+import argparse
+import logging
+from typing import Dict, List, Set
+import numpy as np
+import pandas as pd
+import folium
+from geodesy import ohne_ersatzkoordinate
+from kartendaten import KartenDaten
+from map_output import save_map
+from street_index import einheitsvektoren
+
+# Logging konfigurieren
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Aufbau des Kennzahlen-Vektors je WBZ bzw. je Kreistagkandidat (Summen, daher addierbar)
+KENNZAHLEN = ('wahlberechtigte', 'strassen', 'bezirke', 'punkte', 'x', 'y', 'z')
+WAHLBER, STRASSEN, BEZIRKE, PUNKTE, X, Y, Z = range(len(KENNZAHLEN))
+
+
+def wbz_nummer(wbz: str) -> int:
+    """Sortierschlüssel 'WBZ 110' -> 110"""
+    return int(wbz.split()[-1])
+
+
+class Bezirksplan:
+    """Zuordnung WBZ -> Kreistagkandidat mit inkrementell gepflegten Kennzahlen"""
+
+    def __init__(self, daten: KartenDaten, quelle: str = 'map'):
+        self.daten = daten
+        self.wahlbezirke = daten.wahlbezirke
+        self.kreistagskandidaten = daten.kreistagskandidaten
+        self.df = daten.tabelle(quelle)
+
+        self.zuordnung: Dict[str, str] = {wbz: name for name, info in self.kreistagskandidaten.items()
+                                          for wbz in info['wahlbezirke']}
+        self.zeilen = self.df.groupby('wbz').indices
+        self.wbz_werte = self._wbz_kennzahlen()
+
+        self.summen = {name: np.zeros(len(KENNZAHLEN)) for name in self.kreistagskandidaten}
+        for wbz, name in self.zuordnung.items():
+            self.summen[name] += self.wbz_werte[wbz]
+
+        self.verlauf: List[tuple] = []
+        self.geaendert: Set[str] = set(self.kreistagskandidaten)
+        self._ebenen: Dict[str, folium.FeatureGroup] = {}
+
+    def _wbz_kennzahlen(self) -> Dict[str, np.ndarray]:
+        """Einmalige Aggregation je WBZ; Einheitsvektoren machen den Mittelpunkt addierbar"""
+        mit_lage = ohne_ersatzkoordinate(self.df)
+        vektoren = pd.DataFrame(einheitsvektoren(mit_lage['latitude'], mit_lage['longitude']),
+                                columns=['x', 'y', 'z'], index=mit_lage.index)
+        vektor_summen = vektoren.groupby(mit_lage['wbz']).sum()
+        punkte = mit_lage.groupby('wbz').size()
+        wahlberechtigte = self._wahlberechtigte()
+
+        werte = {}
+        for wbz in self.zuordnung:
+            vektor = vektor_summen.loc[wbz].to_numpy() if wbz in vektor_summen.index else np.zeros(3)
+            werte[wbz] = np.array([
+                wahlberechtigte[wbz],
+                len(self.zeilen.get(wbz, [])),
+                1,
+                punkte.get(wbz, 0),
+                *vektor
+            ], dtype=float)
+        return werte
+
+    def _wahlberechtigte(self) -> Dict[str, int]:
+        """Wahlberechtigte je WBZ wie in kreistagskandidaten_statistik.csv
+
+        Aus der Straßentabelle, für WBZ ohne Straßen aus der Zuordnung. Weicht die Zuordnung ab,
+        wird das protokolliert.
+        """
+        tabelle = self.df.groupby('wbz', observed=True)['wahlberechtigte'].first()
+        werte = {}
+        abweichend = []
+        for wbz in self.zuordnung:
+            zuordnung = self.wahlbezirke.get(wbz, {}).get('wahlberechtigte', 0)
+            werte[wbz] = int(tabelle[wbz]) if wbz in tabelle.index else zuordnung
+            if werte[wbz] != zuordnung:
+                abweichend.append(f"{wbz} {werte[wbz]} statt {zuordnung}")
+        if abweichend:
+            logger.info(f"Wahlberechtigte aus der Straßentabelle, abweichend von der Zuordnung: "
+                        f"{', '.join(abweichend)}")
+        return werte
+
+    def verschiebe(self, wbz: str, ziel: str):
+        """Ordnet einen WBZ einem anderen Kreistagkandidaten zu (O(1))"""
+        if wbz not in self.zuordnung:
+            raise ValueError(f"Unbekannter Wahlbezirk: {wbz}")
+        if ziel not in self.summen:
+            raise ValueError(f"Unbekannter Kreistagkandidat: {ziel}")
+        quelle = self.zuordnung[wbz]
+        if quelle == ziel:
+            return
+
+        self.summen[quelle] -= self.wbz_werte[wbz]
+        self.summen[ziel] += self.wbz_werte[wbz]
+        self.zuordnung[wbz] = ziel
+        self.verlauf.append((wbz, quelle, ziel))
+        self.geaendert.update((quelle, ziel))
+        logger.info(f"{wbz}: {quelle} -> {ziel}")
+
+    def rueckgaengig(self):
+        """Nimmt die letzte Verschiebung zurück"""
+        if not self.verlauf:
+            return
+        wbz, quelle, _ = self.verlauf.pop()
+        self.verschiebe(wbz, quelle)
+        self.verlauf.pop()
+
+    def bezirke_von(self, name: str) -> List[str]:
+        """WBZ eines Kreistagkandidaten in numerischer Reihenfolge"""
+        return sorted((wbz for wbz, k in self.zuordnung.items() if k == name), key=wbz_nummer)
+
+    def statistik(self) -> pd.DataFrame:
+        """Kennzahlen je Kreistagkandidat aus den gepflegten Summen"""
+        mittel = sum(s[WAHLBER] for s in self.summen.values()) / len(self.summen)
+        zeilen = []
+        for name, s in self.summen.items():
+            lat = np.degrees(np.arctan2(s[Z], np.hypot(s[X], s[Y]))) if s[PUNKTE] else np.nan
+            lon = np.degrees(np.arctan2(s[Y], s[X])) if s[PUNKTE] else np.nan
+            zeilen.append({
+                'Kreistagkandidat': name,
+                'Kreis-WBZ': self.kreistagskandidaten[name]['kreis_wbz'],
+                'Anzahl Bezirke': int(s[BEZIRKE]),
+                'Wahlbezirke': ', '.join(self.bezirke_von(name)),
+                'Gesamt Wahlberechtigte': int(s[WAHLBER]),
+                'Abweichung vom Mittel (%)': round(100.0 * (s[WAHLBER] - mittel) / mittel, 1) if mittel else 0.0,
+                'Straßen auf Karte': int(s[STRASSEN]),
+                'Zentrum Lat': round(lat, 6),
+                'Zentrum Lon': round(lon, 6)
+            })
+        return pd.DataFrame(zeilen)
+
+    def als_zuordnung(self) -> Dict:
+        """Aktueller Zuschnitt im Format von kreistagskandidaten_zuordnung.json"""
+        ergebnis = {}
+        for name, info in self.kreistagskandidaten.items():
+            bezirke = self.bezirke_von(name)
+            ergebnis[name] = {
+                **info,
+                'wahlbezirke': bezirke,
+                'kandidaten': [self.wahlbezirke[wbz]['kandidat'] for wbz in bezirke]
+            }
+        return {'kreistagskandidaten': ergebnis}
+
+    def speichere_zuordnung(self, pfad: str):
+        with open(pfad, 'w', encoding='utf-8') as f:
+            json.dump(self.als_zuordnung(), f, ensure_ascii=False, indent=2)
+
+    def _baue_ebene(self, name: str) -> folium.FeatureGroup:
+        """Marker aller Straßen eines Kreistagkandidaten in dessen Farbe"""
+        farbe = self.kreistagskandidaten[name]['farbe']
+        ebene = folium.FeatureGroup(name=f"Kreistagkandidat: {name}")
+        zeilen = [self.zeilen[wbz] for wbz in self.bezirke_von(name) if wbz in self.zeilen]
+        if not zeilen:
+            return ebene
+        for _, row in self.df.iloc[np.concatenate(zeilen)].iterrows():
+            folium.CircleMarker(
+                location=[row['latitude'], row['longitude']],
+                radius=8,
+                tooltip=f"{row['street']} ({row['wbz']}, {row['kandidat']})",
+                color=farbe,
+                fill=True,
+                fillColor=row['kandidat_farbe'],
+                fillOpacity=0.8,
+                weight=3
+            ).add_to(ebene)
+        return ebene
+
+    def karte(self) -> folium.Map:
+        """Karte mit einer Ebene je Kreistagkandidat; nur geänderte Ebenen werden neu aufgebaut"""
+        for name in sorted(self.geaendert):
+            self._ebenen[name] = self._baue_ebene(name)
+        if self.geaendert:
+            logger.info(f"Neu aufgebaute Ebenen: {', '.join(sorted(self.geaendert))}")
+        self.geaendert.clear()
+
+        m = folium.Map(location=[self.df['latitude'].mean(), self.df['longitude'].mean()], zoom_start=12)
+        for name in self.kreistagskandidaten:
+            m.add_child(self._ebenen[name])
+        folium.LayerControl(collapsed=False).add_to(m)
+        m.get_root().html.add_child(folium.Element(self._statistik_html()))
+        return m
+
+    def _statistik_html(self) -> str:
+        zeilen = ''.join(
+            f"<tr><td style=\"color:{self.kreistagskandidaten[r['Kreistagkandidat']]['farbe']}\">"
+            f"<b>{r['Kreistagkandidat']}</b></td><td>{r['Anzahl Bezirke']}</td>"
+            f"<td>{r['Gesamt Wahlberechtigte']}</td><td>{r['Abweichung vom Mittel (%)']:+.1f}%</td></tr>"
+            for _, r in self.statistik().iterrows()
+        )
+        return f'''
+        <div style="position: fixed; bottom: 20px; left: 20px; z-index: 1000; background: white;
+                    padding: 10px; border: 2px solid #333; border-radius: 6px; font-family: Arial, sans-serif;">
+            <b>Zuschnitt (Simulation)</b>
+            <table style="font-size: 12px; margin-top: 5px;">
+                <tr><th>Kreistagkandidat</th><th>Bezirke</th><th>Wahlber.</th><th>Abw.</th></tr>
+                {zeilen}
+            </table>
+        </div>
+        '''
+
+
+def parse_verschiebung(text: str) -> tuple:
+    """'WBZ 60=Thomas Schlegel' -> ('WBZ 60', 'Thomas Schlegel')"""
+    if '=' not in text:
+        raise argparse.ArgumentTypeError(f"Erwartet 'WBZ=Kreistagkandidat', erhalten: {text}")
+    wbz, ziel = text.split('=', 1)
+    return wbz.strip(), ziel.strip()
+
+
+def main():
+    """Hauptfunktion"""
+    parser = argparse.ArgumentParser(description='Simuliert einen geänderten Zuschnitt der Kreistags-Wahlbezirke')
+    parser.add_argument('--verschiebe', action='append', type=parse_verschiebung, default=[],
+                        metavar='"WBZ=KANDIDAT"', help='WBZ einem anderen Kreistagkandidaten zuordnen (mehrfach möglich)')
+    parser.add_argument('--karte', default='wahlbezirke_kreistag_simulation.html', help='Karte des Zuschnitts')
+    parser.add_argument('--statistik', default='kreistagskandidaten_simulation.csv', help='Kennzahlen (CSV)')
+    parser.add_argument('--speichern', default=None,
+                        help='Zuschnitt als JSON speichern (Format wie kreistagskandidaten_zuordnung.json)')
+    args = parser.parse_args()
+
+    plan = Bezirksplan(KartenDaten())
+    for wbz, ziel in args.verschiebe:
+        try:
+            plan.verschiebe(wbz, ziel)
+        except ValueError as e:
+            parser.error(str(e))
+
+    statistik = plan.statistik()
+    print(statistik[['Kreistagkandidat', 'Anzahl Bezirke', 'Gesamt Wahlberechtigte',
+                     'Abweichung vom Mittel (%)', 'Straßen auf Karte']].to_string(index=False))
+    statistik.to_csv(args.statistik, index=False, encoding='utf-8')
+    print(f"✓ Statistik gespeichert: {args.statistik}")
+
+    save_map(plan.karte(), args.karte)
+    print(f"✓ Simulationskarte erstellt: {args.karte}")
+
+    if args.speichern:
+        plan.speichere_zuordnung(args.speichern)
+        print(f"✓ Zuschnitt gespeichert: {args.speichern}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Laufrouten für Wahlkampfteams
+Ordnet die Straßen jeder Gruppe (Kandidat, WBZ oder Kreistagkandidat) zu einer kurzen Route:
+Nächster-Nachbar-Start, danach 2-opt und Or-opt auf einer vorab berechneten Abstandsmatrix.
+Ausgabe als druckbare Liste (CSV) und als Karte mit nummerierten Stationen.
+"""
+
+import time
+import argparse
+import logging
+from typing import Optional
+import numpy as np
+import pandas as pd
+import folium
+from geodesy import abstandsmatrix, ohne_ersatzkoordinate
+from kartendaten import KartenDaten
+from map_output import save_map
+
+# Logging konfigurieren
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+OR_OPT_LAENGEN = (1, 2, 3)  # Segmentlängen, die Or-opt verschiebt
+VERBESSERUNG_MIN_M = 1e-6   # Kleinere Gewinne zählen nicht (Rundungsfehler)
+
+
+def tour_laenge(abstand: np.ndarray, tour: np.ndarray, rundtour: bool = False) -> float:
+    """Länge einer Route in Metern"""
+    laenge = abstand[tour[:-1], tour[1:]].sum()
+    return float(laenge + abstand[tour[-1], tour[0]]) if rundtour else float(laenge)
+
+
+def naechster_nachbar(abstand: np.ndarray, start: int = 0) -> np.ndarray:
+    """Startroute: immer zur nächsten noch nicht besuchten Straße"""
+    n = len(abstand)
+    tour = np.empty(n, dtype=np.int64)
+    besucht = np.zeros(n, dtype=bool)
+    aktuell = start
+    for i in range(n):
+        tour[i] = aktuell
+        besucht[aktuell] = True
+        if i < n - 1:
+            aktuell = int(np.argmin(np.where(besucht, np.inf, abstand[aktuell])))
+    return tour
+
+
+def zwei_opt(abstand: np.ndarray, tour: np.ndarray) -> np.ndarray:
+    """2-opt für offene Routen: kehrt jeweils das Teilstück mit dem größten Gewinn um
+
+    Alle Kantenpaare werden pro Schritt gleichzeitig als Matrix bewertet; bei offenen Routen
+    kommen das Umkehren von Anfangs- und Endstück hinzu.
+    """
+    n = len(tour)
+    if n < 3:
+        return tour
+    tour = tour.copy()
+    i, j = np.triu_indices(n - 1, k=2)  # Kanten (i, i+1) und (j, j+1), nicht benachbart
+    k = np.arange(n - 1)                # Kante (k, k+1) für Anfang/Ende
+
+    while True:
+        a, b, c, d = tour[i], tour[i + 1], tour[j], tour[j + 1]
+        innen = abstand[a, b] + abstand[c, d] - abstand[a, c] - abstand[b, d]
+        kante = abstand[tour[k], tour[k + 1]]
+        anfang = kante - abstand[tour[0], tour[k + 1]]   # tour[:k+1] umkehren
+        ende = kante - abstand[tour[k], tour[-1]]        # tour[k+1:] umkehren
+
+        kandidaten = [(innen, 0), (anfang, 1), (ende, 2)]
+        gewinn, art = max(((g.max(), art) for g, art in kandidaten if len(g)), key=lambda x: x[0])
+        if gewinn <= VERBESSERUNG_MIN_M:
+            return tour
+
+        if art == 0:
+            x = int(np.argmax(innen))
+            tour[i[x] + 1:j[x] + 1] = tour[i[x] + 1:j[x] + 1][::-1].copy()
+        elif art == 1:
+            x = int(np.argmax(anfang))
+            tour[:x + 1] = tour[:x + 1][::-1].copy()
+        else:
+            x = int(np.argmax(ende))
+            tour[x + 1:] = tour[x + 1:][::-1].copy()
+
+
+def or_opt(abstand: np.ndarray, tour: np.ndarray) -> np.ndarray:
+    """Or-opt: verschiebt kurze Segmente (auch umgedreht) an die günstigste andere Stelle"""
+    tour = list(tour)
+    verbessert = True
+    while verbessert:
+        verbessert = False
+        for laenge in OR_OPT_LAENGEN:
+            for start in range(len(tour) - laenge + 1):
+                segment = tour[start:start + laenge]
+                rest = tour[:start] + tour[start + laenge:]
+                if len(rest) < 2:
+                    continue
+                vor = tour[start - 1] if start > 0 else None
+                nach = tour[start + laenge] if start + laenge < len(tour) else None
+
+                # Ersparnis durch Herausnehmen des Segments
+                ersparnis = 0.0
+                if vor is not None:
+                    ersparnis += abstand[vor, segment[0]]
+                if nach is not None:
+                    ersparnis += abstand[segment[-1], nach]
+                if vor is not None and nach is not None:
+                    ersparnis -= abstand[vor, nach]
+
+                # Kosten für das Einfügen zwischen rest[k] und rest[k+1], vorwärts und umgedreht
+                r = np.asarray(rest)
+                links, rechts = r[:-1], r[1:]
+                basis = -abstand[links, rechts]
+                vorwaerts = basis + abstand[links, segment[0]] + abstand[segment[-1], rechts]
+                rueckwaerts = basis + abstand[links, segment[-1]] + abstand[segment[0], rechts]
+                # Einfügen vor dem Anfang oder nach dem Ende der offenen Route
+                rand = np.array([abstand[segment[-1], r[0]], abstand[segment[0], r[0]],
+                                 abstand[r[-1], segment[0]], abstand[r[-1], segment[-1]]])
+                kosten = np.concatenate([vorwaerts, rueckwaerts, rand])
+
+                beste = int(np.argmin(kosten))
+                if ersparnis - kosten[beste] <= VERBESSERUNG_MIN_M:
+                    continue
+
+                k = len(links)
+                if beste < k:
+                    tour = rest[:beste + 1] + segment + rest[beste + 1:]
+                elif beste < 2 * k:
+                    beste -= k
+                    tour = rest[:beste + 1] + segment[::-1] + rest[beste + 1:]
+                else:
+                    varianten = [segment + rest, segment[::-1] + rest, rest + segment, rest + segment[::-1]]
+                    tour = varianten[beste - 2 * k]
+                verbessert = True
+                break
+            if verbessert:
+                break
+    return np.asarray(tour, dtype=np.int64)
+
+
+def optimiere_route(lat: np.ndarray, lon: np.ndarray, start: Optional[int] = None) -> np.ndarray:
+    """Reihenfolge der Punkte für eine kurze offene Route"""
+    n = len(lat)
+    if n < 3:
+        return np.arange(n)
+    abstand = abstandsmatrix(lat, lon)
+    if start is None:
+        # Am Rand beginnen: Punkt mit der größten Summe der Abstände
+        start = int(np.argmax(abstand.sum(axis=1)))
+
+    tour = naechster_nachbar(abstand, start)
+    laenge = tour_laenge(abstand, tour)
+    while True:
+        tour = or_opt(abstand, zwei_opt(abstand, tour))
+        neue_laenge = tour_laenge(abstand, tour)
+        if laenge - neue_laenge <= VERBESSERUNG_MIN_M:
+            return tour
+        laenge = neue_laenge
+
+
+def plane_routen(df: pd.DataFrame, gruppe: str = 'kandidat') -> pd.DataFrame:
+    """Route je Gruppe; Straßen ohne echte Koordinate werden am Ende ohne Nummer angehängt"""
+    ergebnisse = []
+    for name, strassen in df.groupby(gruppe, sort=True, observed=True):
+        start = time.perf_counter()
+        mit_lage = ohne_ersatzkoordinate(strassen)
+        ohne_lage = strassen.drop(mit_lage.index)
+
+        reihenfolge = optimiere_route(mit_lage['latitude'].to_numpy(), mit_lage['longitude'].to_numpy())
+        route = mit_lage.iloc[reihenfolge].copy()
+        route['reihenfolge'] = np.arange(1, len(route) + 1)
+
+        lat = route['latitude'].to_numpy()
+        lon = route['longitude'].to_numpy()
+        schritt = np.zeros(len(route))
+        if len(route) > 1:
+            schritt[1:] = abstandsmatrix(lat[:-1], lon[:-1], lat[1:], lon[1:]).diagonal()
+        route['abstand_vorher_m'] = np.round(schritt)
+        route['strecke_gesamt_m'] = np.round(np.cumsum(schritt))
+        route['hinweis'] = ''
+
+        ohne_lage = ohne_lage.assign(reihenfolge=pd.NA, abstand_vorher_m=pd.NA, strecke_gesamt_m=pd.NA,
+                                     hinweis='Lage unbekannt (Ersatzkoordinate)')
+        ergebnisse.append(pd.concat([route, ohne_lage]))
+
+        gesamt = schritt.sum()
+        logger.info(f"{name}: {len(route)} Straßen, {gesamt / 1000:.1f} km, "
+                    f"{time.perf_counter() - start:.2f}s")
+    return pd.concat(ergebnisse, ignore_index=True)
+
+
+def add_routen_layer(m, routen: pd.DataFrame, gruppe: str = 'kandidat'):
+    """Zeichnet jede Route als Linie mit nummerierten Stationen in eine eigene Ebene"""
+    for name, route in routen.dropna(subset=['reihenfolge']).groupby(gruppe, sort=True, observed=True):
+        farbe = route['kandidat_farbe'].iloc[0] if 'kandidat_farbe' in route.columns else '#3388ff'
+        ebene = folium.FeatureGroup(name=f"Route: {name}", show=True)
+        folium.PolyLine(route[['latitude', 'longitude']].to_numpy().tolist(),
+                        color=farbe, weight=3, opacity=0.8).add_to(ebene)
+        for _, station in route.iterrows():
+            folium.CircleMarker(
+                location=[station['latitude'], station['longitude']],
+                radius=6, color=farbe, fill=True, fillOpacity=0.9, weight=1,
+                tooltip=f"{int(station['reihenfolge'])}. {station['street']}"
+            ).add_to(ebene)
+        ebene.add_to(m)
+
+
+def main():
+    """Hauptfunktion"""
+    parser = argparse.ArgumentParser(description='Plant kurze Laufrouten durch die Straßen jeder Gruppe')
+    parser.add_argument('--gruppe', choices=['kandidat', 'wbz', 'kreistagkandidat'], default='kandidat',
+                        help='Für welche Gruppe je eine Route geplant wird')
+    parser.add_argument('--output', default='strassen_routen.csv', help='Druckbare Liste (CSV)')
+    parser.add_argument('--karte', default='wahlbezirke_routen_map.html', help='Karte mit den Routen')
+    args = parser.parse_args()
+
+    df = KartenDaten().tabelle('complete')
+    routen = plane_routen(df, args.gruppe)
+
+    spalten = [args.gruppe, 'reihenfolge', 'street', 'original', 'wbz', 'kandidat', 'abstand_vorher_m',
+               'strecke_gesamt_m', 'hinweis', 'latitude', 'longitude']
+    spalten = list(dict.fromkeys(s for s in spalten if s in routen.columns))
+    routen[spalten].to_csv(args.output, index=False, encoding='utf-8')
+    print(f"✓ Routenliste gespeichert: {args.output}")
+
+    m = folium.Map(location=[df['latitude'].mean(), df['longitude'].mean()], zoom_start=12)
+    add_routen_layer(m, routen, args.gruppe)
+    folium.LayerControl().add_to(m)
+    save_map(m, args.karte)
+    print(f"✓ Routenkarte erstellt: {args.karte}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Cache der gerasterten PDF-Seiten
+Jede Seite wird einmal je Auflösung von poppler gerastert und als Graustufen-Array (.npy, uint8)
+abgelegt. Weitere OCR-Durchgänge, Experimente mit der Vorverarbeitung und Ausschnitte lesen die
+Datei per Memory-Mapping, ohne convert_from_path erneut aufzurufen. Der Schlüssel ist der Inhalt
+der PDF-Datei, eine geänderte PDF wird also neu gerastert.
+"""
+
+import os
+import argparse
+import logging
+from typing import Dict, List, Tuple
+import numpy as np
+from PIL import Image
+from pdf2image import convert_from_path, pdfinfo_from_path
+from verarbeitungs_cache import datei_hash
+
+# Logging konfigurieren
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+CACHE_ENV = 'OCR_SEITEN_CACHE'  # 1 = .cache/seiten, sonst Verzeichnis
+CACHE_VERZEICHNIS = '.cache/seiten'
+
+
+class SeitenCache:
+    """Seitenbilder als Memory-Mapped-Arrays: <verzeichnis>/<pdf-hash>/<dpi>/seite_0001.npy"""
+
+    def __init__(self, verzeichnis: str = CACHE_VERZEICHNIS):
+        self.verzeichnis = verzeichnis
+        self._hashes: Dict[Tuple[str, float, int], str] = {}
+
+    @classmethod
+    def aus_umgebung(cls):
+        """Cache laut OCR_SEITEN_CACHE, None wenn nicht gesetzt"""
+        wert = os.environ.get(CACHE_ENV, '').strip()
+        if not wert or wert.lower() in ('0', 'false', 'nein', 'no'):
+            return None
+        return cls(CACHE_VERZEICHNIS if wert.lower() in ('1', 'true', 'ja', 'yes') else wert)
+
+    def _hash(self, pdf_path: str) -> str:
+        # Hash nur neu berechnen, wenn sich die Datei geändert hat
+        stat = os.stat(pdf_path)
+        schluessel = (os.path.abspath(pdf_path), stat.st_mtime, stat.st_size)
+        if schluessel not in self._hashes:
+            self._hashes[schluessel] = datei_hash(pdf_path)
+        return self._hashes[schluessel]
+
+    def _pfad(self, pdf_path: str, dpi: int, nummer: int) -> str:
+        return os.path.join(self.verzeichnis, self._hash(pdf_path), str(dpi), f"seite_{nummer:04d}.npy")
+
+    def anzahl(self, pdf_path: str) -> int:
+        return int(pdfinfo_from_path(pdf_path)['Pages'])
+
+    def seite(self, pdf_path: str, nummer: int, dpi: int) -> np.ndarray:
+        """Seite (ab 1) als schreibgeschütztes Memory-Mapped-Array, bei Bedarf einmal gerastert"""
+        pfad = self._pfad(pdf_path, dpi, nummer)
+        if not os.path.exists(pfad):
+            bild = convert_from_path(pdf_path, dpi=dpi, first_page=nummer, last_page=nummer, grayscale=True)[0]
+            os.makedirs(os.path.dirname(pfad), exist_ok=True)
+            # Erst vollständig schreiben, dann umbenennen: parallele Leser sehen nie eine halbe Datei
+            temp = f"{pfad}.{os.getpid()}.tmp"
+            with open(temp, 'wb') as f:
+                np.save(f, np.asarray(bild.convert('L')))
+            os.replace(temp, pfad)
+        return np.load(pfad, mmap_mode='r')
+
+    def seiten(self, pdf_path: str, dpi: int) -> List[np.ndarray]:
+        return [self.seite(pdf_path, nummer, dpi) for nummer in range(1, self.anzahl(pdf_path) + 1)]
+
+    def bild(self, pdf_path: str, nummer: int, dpi: int) -> Image.Image:
+        """Seite als PIL-Bild über demselben Speicher (ohne Kopie)"""
+        return Image.fromarray(self.seite(pdf_path, nummer, dpi))
+
+    def bilder(self, pdf_path: str, dpi: int) -> List[Image.Image]:
+        return [Image.fromarray(seite) for seite in self.seiten(pdf_path, dpi)]
+
+    def groesse(self) -> int:
+        """Belegter Platz in Bytes"""
+        return sum(os.path.getsize(os.path.join(ordner, name))
+                   for ordner, _, namen in os.walk(self.verzeichnis) for name in namen)
+
+
+def main():
+    """Hauptfunktion"""
+    parser = argparse.ArgumentParser(description='Rastert PDF-Seiten einmal in den Seiten-Cache')
+    parser.add_argument('pdf', nargs='+', help='PDF-Dateien')
+    parser.add_argument('--dpi', type=int, default=300, help='Auflösung')
+    parser.add_argument('--verzeichnis', default=CACHE_VERZEICHNIS, help='Cache-Verzeichnis')
+    args = parser.parse_args()
+
+    cache = SeitenCache(args.verzeichnis)
+    for pdf_path in args.pdf:
+        seiten = cache.seiten(pdf_path, args.dpi)
+        print(f"✓ {pdf_path}: {len(seiten)} Seiten mit {args.dpi} dpi im Cache")
+    print(f"Cache-Größe: {cache.groesse() / 1024 / 1024:.1f} MB ({args.verzeichnis})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Räumlicher Index für die Zuordnung beliebiger Koordinaten zu Wahlbezirken
+Ein Raster über den Bezirksflächen klassifiziert jede Zelle vorab: Punkte in Zellen, die ganz in
+einem Bezirk liegen, sind sofort zugeordnet; nur Punkte in Randzellen werden per
+NumPy-vektorisiertem Ray-Casting gegen die wenigen Kandidaten-Polygone geprüft.
+"""
+
+import os
+import json
+import time
+import argparse
+import logging
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+import shapely
+from shapely.geometry import shape
+
+# Logging konfigurieren
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+LEER = -1      # Zelle berührt keinen Bezirk
+GEMISCHT = -2  # Zelle liegt auf einer Bezirksgrenze
+
+# Punkte x Kanten pro Block beim Ray-Casting (begrenzt den Speicherbedarf)
+BLOCK_GROESSE = 4_000_000
+
+
+def polygon_kanten(geometrie) -> np.ndarray:
+    """Alle Ringkanten (außen und Löcher) eines (Multi-)Polygons als Array [x1, y1, x2, y2]"""
+    kanten = []
+    for polygon in getattr(geometrie, 'geoms', [geometrie]):
+        for ring in [polygon.exterior, *polygon.interiors]:
+            koordinaten = np.asarray(ring.coords)
+            kanten.append(np.hstack([koordinaten[:-1], koordinaten[1:]]))
+    return np.vstack(kanten) if kanten else np.empty((0, 4))
+
+
+def punkte_in_polygon(x: np.ndarray, y: np.ndarray, kanten: np.ndarray) -> np.ndarray:
+    """Even-Odd-Ray-Casting für viele Punkte gegen ein Polygon, blockweise vektorisiert"""
+    innen = np.zeros(len(x), dtype=bool)
+    x1, y1, x2, y2 = (kanten[:, i] for i in range(4))
+    # Waagerechte Kanten schneiden den Strahl nie, Division vermeiden
+    dy = np.where(y2 == y1, np.inf, y2 - y1)
+    block = max(1, BLOCK_GROESSE // max(len(kanten), 1))
+
+    for start in range(0, len(x), block):
+        px = x[start:start + block, None]
+        py = y[start:start + block, None]
+        kreuzt = ((y1 > py) != (y2 > py)) & (px < (x2 - x1) * (py - y1) / dy + x1)
+        innen[start:start + block] = np.count_nonzero(kreuzt, axis=1) % 2 == 1
+    return innen
+
+
+class BezirksIndex:
+    """Rasterindex über Bezirksflächen mit Batch-Zuordnung von Koordinaten
+
+    Überlappen sich Flächen (z.B. konkave Hüllen), gilt für einen Punkt der Bezirk, der in
+    geometrien zuerst steht.
+    """
+
+    def __init__(self, geometrien: List, attribute: pd.DataFrame, raster: int = 256):
+        self.geometrien = list(geometrien)
+        self.attribute = attribute.reset_index(drop=True)
+        self.kanten = [polygon_kanten(g) for g in self.geometrien]
+        self._melde_ueberlappungen()
+
+        self.min_x, self.min_y, self.max_x, self.max_y = shapely.total_bounds(self.geometrien)
+        self.nx = self.ny = raster
+        self.zelle_b = (self.max_x - self.min_x) / self.nx
+        self.zelle_h = (self.max_y - self.min_y) / self.ny
+
+        self._klassifiziere_zellen()
+
+    def _melde_ueberlappungen(self):
+        """Warnt vor überlappenden Flächen, dort entscheidet die Reihenfolge"""
+        geometrien = np.asarray(self.geometrien, dtype=object)
+        paare = shapely.STRtree(geometrien).query(geometrien, predicate='intersects')
+        paare = paare[:, paare[0] < paare[1]]
+        # Nur gemeinsame Fläche zählt, gemeinsame Grenzen (Voronoi) sind keine Überlappung
+        flaeche = shapely.area(shapely.intersection(geometrien[paare[0]], geometrien[paare[1]]))
+        paare = paare[:, flaeche > 0]
+        if paare.shape[1]:
+            namen = [f"{self.attribute.iloc[i, 0]}/{self.attribute.iloc[j, 0]}" for i, j in paare.T]
+            logger.warning(f"{paare.shape[1]} überlappende Bezirksflächen ({', '.join(namen)}), "
+                           f"Punkte in der Überlappung gehen an den zuerst genannten Bezirk")
+
+    def _klassifiziere_zellen(self):
+        """Bestimmt für jede Zelle: leer, ganz in einem Bezirk oder Randzelle mit Kandidaten"""
+        spalten, zeilen = np.meshgrid(np.arange(self.nx), np.arange(self.ny))
+        x0 = self.min_x + spalten.ravel() * self.zelle_b
+        y0 = self.min_y + zeilen.ravel() * self.zelle_h
+        zellen = shapely.box(x0, y0, x0 + self.zelle_b, y0 + self.zelle_h)
+
+        anzahl_zellen = self.nx * self.ny
+        wert = np.full(anzahl_zellen, LEER, dtype=np.int32)
+        beruehrt = np.zeros((anzahl_zellen, len(self.geometrien)), dtype=bool)
+        for i, geometrie in enumerate(self.geometrien):
+            shapely.prepare(geometrie)
+            beruehrt[:, i] = shapely.intersects(geometrie, zellen)
+            wert[shapely.contains_properly(geometrie, zellen)] = i
+
+        # Zellen mit mehreren Bezirken oder nur teilweiser Abdeckung sind Randzellen
+        anzahl = beruehrt.sum(axis=1)
+        rand = (anzahl > 0) & ((anzahl > 1) | (wert == LEER))
+        wert[rand] = GEMISCHT
+
+        self.zellen_wert = wert
+        self.rand_zeile = np.full(anzahl_zellen, -1, dtype=np.int32)
+        self.rand_zeile[rand] = np.arange(np.count_nonzero(rand))
+        self.rand_kandidaten = beruehrt[rand]
+
+        logger.info(f"Raster {self.nx}x{self.ny}: {np.count_nonzero(wert >= 0)} Zellen eindeutig, "
+                    f"{np.count_nonzero(rand)} Randzellen")
+
+    def suche(self, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        """Index des Bezirks für jeden Punkt, -1 außerhalb aller Bezirke"""
+        x = np.asarray(lon, dtype=float)
+        y = np.asarray(lat, dtype=float)
+        ergebnis = np.full(len(x), LEER, dtype=np.int32)
+
+        spalte = np.floor((x - self.min_x) / self.zelle_b).astype(np.int64)
+        zeile = np.floor((y - self.min_y) / self.zelle_h).astype(np.int64)
+        im_raster = (spalte >= 0) & (spalte < self.nx) & (zeile >= 0) & (zeile < self.ny)
+        zelle = np.where(im_raster, zeile * self.nx + spalte, 0)
+        wert = np.where(im_raster, self.zellen_wert[zelle], LEER)
+
+        eindeutig = wert >= 0
+        ergebnis[eindeutig] = wert[eindeutig]
+
+        rand = np.flatnonzero(wert == GEMISCHT)
+        if len(rand):
+            kandidaten = self.rand_kandidaten[self.rand_zeile[zelle[rand]]]
+            offen = np.ones(len(rand), dtype=bool)
+            for i, kanten in enumerate(self.kanten):
+                auswahl = np.flatnonzero(kandidaten[:, i] & offen)
+                if not len(auswahl):
+                    continue
+                punkte = rand[auswahl]
+                treffer = punkte_in_polygon(x[punkte], y[punkte], kanten)
+                ergebnis[punkte[treffer]] = i
+                offen[auswahl[treffer]] = False
+        return ergebnis
+
+    def zuordnen(self, lat: np.ndarray, lon: np.ndarray) -> pd.DataFrame:
+        """Bezirksattribute (wbz, kandidat, kreistagkandidat) für jeden Punkt"""
+        index = self.suche(lat, lon)
+        zeilen = self.attribute.reindex(np.where(index >= 0, index, len(self.attribute)))
+        return zeilen.reset_index(drop=True)
+
+
+def lade_bezirks_index(polygon_datei: str = 'wahlbezirke_polygone.geojson',
+                       wahlbezirke_file: str = 'wahlbezirke_zuordnung.json',
+                       kreistags_file: str = 'kreistagskandidaten_zuordnung.json',
+                       raster: int = 256) -> BezirksIndex:
+    """Baut den Index aus den Bezirksflächen, Attribute kommen aus den Zuordnungs-JSONs"""
+    with open(polygon_datei, 'r', encoding='utf-8') as f:
+        features = json.load(f)['features']
+
+    with open(wahlbezirke_file, 'r', encoding='utf-8') as f:
+        wahlbezirke = json.load(f)['wahlbezirke']
+
+    kreistag_nach_wbz: Dict[str, str] = {}
+    if os.path.exists(kreistags_file):
+        with open(kreistags_file, 'r', encoding='utf-8') as f:
+            for name, info in json.load(f)['kreistagskandidaten'].items():
+                for wbz in info['wahlbezirke']:
+                    kreistag_nach_wbz[wbz] = name
+
+    geometrien, attribute = [], []
+    for feature in features:
+        wbz = feature['properties']['wbz']
+        if wbz not in wahlbezirke:
+            logger.warning(f"{wbz} nicht in {wahlbezirke_file}, wird übersprungen")
+            continue
+        geometrien.append(shape(feature['geometry']))
+        attribute.append({
+            'wbz': wbz,
+            'bezirk': f"{wbz} - {wahlbezirke[wbz]['name']}",
+            'kandidat': wahlbezirke[wbz]['kandidat'],
+            'kreistagkandidat': kreistag_nach_wbz.get(wbz, '')
+        })
+
+    return BezirksIndex(geometrien, pd.DataFrame(attribute), raster=raster)
+
+
+def benchmark(index: BezirksIndex, anzahl: int = 1_000_000, seed: int = 0):
+    """Misst den Durchsatz mit zufälligen Punkten im Bereich der Bezirke"""
+    rng = np.random.default_rng(seed)
+    lon = rng.uniform(index.min_x, index.max_x, anzahl)
+    lat = rng.uniform(index.min_y, index.max_y, anzahl)
+
+    start = time.perf_counter()
+    ergebnis = index.suche(lat, lon)
+    dauer = time.perf_counter() - start
+
+    # Stichprobe gegen shapely prüfen, bei Überlappung gewinnt wie in suche() der erste Bezirk
+    stichprobe = rng.choice(anzahl, size=min(anzahl, 2000), replace=False)
+    erwartet = np.full(len(stichprobe), LEER)
+    for i, geometrie in enumerate(index.geometrien):
+        treffer = shapely.contains_xy(geometrie, lon[stichprobe], lat[stichprobe]) & (erwartet == LEER)
+        erwartet[treffer] = i
+    abweichungen = np.count_nonzero(erwartet != ergebnis[stichprobe])
+
+    logger.info(f"{anzahl:,} Punkte in {dauer:.3f}s ({anzahl / dauer:,.0f} Punkte/s), "
+                f"{abweichungen} Abweichungen in der Stichprobe")
+
+
+def main():
+    """Hauptfunktion"""
+    parser = argparse.ArgumentParser(description='Ordnet Koordinaten den Wahlbezirken zu')
+    parser.add_argument('input', nargs='?', help='CSV mit Spalten latitude und longitude')
+    parser.add_argument('--output', default=None, help='Ausgabe-CSV (Standard: <input>_bezirke.csv)')
+    parser.add_argument('--polygone', default='wahlbezirke_polygone.geojson',
+                        help='Bezirksflächen aus district_polygons.py')
+    parser.add_argument('--raster', type=int, default=256, help='Rasterzellen pro Achse')
+    parser.add_argument('--benchmark', type=int, default=0, metavar='N',
+                        help='Durchsatz mit N Zufallspunkten messen')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.polygone):
+        logger.error(f"Bezirksflächen nicht gefunden: {args.polygone} (zuerst district_polygons.py ausführen)")
+        return
+
+    index = lade_bezirks_index(args.polygone, raster=args.raster)
+
+    if args.benchmark:
+        benchmark(index, args.benchmark)
+
+    if args.input:
+        df = pd.read_csv(args.input)
+        lage = index.zuordnen(df['latitude'].to_numpy(), df['longitude'].to_numpy())
+        for spalte in ('wbz', 'kandidat', 'kreistagkandidat'):
+            df[f'lage_{spalte}'] = lage[spalte].fillna('').to_numpy()
+
+        output_file = args.output or f"{os.path.splitext(args.input)[0]}_bezirke.csv"
+        df.to_csv(output_file, index=False, encoding='utf-8')
+        logger.info(f"{(df['lage_wbz'] != '').sum()} von {len(df)} Punkten zugeordnet, "
+                    f"gespeichert als: {output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+KD-Baum über alle geocodierten Straßen
+Nächste-Straße-Suche für beliebige Koordinaten und Prüfung auf Ausreißer: Straßen, die weit
+von den übrigen Straßen ihres Wahlbezirks liegen, auf der Ersatzkoordinate sitzen, doppelte
+Koordinaten haben oder aus einem abgeschnittenen Straßennamen geocodiert wurden.
+"""
+
+import os
+import argparse
+import logging
+from typing import Tuple
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+from geodesy import ERDRADIUS_M, ist_ersatzkoordinate
+from street_store import lade_strassen
+
+# Logging konfigurieren
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def einheitsvektoren(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """WGS84 auf die Einheitskugel, damit euklidische Abstände großkreistreu bleiben"""
+    lat_rad = np.radians(np.asarray(lat, dtype=float))
+    lon_rad = np.radians(np.asarray(lon, dtype=float))
+    cos_lat = np.cos(lat_rad)
+    return np.column_stack([cos_lat * np.cos(lon_rad), cos_lat * np.sin(lon_rad), np.sin(lat_rad)])
+
+
+def sehne_zu_meter(sehne: np.ndarray) -> np.ndarray:
+    """Sehnenlänge auf der Einheitskugel in Großkreisabstand (Meter)"""
+    return 2.0 * ERDRADIUS_M * np.arcsin(np.clip(np.asarray(sehne) / 2.0, 0.0, 1.0))
+
+
+def meter_zu_sehne(meter: float) -> float:
+    """Großkreisabstand (Meter) in Sehnenlänge auf der Einheitskugel"""
+    return 2.0 * np.sin(meter / (2.0 * ERDRADIUS_M))
+
+
+class StrassenIndex:
+    """KD-Baum über die Straßenpunkte einer Tabelle mit latitude/longitude"""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df.dropna(subset=['latitude', 'longitude']).reset_index(drop=True)
+        self.punkte = einheitsvektoren(self.df['latitude'], self.df['longitude'])
+        self.baum = cKDTree(self.punkte)
+
+    def naechste(self, lat, lon, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """Abstände in Metern und Zeilenindizes der k nächsten Straßen je Abfragepunkt"""
+        sehne, index = self.baum.query(einheitsvektoren(np.atleast_1d(lat), np.atleast_1d(lon)), k=k)
+        return sehne_zu_meter(sehne), index
+
+    def naechste_strasse(self, lat, lon) -> pd.DataFrame:
+        """Nächste Straße (mit WBZ und Kandidat) für jeden Abfragepunkt"""
+        abstand, index = self.naechste(lat, lon)
+        treffer = self.df.iloc[index].reset_index(drop=True)
+        treffer['abstand_m'] = np.round(abstand, 1)
+        return treffer
+
+    def im_umkreis(self, lat: float, lon: float, radius_m: float) -> pd.DataFrame:
+        """Alle Straßen im Umkreis von radius_m Metern um einen Punkt"""
+        index = self.baum.query_ball_point(einheitsvektoren([lat], [lon])[0], r=meter_zu_sehne(radius_m))
+        return self.df.iloc[sorted(index)]
+
+    def nachbar_im_bezirk(self, gueltig: np.ndarray) -> np.ndarray:
+        """Abstand jeder gültigen Straße zur nächsten anderen gültigen Straße desselben WBZ (Meter)"""
+        abstand = np.full(len(self.df), np.nan)
+        for zeilen in self.df[gueltig].groupby('wbz').indices.values():
+            zeilen = np.flatnonzero(gueltig)[zeilen]
+            if len(zeilen) < 2:
+                continue
+            punkte = self.punkte[zeilen]
+            # k=2: der erste Treffer ist der Punkt selbst
+            sehne, _ = cKDTree(punkte).query(punkte, k=2)
+            abstand[zeilen] = sehne_zu_meter(sehne[:, 1])
+        return abstand
+
+    def pruefe(self, faktor: float = 5.0, min_abstand_m: float = 1500.0,
+               duplikat_m: float = 1.0) -> pd.DataFrame:
+        """Markiert verdächtige Straßen und liefert nur die auffälligen Zeilen mit Grund"""
+        df = self.df.copy()
+        gruende = [[] for _ in range(len(df))]
+
+        # Ersatzkoordinate: Straße wurde nicht gefunden und auf die Ortsmitte gesetzt
+        ersatz = ist_ersatzkoordinate(df['latitude'], df['longitude'])
+
+        # Ausreißer: nächste Straße desselben WBZ deutlich weiter weg als im WBZ üblich
+        nachbar = self.nachbar_im_bezirk(~ersatz)
+        typisch = pd.Series(nachbar).groupby(df['wbz']).transform('median').to_numpy()
+        ausreisser = nachbar > np.maximum(min_abstand_m, faktor * typisch)
+
+        # Doppelte Koordinaten (ohne Ersatzkoordinate, die ist eigener Grund)
+        duplikat = np.zeros(len(df), dtype=bool)
+        paare = self.baum.query_pairs(r=meter_zu_sehne(duplikat_m), output_type='ndarray')
+        duplikat[paare.ravel()] = True
+        duplikat &= ~ersatz
+
+        # Abgeschnittener Name, z.B. "Dr." aus "Dr.-Rieck-Straße"
+        gekuerzt = np.zeros(len(df), dtype=bool)
+        if 'original' in df.columns:
+            gekuerzt = np.array([o != s and o.startswith((s + '-', s + ' '))
+                                 for s, o in zip(df['street'].astype(str), df['original'].astype(str))],
+                                dtype=bool)
+
+        for maske, grund in ((ersatz, 'ersatzkoordinate'), (ausreisser, 'ausreisser'),
+                             (duplikat, 'duplikat'), (gekuerzt, 'name_gekuerzt')):
+            for i in np.flatnonzero(maske):
+                gruende[i].append(grund)
+
+        df['abstand_nachbar_m'] = np.round(nachbar, 1)
+        df['grund'] = [', '.join(g) for g in gruende]
+        return df[df['grund'] != '']
+
+
+def main():
+    """Hauptfunktion"""
+    parser = argparse.ArgumentParser(description='Prüft geocodierte Straßen auf Ausreißer')
+    parser.add_argument('input', nargs='?', default='wahlbezirke_complete.csv', help='Eingabe-CSV')
+    parser.add_argument('--output', default='strassen_ausreisser.csv', help='Ausgabe-CSV')
+    parser.add_argument('--faktor', type=float, default=5.0,
+                        help='Vielfaches des typischen Nachbarabstands im WBZ, ab dem ein Punkt auffällt')
+    parser.add_argument('--min-abstand', type=float, default=1500.0,
+                        help='Mindestabstand in Metern, ab dem ein Punkt auffällt')
+    parser.add_argument('--suche', nargs=2, type=float, metavar=('LAT', 'LON'),
+                        help='Nächste Straße zu einer Koordinate ausgeben')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        logger.error(f"Eingabedatei nicht gefunden: {args.input}")
+        return
+
+    index = StrassenIndex(lade_strassen(args.input))
+
+    if args.suche:
+        treffer = index.naechste_strasse(*args.suche).iloc[0]
+        print(f"✓ {treffer['street']} ({treffer['wbz']}, {treffer.get('kandidat', '')}), "
+              f"{treffer['abstand_m']} m entfernt")
+        return
+
+    auffaellig = index.pruefe(faktor=args.faktor, min_abstand_m=args.min_abstand)
+    spalten = [s for s in ('street', 'original', 'wbz', 'kandidat', 'latitude', 'longitude',
+                           'abstand_nachbar_m', 'grund') if s in auffaellig.columns]
+    auffaellig[spalten].to_csv(args.output, index=False, encoding='utf-8')
+
+    for grund, anzahl in auffaellig['grund'].str.split(', ').explode().value_counts().items():
+        logger.info(f"{grund}: {anzahl}")
+    logger.info(f"{len(auffaellig)} von {len(index.df)} Straßen auffällig, gespeichert als: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
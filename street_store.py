@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Spaltenbasierter Straßenspeicher
+Die Straßentabellen werden zusätzlich zur CSV als unkomprimierte Feather-Datei (Arrow IPC)
+abgelegt: WBZ, Kandidat, Kreistagkandidat und Farbe als Kategorien, Koordinaten als float32
+(relativ zu einem Bezugspunkt, damit keine Nachkommastelle verloren geht; bei weit verstreuten
+Punkten als float64).
+Beim Laden wird die Datei per Memory-Mapping gelesen, statt die CSV jedes Mal neu zu parsen.
+"""
+
+import os
+import json
+import time
+import argparse
+import logging
+from typing import Iterable
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow ist optional, ohne wird weiter die CSV gelesen
+    pa = feather = None
+
+# Logging konfigurieren
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Wenige verschiedene Werte, viele Wiederholungen: als Kategorie speichern
+KATEGORIE_SPALTEN = ('wbz', 'bezirk', 'kandidat', 'kreistagkandidat', 'farbe', 'city')
+KOORDINATEN_SPALTEN = ('latitude', 'longitude')
+
+# Koordinaten werden als float32-Abstand zu einem Bezugspunkt (Schema-Metadaten) gespeichert:
+# bei Abständen unter 1° genauer als 1e-7°, also verlustfrei für die 7 Stellen von Nominatim.
+# Liegt ein Punkt weiter weg (Fehltreffer anderswo, mehrere Gemeinden), bleibt die Spalte float64.
+KOORDINATEN_STELLEN = 7
+MAX_ABSTAND_FLOAT32 = 1.0
+BEZUG_SCHLUESSEL = b'koordinaten_bezug'
+
+STANDARD_TABELLEN = ('wahlbezirke_map.csv', 'wahlbezirke_complete.csv')
+
+
+def store_pfad(csv_pfad: str) -> str:
+    """Zugehörige Feather-Datei, z.B. wahlbezirke_map.csv -> wahlbezirke_map.feather"""
+    return f"{os.path.splitext(csv_pfad)[0]}.feather"
+
+
+def kategorien(df: pd.DataFrame) -> pd.DataFrame:
+    """Gruppenspalten als Kategorien"""
+    df = df.copy()
+    for spalte in KATEGORIE_SPALTEN:
+        if spalte in df.columns:
+            df[spalte] = df[spalte].astype('category')
+    return df
+
+
+def als_text(df: pd.DataFrame) -> pd.DataFrame:
+    """Kategorien zurück in Text, z.B. für Code, der neue Werte in die Spalten schreibt"""
+    df = df.copy()
+    for spalte in df.columns:
+        if isinstance(df[spalte].dtype, pd.CategoricalDtype):
+            df[spalte] = df[spalte].astype(df[spalte].cat.categories.dtype)
+    return df
+
+
+def schreibe_store(df: pd.DataFrame, pfad: str):
+    """Feather-Datei mit Kategorien und float32-Koordinaten relativ zum Bezugspunkt"""
+    df = kategorien(df).reset_index(drop=True)
+    bezug = {}
+    for spalte in KOORDINATEN_SPALTEN:
+        if spalte in df.columns and df[spalte].notna().any():
+            wert = round(float(df[spalte].median()), 1)
+            abstand = df[spalte] - wert
+            if abstand.abs().max() >= MAX_ABSTAND_FLOAT32:
+                logger.info(f"{spalte}: Punkte mehr als {MAX_ABSTAND_FLOAT32:g}° vom Median, "
+                            f"Spalte bleibt float64")
+                continue
+            bezug[spalte] = wert
+            df[spalte] = abstand.astype(np.float32)
+
+    tabelle = pa.Table.from_pandas(df, preserve_index=False)
+    metadaten = {**(tabelle.schema.metadata or {}), BEZUG_SCHLUESSEL: json.dumps(bezug).encode()}
+    # Unkomprimiert, damit die Datei beim Lesen direkt eingeblendet werden kann
+    feather.write_feather(tabelle.replace_schema_metadata(metadaten), pfad, compression='uncompressed')
+
+
+def lese_store(pfad: str) -> pd.DataFrame:
+    """Liest die Feather-Datei per Memory-Mapping und setzt die Koordinaten wieder zusammen"""
+    tabelle = feather.read_table(pfad, memory_map=True)
+    bezug = json.loads((tabelle.schema.metadata or {}).get(BEZUG_SCHLUESSEL, b'{}'))
+    df = tabelle.to_pandas()
+    for spalte, wert in bezug.items():
+        df[spalte] = (df[spalte].astype(np.float64) + wert).round(KOORDINATEN_STELLEN)
+    return df
+
+
+def schreibe_strassen(df: pd.DataFrame, csv_pfad: str):
+    """Schreibt die Tabelle als CSV (für Menschen und ältere Skripte) und als Feather-Datei"""
+    df.to_csv(csv_pfad, index=False, encoding='utf-8')
+    if feather is None:
+        logger.warning("pyarrow nicht installiert, nur CSV gespeichert")
+        return
+    schreibe_store(df, store_pfad(csv_pfad))
+
+
+def store_aktuell(csv_pfad: str) -> bool:
+    """Feather-Datei vorhanden und nicht älter als die CSV"""
+    pfad = store_pfad(csv_pfad)
+    if feather is None or not os.path.exists(pfad):
+        return False
+    return not os.path.exists(csv_pfad) or os.path.getmtime(pfad) >= os.path.getmtime(csv_pfad)
+
+
+def lade_strassen(csv_pfad: str, text: bool = False) -> pd.DataFrame:
+    """Lädt eine Straßentabelle, bevorzugt aus der Feather-Datei per Memory-Mapping
+
+    Ist die Feather-Datei älter als die CSV (z.B. nach Handbearbeitung), wird die CSV gelesen.
+    Mit text=True kommen die Gruppenspalten als Text statt als Kategorien zurück.
+    """
+    if store_aktuell(csv_pfad):
+        df = lese_store(store_pfad(csv_pfad))
+    else:
+        df = kategorien(pd.read_csv(csv_pfad))
+    return als_text(df) if text else df
+
+
+def konvertiere(csv_pfade: Iterable[str]):
+    """Legt für bestehende CSV-Dateien die Feather-Dateien an"""
+    for csv_pfad in csv_pfade:
+        if not os.path.exists(csv_pfad):
+            logger.warning(f"Nicht gefunden, übersprungen: {csv_pfad}")
+            continue
+        df = pd.read_csv(csv_pfad)
+        schreibe_store(df, store_pfad(csv_pfad))
+
+        start = time.perf_counter()
+        pd.read_csv(csv_pfad)
+        dauer_csv = time.perf_counter() - start
+        start = time.perf_counter()
+        lade_strassen(csv_pfad)
+        dauer_store = time.perf_counter() - start
+        logger.info(f"{csv_pfad} -> {store_pfad(csv_pfad)}: {len(df)} Zeilen, "
+                    f"{os.path.getsize(csv_pfad) / 1024:.0f} KB CSV / "
+                    f"{os.path.getsize(store_pfad(csv_pfad)) / 1024:.0f} KB Feather, "
+                    f"Laden {dauer_csv * 1000:.1f} ms / {dauer_store * 1000:.1f} ms")
+
+
+def main():
+    """Hauptfunktion"""
+    parser = argparse.ArgumentParser(description='Wandelt Straßen-CSVs in den spaltenbasierten Speicher um')
+    parser.add_argument('csv', nargs='*', default=list(STANDARD_TABELLEN), help='CSV-Dateien')
+    args = parser.parse_args()
+
+    if feather is None:
+        logger.error("pyarrow ist nicht installiert (pip install pyarrow)")
+        return
+    konvertiere(args.csv)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Aufteilung der Straßen eines Wahlbezirks auf mehrere Helferteams
+Ausgeglichenes k-Means: Straßen werden reihum dem nächsten Team-Mittelpunkt zugeordnet, solange
+dessen Kapazität (Anteil am Gesamtgewicht) nicht überschritten ist. Gewicht ist wahlweise die
+Anzahl der Straßen oder der geschätzte Anteil an den Wahlberechtigten.
+Ausgabe: eine CSV je Team (Straßen in Laufreihenfolge) und eine Karte mit einer Ebene je Team.
+"""
+
+import os
+import re
+import time
+import argparse
+import logging
+from typing import List, Optional
+import numpy as np
+import pandas as pd
+import folium
+from district_polygons import LokaleProjektion
+from geodesy import ohne_ersatzkoordinate
+from kartendaten import KartenDaten
+from map_output import save_map
+from route_optimizer import optimiere_route
+
+# Logging konfigurieren
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Gut unterscheidbare Farben für die Teams eines Bezirks
+TEAM_FARBEN = ['#1B9E77', '#D95F02', '#7570B3', '#E7298A', '#66A61E', '#E6AB02', '#A6761D', '#666666']
+
+MAX_ITERATIONEN = 50  # Obergrenze für Zuordnen/Mittelpunkt-Schritte je Versuch
+VERSUCHE = 8          # Unabhängige Startbelegungen, der beste Versuch gewinnt
+
+
+def strassen_gewichte(df: pd.DataFrame, gewicht: str = 'strassen') -> np.ndarray:
+    """Arbeitsaufwand je Straße: 1 pro Straße oder Wahlberechtigte des WBZ gleichmäßig verteilt"""
+    if gewicht == 'strassen':
+        return np.ones(len(df))
+    if gewicht == 'wahlberechtigte':
+        anzahl = df.groupby('wbz')['wbz'].transform('size')
+        return (df['wahlberechtigte'].fillna(0) / anzahl).to_numpy(dtype=float)
+    raise ValueError(f"Unbekanntes Gewicht: {gewicht}")
+
+
+def _startzentren(xy: np.ndarray, w: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    """k-means++: weitere Zentren bevorzugt weit weg von den bisherigen"""
+    zentren = [xy[rng.choice(len(xy), p=w / w.sum())]]
+    for _ in range(1, k):
+        d2 = ((xy[:, None, :] - np.array(zentren)[None, :, :]) ** 2).sum(axis=2).min(axis=1)
+        p = w * d2
+        zentren.append(xy[rng.choice(len(xy), p=p / p.sum())] if p.sum() > 0 else xy[rng.integers(len(xy))])
+    return np.array(zentren)
+
+
+def _zuordnen(d2: np.ndarray, w: np.ndarray, kapazitaet: float) -> np.ndarray:
+    """Zuordnung mit Kapazitätsgrenze; Straßen mit dem größten Nachteil bei zweiter Wahl zuerst"""
+    n, k = d2.shape
+    rang = np.sort(d2, axis=1)
+    reihenfolge = np.argsort(-(rang[:, 1] - rang[:, 0])) if k > 1 else np.arange(n)
+    wahl = np.argsort(d2, axis=1)
+    last = np.zeros(k)
+    team = np.empty(n, dtype=np.int64)
+    for i in reihenfolge:
+        frei = wahl[i][last[wahl[i]] + w[i] <= kapazitaet]
+        t = frei[0] if len(frei) else int(np.argmin(last))
+        team[i] = t
+        last[t] += w[i]
+    return team
+
+
+def _ausgleichen(xy: np.ndarray, w: np.ndarray, team: np.ndarray, zentren: np.ndarray) -> np.ndarray:
+    """Verschiebt Randstraßen vom schwersten zum leichtesten Team, solange die Spanne kleiner wird"""
+    k = len(zentren)
+    team = team.copy()
+    for _ in range(len(xy)):
+        last = np.bincount(team, w, k)
+        schwer, leicht = int(np.argmax(last)), int(np.argmin(last))
+        spanne = last[schwer] - last[leicht]
+        # Nur Straßen, deren Wechsel die Spanne verkleinert; die dem leichten Team nächste zuerst
+        kandidaten = np.flatnonzero((team == schwer) & (w < spanne))
+        if not len(kandidaten):
+            break
+        abstand = ((xy[kandidaten] - zentren[leicht]) ** 2).sum(axis=1)
+        team[kandidaten[np.argmin(abstand)]] = leicht
+    return team
+
+
+def balanciertes_kmeans(xy: np.ndarray, w: np.ndarray, k: int, toleranz: float = 0.1,
+                        seed: int = 0) -> np.ndarray:
+    """Teamnummer (0..k-1) je Punkt; kein Team bekommt mehr als (1 + toleranz) * Gesamt / k"""
+    n = len(xy)
+    if k <= 1 or n <= k:
+        return np.arange(n) % max(k, 1)
+    kapazitaet = max(w.sum() / k * (1.0 + toleranz), w.max())
+    rng = np.random.default_rng(seed)
+
+    beste_team, beste_kosten = None, np.inf
+    for _ in range(VERSUCHE):
+        zentren = _startzentren(xy, w, k, rng)
+        team = None
+        for _ in range(MAX_ITERATIONEN):
+            d2 = ((xy[:, None, :] - zentren[None, :, :]) ** 2).sum(axis=2)
+            neu = _zuordnen(d2, w, kapazitaet)
+            if team is not None and np.array_equal(neu, team):
+                break
+            team = neu
+            gewicht = np.bincount(team, w, k)
+            for achse in range(2):
+                summe = np.bincount(team, w * xy[:, achse], k)
+                zentren[:, achse] = np.where(gewicht > 0, summe / np.where(gewicht > 0, gewicht, 1),
+                                             zentren[:, achse])
+        team = _ausgleichen(xy, w, team, zentren)
+        d2 = ((xy[:, None, :] - zentren[None, :, :]) ** 2).sum(axis=2)
+        kosten = float((w * d2[np.arange(n), team]).sum())
+        if kosten < beste_kosten:
+            beste_team, beste_kosten = team, kosten
+    return beste_team
+
+
+def teile_gruppe(strassen: pd.DataFrame, anzahl_teams: int, gewicht: str = 'strassen',
+                 toleranz: float = 0.1, seed: int = 0) -> pd.DataFrame:
+    """Teilt die Straßen einer Gruppe auf Teams auf und sortiert jedes Team in Laufreihenfolge
+
+    Straßen ohne echte Koordinate werden zuletzt, die schwersten zuerst, dem jeweils am wenigsten
+    belasteten Team zugeschlagen und ohne Nummer angehängt.
+    """
+    strassen = strassen.assign(gewicht=strassen_gewichte(strassen, gewicht))
+    mit_lage = ohne_ersatzkoordinate(strassen)
+    ohne_lage = strassen.drop(mit_lage.index)
+
+    team = np.zeros(len(mit_lage), dtype=np.int64)
+    if len(mit_lage):
+        projektion = LokaleProjektion(mit_lage['latitude'].mean(), mit_lage['longitude'].mean())
+        xy = projektion.hin(mit_lage[['longitude', 'latitude']].to_numpy())
+        team = balanciertes_kmeans(xy, mit_lage['gewicht'].to_numpy(), anzahl_teams, toleranz, seed)
+
+    teams = []
+    last = np.bincount(team, mit_lage['gewicht'].to_numpy(), anzahl_teams)
+    for t in range(anzahl_teams):
+        teil = mit_lage[team == t]
+        reihenfolge = optimiere_route(teil['latitude'].to_numpy(), teil['longitude'].to_numpy())
+        teil = teil.iloc[reihenfolge].assign(team=t + 1, reihenfolge=np.arange(1, len(teil) + 1), hinweis='')
+        teams.append(teil)
+
+    # Schwerste Straßen zuerst, jeweils an das leichteste Team
+    ohne_lage = ohne_lage.sort_values('gewicht', ascending=False, kind='stable')
+    zusatz = []
+    for w in ohne_lage['gewicht']:
+        t = int(np.argmin(last))
+        last[t] += w
+        zusatz.append(t + 1)
+    if zusatz:
+        teams.append(ohne_lage.assign(team=zusatz, reihenfolge=pd.NA,
+                                      hinweis='Lage unbekannt (Ersatzkoordinate)'))
+
+    return pd.concat(teams).sort_values('team', kind='stable')
+
+
+def teile_alle(df: pd.DataFrame, anzahl_teams: int, gruppe: str = 'wbz', gewicht: str = 'strassen',
+               toleranz: float = 0.1, auswahl: Optional[List[str]] = None) -> pd.DataFrame:
+    """Teilt jede Gruppe (oder nur die ausgewählten) auf anzahl_teams Teams auf"""
+    if auswahl:
+        df = df[df[gruppe].isin(auswahl)]
+    ergebnisse = []
+    for name, strassen in df.groupby(gruppe, sort=True, observed=True):
+        start = time.perf_counter()
+        teams = teile_gruppe(strassen, anzahl_teams, gewicht, toleranz)
+        ergebnisse.append(teams)
+
+        last = teams.groupby('team')['gewicht'].sum()
+        logger.info(f"{name}: {len(teams)} Straßen auf {anzahl_teams} Teams, Last "
+                    f"{' / '.join(f'{x:.0f}' for x in last)}, {time.perf_counter() - start:.2f}s")
+    if not ergebnisse:
+        # Auswahl ohne Treffer: leere Tabelle mit den Spalten eines Ergebnisses
+        return df.iloc[:0].assign(gewicht=pd.Series(dtype=float), team=pd.Series(dtype=np.int64),
+                                  reihenfolge=pd.Series(dtype=object), hinweis=pd.Series(dtype=str))
+    return pd.concat(ergebnisse, ignore_index=True)
+
+
+def dateiname(*teile) -> str:
+    """Dateisystemtauglicher Name, z.B. 'WBZ_10_team_1'"""
+    return re.sub(r'[^0-9A-Za-zÄÖÜäöüß]+', '_', '_'.join(str(t) for t in teile)).strip('_')
+
+
+def speichere_team_listen(teams: pd.DataFrame, gruppe: str, ausgabe_dir: str) -> List[str]:
+    """Eine CSV je Gruppe und Team"""
+    os.makedirs(ausgabe_dir, exist_ok=True)
+    spalten = [gruppe, 'team', 'reihenfolge', 'street', 'original', 'wbz', 'kandidat', 'gewicht',
+               'hinweis', 'latitude', 'longitude']
+    spalten = list(dict.fromkeys(s for s in spalten if s in teams.columns))
+
+    dateien = []
+    for (name, team), liste in teams.groupby([gruppe, 'team'], sort=True, observed=True):
+        pfad = os.path.join(ausgabe_dir, f"{dateiname(name, 'team', team)}.csv")
+        liste[spalten].to_csv(pfad, index=False, encoding='utf-8')
+        dateien.append(pfad)
+    return dateien
+
+
+def add_team_layer(m, teams: pd.DataFrame, gruppe: str = 'wbz'):
+    """Eine Ebene je Gruppe und Team mit Laufweg und nummerierten Straßen"""
+    nummeriert = teams.dropna(subset=['reihenfolge'])
+    for (name, team), liste in nummeriert.groupby([gruppe, 'team'], sort=True, observed=True):
+        farbe = TEAM_FARBEN[(team - 1) % len(TEAM_FARBEN)]
+        ebene = folium.FeatureGroup(name=f"{name} – Team {team}", show=True)
+        folium.PolyLine(liste[['latitude', 'longitude']].to_numpy().tolist(),
+                        color=farbe, weight=2, opacity=0.6, dash_array='4').add_to(ebene)
+        for _, strasse in liste.iterrows():
+            folium.CircleMarker(
+                location=[strasse['latitude'], strasse['longitude']],
+                radius=6, color=farbe, fill=True, fillOpacity=0.9, weight=1,
+                tooltip=f"Team {team}, {int(strasse['reihenfolge'])}. {strasse['street']}"
+            ).add_to(ebene)
+        ebene.add_to(m)
+
+
+def main():
+    """Hauptfunktion"""
+    parser = argparse.ArgumentParser(description='Teilt die Straßen jedes Wahlbezirks auf Helferteams auf')
+    parser.add_argument('auswahl', nargs='*', help='Nur diese Gruppen, z.B. "WBZ 10" (Standard: alle)')
+    parser.add_argument('--teams', type=int, default=2, help='Anzahl der Teams je Gruppe')
+    parser.add_argument('--gruppe', choices=['wbz', 'kandidat', 'kreistagkandidat'], default='wbz',
+                        help='Welche Einheit aufgeteilt wird')
+    parser.add_argument('--gewicht', choices=['strassen', 'wahlberechtigte'], default='strassen',
+                        help='Aufwand je Straße: Anzahl Straßen oder Anteil an den Wahlberechtigten')
+    parser.add_argument('--toleranz', type=float, default=0.1,
+                        help='Erlaubte Mehrlast eines Teams über dem Durchschnitt (0.1 = 10%%)')
+    parser.add_argument('--ausgabe-dir', default='teams', help='Verzeichnis für die Team-Listen')
+    parser.add_argument('--karte', default='wahlbezirke_teams_map.html', help='Karte mit den Teams')
+    args = parser.parse_args()
+
+    if args.teams < 1:
+        parser.error('--teams muss mindestens 1 sein')
+
+    df = KartenDaten().tabelle('complete')
+    teams = teile_alle(df, args.teams, args.gruppe, args.gewicht, args.toleranz, args.auswahl)
+    if teams.empty:
+        logger.error(f"Keine Straßen für die Auswahl gefunden: {', '.join(args.auswahl)}")
+        return
+
+    dateien = speichere_team_listen(teams, args.gruppe, args.ausgabe_dir)
+    print(f"✓ {len(dateien)} Team-Listen gespeichert in: {args.ausgabe_dir}/")
+
+    mit_lage = ohne_ersatzkoordinate(teams)
+    m = folium.Map(location=[mit_lage['latitude'].mean(), mit_lage['longitude'].mean()], zoom_start=13)
+    add_team_layer(m, teams, args.gruppe)
+    folium.LayerControl().add_to(m)
+    save_map(m, args.karte)
+    print(f"✓ Teamkarte erstellt: {args.karte}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Vektor-Kacheln für Straßen und Wahlbezirke
+Zerlegt wahlbezirke_complete.csv oder wahlbezirke_map.geojson in gekachelte GeoJSON-Dateien
+({z}/{x}/{y}.geojson) mit Vereinfachung pro Zoomstufe. Die Karte lädt nur die sichtbaren Kacheln.
+"""
+
+import os
+import json
+import math
+import argparse
+import logging
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+import folium
+from branca.element import MacroElement
+from jinja2 import Template
+from map_output import save_map
+from lazy_popups import get_popup_daten, POPUP_TEMPLATES
+from street_store import lade_strassen
+
+# Logging konfigurieren
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+KACHEL_GROESSE = 256  # Pixel pro Kachel (Web-Mercator)
+
+# Eigenschaften, die in die Kachel-Features übernommen werden
+EIGENSCHAFTEN = (
+    'street', 'original', 'postal_code', 'city', 'wbz', 'bezirk', 'kandidat',
+    'wahlberechtigte', 'farbe', 'kreistagkandidat'
+)
+
+
+def load_punkte(input_file: str) -> pd.DataFrame:
+    """Lädt Straßenpunkte aus CSV oder GeoJSON in ein DataFrame"""
+    if input_file.endswith('.geojson') or input_file.endswith('.json'):
+        with open(input_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        zeilen = []
+        for feature in data['features']:
+            lon, lat = feature['geometry']['coordinates'][:2]
+            zeile = dict(feature.get('properties') or {})
+            zeile['latitude'] = lat
+            zeile['longitude'] = lon
+            zeilen.append(zeile)
+        return pd.DataFrame(zeilen)
+    return lade_strassen(input_file)
+
+
+def pixel_koordinaten(lat: np.ndarray, lon: np.ndarray, zoom: int):
+    """Rechnet WGS84 in globale Web-Mercator-Pixel der Zoomstufe um"""
+    welt = KACHEL_GROESSE * (2 ** zoom)
+    lat_rad = np.radians(np.clip(lat, -85.05112878, 85.05112878))
+    px = (lon + 180.0) / 360.0 * welt
+    py = (1.0 - np.log(np.tan(lat_rad) + 1.0 / np.cos(lat_rad)) / math.pi) / 2.0 * welt
+    return px, py
+
+
+def koordinaten_stellen(zoom: int) -> int:
+    """Nachkommastellen, die bei dieser Zoomstufe noch unter einem Pixel liegen"""
+    grad_pro_pixel = 360.0 / (KACHEL_GROESSE * (2 ** zoom))
+    return max(0, math.ceil(-math.log10(grad_pro_pixel)))
+
+
+def vereinfache(df: pd.DataFrame, zoom: int, max_zoom: int, raster_px: int) -> pd.DataFrame:
+    """Fasst unterhalb von max_zoom Punkte im selben Pixelraster zu einem Feature zusammen"""
+    px, py = pixel_koordinaten(df['latitude'].to_numpy(), df['longitude'].to_numpy(), zoom)
+    df = df.assign(_px=px, _py=py,
+                   _tx=(px // KACHEL_GROESSE).astype(np.int64),
+                   _ty=(py // KACHEL_GROESSE).astype(np.int64))
+
+    if zoom >= max_zoom:
+        return df.assign(anzahl=1)
+
+    df = df.assign(_zelle_x=(px // raster_px).astype(np.int64), _zelle_y=(py // raster_px).astype(np.int64))
+    gruppen = df.groupby(['_zelle_x', '_zelle_y'], sort=False)
+    # Repräsentant ist die ganze erste Zeile der Zelle (nicht je Spalte der erste Wert, sonst
+    # mischen sich Eigenschaften verschiedener Straßen), Position ist der Zellenschwerpunkt
+    vereinfacht = df.drop_duplicates(['_zelle_x', '_zelle_y']).set_index(['_zelle_x', '_zelle_y'])
+    vereinfacht['latitude'] = gruppen['latitude'].mean()
+    vereinfacht['longitude'] = gruppen['longitude'].mean()
+    vereinfacht['anzahl'] = gruppen.size()
+    return vereinfacht.reset_index(drop=True)
+
+
+def build_feature(zeile: Dict, eigenschaften: List[str], stellen: int) -> Dict:
+    """Baut ein kompaktes GeoJSON-Point-Feature"""
+    properties = {name: zeile[name] for name in eigenschaften}
+    properties['anzahl'] = int(zeile['anzahl'])
+    return {
+        "type": "Feature",
+        "geometry": {
+            "type": "Point",
+            "coordinates": [round(float(zeile['longitude']), stellen), round(float(zeile['latitude']), stellen)]
+        },
+        "properties": properties
+    }
+
+
+def entferne_alte_kacheln(output_dir: str):
+    """Entfernt die Kacheln eines früheren Exports, laut dessen metadata.json
+
+    Gelöscht werden nur {z}/{x}/{y}.geojson der dort eingetragenen Zoomstufen und danach leere
+    Verzeichnisse; ein Verzeichnis ohne metadata.json wird nicht angerührt.
+    """
+    pfad = os.path.join(output_dir, 'metadata.json')
+    if not os.path.exists(pfad):
+        if os.path.isdir(output_dir) and os.listdir(output_dir):
+            logger.warning(f"{output_dir} enthält keinen früheren Kachel-Export, alte Dateien bleiben")
+        return
+    with open(pfad, 'r', encoding='utf-8') as f:
+        alt = json.load(f)
+    for zoom in range(alt['minzoom'], alt['maxzoom'] + 1):
+        zoom_dir = os.path.join(output_dir, str(zoom))
+        if not os.path.isdir(zoom_dir):
+            continue
+        for x_dir, _, dateien in os.walk(zoom_dir, topdown=False):
+            for datei in dateien:
+                if datei.endswith('.geojson'):
+                    os.remove(os.path.join(x_dir, datei))
+            if not os.listdir(x_dir):
+                os.rmdir(x_dir)
+    os.remove(pfad)
+
+
+def export_tiles(df: pd.DataFrame, output_dir: str = 'tiles', min_zoom: int = 10,
+                 max_zoom: int = 16, raster_px: int = 16) -> Dict:
+    """Schreibt gekachelte GeoJSON-Dateien und metadata.json, gibt die Metadaten zurück"""
+    df = df.dropna(subset=['latitude', 'longitude'])
+    eigenschaften = [name for name in EIGENSCHAFTEN if name in df.columns]
+    # NaN ist kein gültiges JSON
+    df = df.astype({name: object for name in eigenschaften}).where(df.notna(), None)
+
+    entferne_alte_kacheln(output_dir)
+
+    anzahl_kacheln = {}
+    for zoom in range(min_zoom, max_zoom + 1):
+        stellen = koordinaten_stellen(zoom)
+        vereinfacht = vereinfache(df, zoom, max_zoom, raster_px)
+        # Kacheln erneut aus dem Schwerpunkt bestimmen, er kann in eine Nachbarkachel fallen
+        px, py = pixel_koordinaten(vereinfacht['latitude'].to_numpy(), vereinfacht['longitude'].to_numpy(), zoom)
+        vereinfacht['_tx'] = (px // KACHEL_GROESSE).astype(np.int64)
+        vereinfacht['_ty'] = (py // KACHEL_GROESSE).astype(np.int64)
+
+        anzahl_kacheln[zoom] = 0
+        for (tx, ty), kachel in vereinfacht.groupby(['_tx', '_ty']):
+            features = [build_feature(zeile, eigenschaften, stellen)
+                        for zeile in kachel.to_dict('records')]
+            kachel_dir = os.path.join(output_dir, str(zoom), str(tx))
+            os.makedirs(kachel_dir, exist_ok=True)
+            with open(os.path.join(kachel_dir, f"{ty}.geojson"), 'w', encoding='utf-8') as f:
+                json.dump({"type": "FeatureCollection", "features": features}, f,
+                          ensure_ascii=False, separators=(',', ':'))
+            anzahl_kacheln[zoom] += 1
+
+        logger.info(f"Zoom {zoom}: {len(vereinfacht)} Features in {anzahl_kacheln[zoom]} Kacheln")
+
+    metadata = {
+        "format": "geojson",
+        "minzoom": min_zoom,
+        "maxzoom": max_zoom,
+        "bounds": [float(df['longitude'].min()), float(df['latitude'].min()),
+                   float(df['longitude'].max()), float(df['latitude'].max())],
+        "center": [float(df['longitude'].mean()), float(df['latitude'].mean())],
+        "properties": eigenschaften + ['anzahl'],
+        "tiles": "{z}/{x}/{y}.geojson",
+        "anzahl_kacheln": anzahl_kacheln
+    }
+    with open(os.path.join(output_dir, 'metadata.json'), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+    logger.info(f"Kacheln gespeichert in: {output_dir}")
+    return metadata
+
+
+class TiledGeoJsonLayer(MacroElement):
+    """Leaflet-Layer, der nur die GeoJSON-Kacheln im sichtbaren Ausschnitt nachlädt"""
+
+    _template = Template("""
+{% macro script(this, kwargs) %}
+(function() {
+    var karte = {{ this._parent.get_name() }};
+    var basisUrl = {{ this.url|tojson }};
+    var minZoom = {{ this.min_zoom }}, maxZoom = {{ this.max_zoom }};
+    var grenzen = {{ this.bounds|tojson }};  // [West, Süd, Ost, Nord] laut metadata.json
+    var gruppe = L.featureGroup().addTo(karte);
+    var kacheln = {};
+
+    function lon2tile(lon, z) { return Math.floor((lon + 180) / 360 * Math.pow(2, z)); }
+    function lat2tile(lat, z) {
+        var r = lat * Math.PI / 180;
+        return Math.floor((1 - Math.log(Math.tan(r) + 1 / Math.cos(r)) / Math.PI) / 2 * Math.pow(2, z));
+    }
+    function punkt(feature, latlng) {
+        var p = feature.properties;
+        var marker = L.circleMarker(latlng, {
+            radius: 6 + Math.min(6, Math.log2(p.anzahl || 1) * 2),
+            color: p.farbe || '#3388ff', fillColor: p.farbe || '#3388ff',
+            fill: true, fillOpacity: 0.7, weight: 2
+        });
+        marker.bindPopup(function() {
+            var html = wahlkarteRender({{ this.popup|tojson }}, p);
+            return p.anzahl > 1 ? html + '<br><i>+' + (p.anzahl - 1) + ' weitere Straßen</i>' : html;
+        }, {maxWidth: 300});
+        return marker;
+    }
+    function lade(schluessel) {
+        var layer = L.layerGroup();
+        kacheln[schluessel] = layer;
+        fetch(basisUrl + schluessel + '.geojson')
+            .then(function(r) { return r.ok ? r.json() : null; })
+            .then(function(daten) { if (daten) L.geoJSON(daten, {pointToLayer: punkt}).addTo(layer); })
+            .catch(function() {});
+        return layer;
+    }
+    function aktualisiere() {
+        // Unterhalb von minzoom gibt es keine Kacheln: Ebene ausblenden statt alles anzufragen
+        var z = Math.round(karte.getZoom());
+        if (z < minZoom) {
+            gruppe.clearLayers();
+            return;
+        }
+        z = Math.min(maxZoom, z);
+        // Sichtbarer Ausschnitt, beschnitten auf die Ausdehnung des Kachelsatzes
+        var b = karte.getBounds();
+        var x0 = Math.max(lon2tile(b.getWest(), z), lon2tile(grenzen[0], z));
+        var x1 = Math.min(lon2tile(b.getEast(), z), lon2tile(grenzen[2], z));
+        var y0 = Math.max(lat2tile(b.getNorth(), z), lat2tile(grenzen[3], z));
+        var y1 = Math.min(lat2tile(b.getSouth(), z), lat2tile(grenzen[1], z));
+        var sichtbar = {};
+        for (var x = x0; x <= x1; x++) {
+            for (var y = y0; y <= y1; y++) {
+                var schluessel = z + '/' + x + '/' + y;
+                sichtbar[schluessel] = true;
+                var layer = kacheln[schluessel] || lade(schluessel);
+                if (!gruppe.hasLayer(layer)) gruppe.addLayer(layer);
+            }
+        }
+        for (var s in kacheln) {
+            if (!sichtbar[s] && gruppe.hasLayer(kacheln[s])) gruppe.removeLayer(kacheln[s]);
+        }
+    }
+    karte.on('moveend', aktualisiere);
+    karte.whenReady(aktualisiere);
+})();
+{% endmacro %}
+""")
+
+    def __init__(self, url: str, min_zoom: int, max_zoom: int, bounds: List[float], popup: str = 'basis'):
+        super().__init__()
+        self._name = 'TiledGeoJsonLayer'
+        self.url = url if url.endswith('/') else url + '/'
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.bounds = bounds
+        self.popup = popup
+
+
+def create_tile_map(metadata: Dict, tile_url: str = 'tiles/', output_file: str = 'wahlbezirke_tiles_map.html'):
+    """Erstellt eine Karte, die ihre Straßenpunkte aus den Kacheln lädt"""
+    lon, lat = metadata['center']
+    m = folium.Map(location=[lat, lon], zoom_start=13, prefer_canvas=True)
+
+    # Popup-Vorlage und Render-Funktion aus dem Lazy-Popup-Modus wiederverwenden
+    get_popup_daten(m).templates['basis'] = POPUP_TEMPLATES['basis']
+    m.add_child(TiledGeoJsonLayer(tile_url, metadata['minzoom'], metadata['maxzoom'], metadata['bounds']))
+
+    save_map(m, output_file)
+    logger.info(f"Kachel-Karte gespeichert als: {output_file}")
+
+
+def serve_tiles(verzeichnis: str = '.', port: int = 8000):
+    """Lokaler Ersatz für einen statischen Dateiserver (fetch funktioniert nicht über file://)"""
+    handler = partial(SimpleHTTPRequestHandler, directory=verzeichnis)
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    logger.info(f"Liefere {os.path.abspath(verzeichnis)} aus unter http://127.0.0.1:{port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv: Optional[List[str]] = None):
+    """Hauptfunktion"""
+    parser = argparse.ArgumentParser(description="Exportiert Straßenpunkte als GeoJSON-Vektorkacheln")
+    parser.add_argument('input', nargs='?', default='wahlbezirke_complete.csv',
+                        help="wahlbezirke_complete.csv oder wahlbezirke_map.geojson")
+    parser.add_argument('--output-dir', default='tiles')
+    parser.add_argument('--min-zoom', type=int, default=10)
+    parser.add_argument('--max-zoom', type=int, default=16)
+    parser.add_argument('--raster', type=int, default=16, help="Rastergröße der Vereinfachung in Pixeln")
+    parser.add_argument('--karte', default='wahlbezirke_tiles_map.html', help="Karten-HTML, leer für keine Karte")
+    parser.add_argument('--serve', type=int, metavar='PORT', help="Anschließend lokal ausliefern")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.input):
+        logger.error(f"Eingabedatei nicht gefunden: {args.input}")
+        return
+
+    df = load_punkte(args.input)
+    metadata = export_tiles(df, args.output_dir, args.min_zoom, args.max_zoom, args.raster)
+
+    if args.karte:
+        tile_url = os.path.relpath(args.output_dir, os.path.dirname(os.path.abspath(args.karte))) + '/'
+        create_tile_map(metadata, tile_url, args.karte)
+
+    if args.serve:
+        serve_tiles(os.path.dirname(os.path.abspath(args.karte or args.output_dir)), args.serve)
+
+
+if __name__ == "__main__":
+    main()
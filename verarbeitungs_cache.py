@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Gemeinsamer Cache für OCR und Geocoding
+Eine SQLite-Datei, die mehrere Prozesse gleichzeitig nutzen können (Stapelverarbeitung vieler
+Gemeinden). OCR-Texte werden über den Inhalt der PDF-Datei und die OCR-Einstellungen
+wiedergefunden, Geocoding-Ergebnisse über den Anfragetext, auch erfolglose Anfragen.
+Zusätzlich hält die Datei den Zeitpunkt der letzten Nominatim-Anfrage, damit alle Prozesse
+zusammen höchstens eine Anfrage pro Sekunde stellen.
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+from collections import namedtuple
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_PFAD = '.cache/verarbeitung.sqlite'
+GEOCODER_ABSTAND = 1.0  # Sekunden zwischen zwei Nominatim-Anfragen (Nutzungsbedingungen)
+
+# Ergebnis einer Anfrage aus dem Cache, mit denselben Attributen wie geopy.Location
+Ort = namedtuple('Ort', ['latitude', 'longitude'])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ocr (schluessel TEXT PRIMARY KEY, text TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS geocode (anfrage TEXT PRIMARY KEY, latitude REAL, longitude REAL);
+CREATE TABLE IF NOT EXISTS drossel (name TEXT PRIMARY KEY, zeit REAL NOT NULL);
+"""
+
+
+def datei_hash(pfad: str) -> str:
+    """SHA-256 des Dateiinhalts (gleiche PDF unter anderem Namen trifft denselben Eintrag)"""
+    h = hashlib.sha256()
+    with open(pfad, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class VerarbeitungsCache:
+    """OCR- und Geocoding-Cache in einer SQLite-Datei, sicher für mehrere Prozesse"""
+
+    def __init__(self, pfad: str = CACHE_PFAD):
+        self.pfad = pfad
+        os.makedirs(os.path.dirname(pfad) or '.', exist_ok=True)
+        self._verbindung = None
+        self._db().executescript(SCHEMA)
+
+    def _db(self) -> sqlite3.Connection:
+        # Verbindung erst im jeweiligen Prozess öffnen (Objekt wird an Worker übergeben)
+        if self._verbindung is None:
+            self._verbindung = sqlite3.connect(self.pfad, timeout=60, isolation_level=None)
+            self._verbindung.execute('PRAGMA journal_mode=WAL')
+        return self._verbindung
+
+    def __getstate__(self):
+        return {'pfad': self.pfad, '_verbindung': None}
+
+    def ocr_text(self, pdf_path: str, einstellungen: str, erzeuge: Callable[[], str]) -> str:
+        """OCR-Text aus dem Cache oder über erzeuge() neu erkannt und gespeichert"""
+        schluessel = f"{datei_hash(pdf_path)}:{einstellungen}"
+        zeile = self._db().execute('SELECT text FROM ocr WHERE schluessel = ?', (schluessel,)).fetchone()
+        if zeile:
+            logger.info(f"OCR aus Cache: {pdf_path}")
+            return zeile[0]
+        text = erzeuge()
+        self._db().execute('INSERT OR REPLACE INTO ocr VALUES (?, ?)', (schluessel, text))
+        return text
+
+    def geocode(self, anfrage: str, erzeuge: Callable[[str], Optional[object]]) -> Optional[Ort]:
+        """Koordinaten aus dem Cache oder über erzeuge(anfrage); None wird auch gespeichert"""
+        zeile = self._db().execute('SELECT latitude, longitude FROM geocode WHERE anfrage = ?',
+                                   (anfrage,)).fetchone()
+        if zeile:
+            return Ort(*zeile) if zeile[0] is not None else None
+        location = erzeuge(anfrage)
+        ort = Ort(location.latitude, location.longitude) if location else None
+        self._db().execute('INSERT OR REPLACE INTO geocode VALUES (?, ?, ?)',
+                           (anfrage, ort.latitude if ort else None, ort.longitude if ort else None))
+        return ort
+
+    def warte(self, name: str, abstand: float):
+        """Blockiert, bis seit dem letzten Aufruf (in irgendeinem Prozess) abstand Sekunden vergangen sind"""
+        db = self._db()
+        while True:
+            db.execute('BEGIN IMMEDIATE')
+            zeile = db.execute('SELECT zeit FROM drossel WHERE name = ?', (name,)).fetchone()
+            jetzt = time.time()
+            rest = (zeile[0] + abstand - jetzt) if zeile else 0.0
+            if rest <= 0:
+                db.execute('INSERT OR REPLACE INTO drossel VALUES (?, ?)', (name, jetzt))
+                db.execute('COMMIT')
+                return
+            db.execute('COMMIT')
+            time.sleep(rest)
+
+
+class GecachterGeocoder:
+    """Nominatim mit Mindestabstand zwischen Anfragen und optionalem Cache
+
+    Ersetzt den geopy-Geocoder in den Konvertern (gleiche geocode()-Schnittstelle). Treffer aus
+    dem Cache kosten keine Wartezeit.
+    """
+
+    def __init__(self, geocoder, cache: Optional[VerarbeitungsCache] = None,
+                 abstand: float = GEOCODER_ABSTAND):
+        self.geocoder = geocoder
+        self.cache = cache
+        self.abstand = abstand
+        self._letzte = 0.0
+
+    def _anfrage(self, anfrage: str):
+        if self.cache is not None:
+            self.cache.warte('nominatim', self.abstand)
+        else:
+            rest = self._letzte + self.abstand - time.monotonic()
+            if rest > 0:
+                time.sleep(rest)
+            self._letzte = time.monotonic()
+        return self.geocoder.geocode(anfrage)
+
+    def geocode(self, anfrage: str):
+        if self.cache is None:
+            return self._anfrage(anfrage)
+        return self.cache.geocode(anfrage, self._anfrage)
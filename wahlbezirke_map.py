@@ -7,39 +7,51 @@ Korrekte Zuordnung der 16 CDU-Kandidaten zu ihren Wahlbezirken
 import os
 import re
 import json
-import time
+import argparse
 from typing import List, Dict, Tuple, Optional
-import pytesseract
-from pdf2image import convert_from_path
-from PIL import Image
-import pandas as pd
-import folium
-from folium.plugins import MarkerCluster
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut, GeocoderServiceError
 import logging
+from verarbeitungs_cache import GecachterGeocoder, VerarbeitungsCache
+from konfiguration import konfiguration
+
+# pandas, folium, geopy und die OCR werden erst in den Schritten importiert, die sie brauchen
+# (Startzeit der Kommandozeile, siehe wahlkarte.py)
 
 # Logging konfigurieren
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Farbpalette für 16 Wahlbezirke
-COLORS = [
-    '#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A', '#98D8C8',
-    '#6C5CE7', '#A8E6CF', '#FF8B94', '#C7CEEA', '#FFDAB9',
-    '#E8B4B8', '#95E1D3', '#F38181', '#AA96DA', '#FCBAD3',
-    '#FFD93D'  # 16. Farbe
-]
+STANDARD_PDF = "/Users/marcelgaertner/Desktop/Arbeit/Markus schmitz/marcus-call-agent/Nümbrecht straßengenau.pdf"
+STANDARD_ZUORDNUNG = "/Users/marcelgaertner/Desktop/Arbeit/Markus schmitz/marcus-call-agent/wahlbezirke_zuordnung.json"
+
+# Properties je Straße im GeoJSON-Export
+GEOJSON_EIGENSCHAFTEN = ['street', 'original', 'postal_code', 'city', 'full_address',
+                         'wbz', 'bezirk', 'kandidat', 'wahlberechtigte', 'farbe']
+
+# Farbpalette für die Wahlbezirke (konfiguration.json)
+COLORS = konfiguration().wahlbezirk_farben
 
 class WahlbezirkeMapConverter:
-    def __init__(self, strassen_pdf: str, zuordnung_json: str):
+    def __init__(self, strassen_pdf: str, zuordnung_json: str, plz: Optional[str] = None, ort: Optional[str] = None,
+                 cache: Optional[VerarbeitungsCache] = None):
         self.strassen_pdf = strassen_pdf
         self.zuordnung_json = zuordnung_json
-        self.geocoder = Nominatim(user_agent="wahlbezirke_map_converter")
+        # Ohne Angabe die Gemeinde aus der Konfiguration
+        self.plz = konfiguration().plz if plz is None else plz
+        self.ort = ort or konfiguration().gemeinde
+        self.cache = cache
+        self._geocoder = None
         self.strassen = []
         self.wahlbezirke = {}
         self.strassen_mit_bezirk = []
         
+    @property
+    def geocoder(self) -> GecachterGeocoder:
+        # Mindestabstand zwischen Nominatim-Anfragen, Treffer aus dem Cache ohne Wartezeit
+        if self._geocoder is None:
+            from geopy.geocoders import Nominatim
+            self._geocoder = GecachterGeocoder(Nominatim(user_agent="wahlbezirke_map_converter"), self.cache)
+        return self._geocoder
+
     def load_wahlbezirke_zuordnung(self):
         """Lädt die Wahlbezirk-Zuordnung aus JSON"""
         logger.info(f"Lade Wahlbezirk-Zuordnung aus: {self.zuordnung_json}")
@@ -54,24 +66,14 @@ class WahlbezirkeMapConverter:
             
         logger.info(f"Geladen: {len(self.wahlbezirke)} Wahlbezirke")
     
+    def adresse(self, strasse: str) -> str:
+        """Suchadresse für das Geocoding, z.B. 'Poststraße, 51588 Nümbrecht'"""
+        return f"{strasse}, {self.plz} {self.ort}" if self.plz else f"{strasse}, {self.ort}"
+    
     def extract_text_from_pdf(self, pdf_path: str) -> str:
-        """Extrahiert Text aus PDF mittels OCR"""
-        logger.info(f"Starte PDF-Extraktion: {pdf_path}")
-        
-        try:
-            pages = convert_from_path(pdf_path, dpi=300)
-            
-            full_text = ""
-            for i, page in enumerate(pages):
-                logger.info(f"Verarbeite Seite {i+1}/{len(pages)}")
-                text = pytesseract.image_to_string(page, lang='deu')
-                full_text += text + "\n"
-            
-            return full_text
-            
-        except Exception as e:
-            logger.error(f"Fehler bei PDF-Extraktion: {e}")
-            raise
+        """Extrahiert Text aus PDF mittels OCR (eine Tesseract-Engine für alle Seiten)"""
+        from ocr_engine import pdf_text
+        return pdf_text(pdf_path, cache=self.cache)
     
     def extract_strassen(self, text: str) -> List[Dict[str, str]]:
         """Extrahiert Straßen aus dem Text"""
@@ -94,9 +96,9 @@ class WahlbezirkeMapConverter:
                             'street': clean_strasse,
                             'original': strasse,
                             'house_number': '',
-                            'postal_code': '51588',
-                            'city': 'Nümbrecht',
-                            'full_address': f"{clean_strasse}, 51588 Nümbrecht",
+                            'postal_code': self.plz,
+                            'city': self.ort,
+                            'full_address': self.adresse(clean_strasse),
                             'wbz': wbz_key
                         })
         
@@ -109,9 +111,9 @@ class WahlbezirkeMapConverter:
                     'street': street,
                     'original': street,
                     'house_number': '',
-                    'postal_code': '51588',
-                    'city': 'Nümbrecht',
-                    'full_address': f"{street}, 51588 Nümbrecht",
+                    'postal_code': self.plz,
+                    'city': self.ort,
+                    'full_address': self.adresse(street),
                     'wbz': None  # Wird später zugeordnet
                 })
         
@@ -157,9 +159,8 @@ class WahlbezirkeMapConverter:
     
     def geocode_address(self, address: Dict[str, str]) -> Optional[Tuple[float, float]]:
         """Geocodiert eine Adresse zu Koordinaten"""
+        from geopy.exc import GeocoderTimedOut, GeocoderServiceError
         try:
-            time.sleep(1)  # Rate limiting
-            
             location = self.geocoder.geocode(address['full_address'])
             
             if not location and address['street']:
@@ -199,6 +200,11 @@ class WahlbezirkeMapConverter:
     
     def create_wahlbezirke_map(self, output_file: str = "wahlbezirke_map.html"):
         """Erstellt eine interaktive Karte mit den 16 Wahlbezirken"""
+        import pandas as pd
+        import folium
+        from map_output import save_map
+        from lazy_popups import lazy_popups_aktiv, add_lazy_markers
+
         if not self.strassen_mit_bezirk:
             logger.error("Keine geocodierten Straßen vorhanden!")
             return
@@ -219,30 +225,37 @@ class WahlbezirkeMapConverter:
             bezirk_groups[wbz_key] = folium.FeatureGroup(name=group_name)
         
         # Marker für jede Straße
-        for strasse in self.strassen_mit_bezirk:
-            popup_text = f"""
-            <b>{strasse['street']}</b><br>
-            {strasse['original']}<br>
-            {strasse['postal_code']} {strasse['city']}<br>
-            <hr>
-            <b>Wahlbezirk:</b> {strasse['bezirk']}<br>
-            <b>CDU-Kandidat/in:</b> {strasse['kandidat']}<br>
-            <b>Wahlberechtigte im Bezirk:</b> {strasse['wahlberechtigte']}<br>
-            <small>Lat: {strasse['latitude']:.6f}, Lon: {strasse['longitude']:.6f}</small>
-            """
+        if lazy_popups_aktiv():
+            df = pd.DataFrame(self.strassen_mit_bezirk)
+            for wbz_key, gruppe in df.groupby('wbz'):
+                add_lazy_markers(m, bezirk_groups.get(wbz_key, m), gruppe, popup='basis', tooltip='tooltip_kandidat',
+                                 stil={'radius': 8, 'fill': True, 'fillOpacity': 0.7, 'weight': 2},
+                                 dynamischer_stil={'color': 'farbe', 'fillColor': 'farbe'})
+        else:
+            for strasse in self.strassen_mit_bezirk:
+                popup_text = f"""
+                <b>{strasse['street']}</b><br>
+                {strasse['original']}<br>
+                {strasse['postal_code']} {strasse['city']}<br>
+                <hr>
+                <b>Wahlbezirk:</b> {strasse['bezirk']}<br>
+                <b>CDU-Kandidat/in:</b> {strasse['kandidat']}<br>
+                <b>Wahlberechtigte im Bezirk:</b> {strasse['wahlberechtigte']}<br>
+                <small>Lat: {strasse['latitude']:.6f}, Lon: {strasse['longitude']:.6f}</small>
+                """
             
-            # Farbiger Marker
-            folium.CircleMarker(
-                location=[strasse['latitude'], strasse['longitude']],
-                radius=8,
-                popup=folium.Popup(popup_text, max_width=300),
-                tooltip=f"{strasse['street']} ({strasse['kandidat']})",
-                color=strasse['farbe'],
-                fill=True,
-                fillColor=strasse['farbe'],
-                fillOpacity=0.7,
-                weight=2
-            ).add_to(bezirk_groups.get(strasse['wbz'], m))
+                # Farbiger Marker
+                folium.CircleMarker(
+                    location=[strasse['latitude'], strasse['longitude']],
+                    radius=8,
+                    popup=folium.Popup(popup_text, max_width=300),
+                    tooltip=f"{strasse['street']} ({strasse['kandidat']})",
+                    color=strasse['farbe'],
+                    fill=True,
+                    fillColor=strasse['farbe'],
+                    fillOpacity=0.7,
+                    weight=2
+                ).add_to(bezirk_groups.get(strasse['wbz'], m))
         
         # Feature Groups zur Karte hinzufügen
         for group in bezirk_groups.values():
@@ -252,7 +265,7 @@ class WahlbezirkeMapConverter:
         folium.LayerControl(collapsed=False).add_to(m)
         
         # Legende hinzufügen
-        legend_html = '''
+        legend_html = f'''
         <div style="position: fixed; 
                     bottom: 50px; right: 50px; width: 350px; height: 500px; 
                     background-color: white; z-index: 1000; 
@@ -260,7 +273,7 @@ class WahlbezirkeMapConverter:
                     padding: 10px; font-size: 12px;
                     overflow-y: auto;">
         <p style="margin: 0; font-weight: bold; text-align: center; font-size: 14px;">
-            CDU Wahlbezirke Nümbrecht 2024
+            CDU Wahlbezirke {self.ort} 2024
         </p>
         <hr style="margin: 5px 0;">
         <table style="width: 100%; font-size: 11px;">
@@ -289,7 +302,7 @@ class WahlbezirkeMapConverter:
         m.get_root().html.add_child(folium.Element(legend_html))
         
         # Karte speichern
-        m.save(output_file)
+        save_map(m, output_file)
         logger.info(f"Karte gespeichert als: {output_file}")
         
         # GeoJSON speichern
@@ -299,50 +312,26 @@ class WahlbezirkeMapConverter:
         self.save_as_csv(output_file.replace('.html', '.csv'))
     
     def save_as_geojson(self, output_file: str):
-        """Speichert die Daten als GeoJSON"""
-        features = []
-        
-        for strasse in self.strassen_mit_bezirk:
-            feature = {
-                "type": "Feature",
-                "geometry": {
-                    "type": "Point",
-                    "coordinates": [strasse['longitude'], strasse['latitude']]
-                },
-                "properties": {
-                    "street": strasse['street'],
-                    "original": strasse['original'],
-                    "postal_code": strasse['postal_code'],
-                    "city": strasse['city'],
-                    "full_address": strasse['full_address'],
-                    "wbz": strasse['wbz'],
-                    "bezirk": strasse['bezirk'],
-                    "kandidat": strasse['kandidat'],
-                    "wahlberechtigte": strasse['wahlberechtigte'],
-                    "farbe": strasse['farbe']
-                }
-            }
-            features.append(feature)
-        
-        geojson = {
-            "type": "FeatureCollection",
-            "features": features
-        }
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(geojson, f, ensure_ascii=False, indent=2)
+        """Speichert die Daten als GeoJSON (Format siehe geojson_writer)"""
+        from geojson_writer import schreibe_punkte, geojson_optionen
+        schreibe_punkte(output_file, self.strassen_mit_bezirk, GEOJSON_EIGENSCHAFTEN, **geojson_optionen())
         
         logger.info(f"GeoJSON gespeichert als: {output_file}")
     
     def save_as_csv(self, output_file: str):
         """Speichert die Daten als CSV"""
         if self.strassen_mit_bezirk:
+            import pandas as pd
+            from street_store import schreibe_strassen
             df = pd.DataFrame(self.strassen_mit_bezirk)
-            df.to_csv(output_file, index=False, encoding='utf-8')
+            schreibe_strassen(df, output_file)
             logger.info(f"CSV gespeichert als: {output_file}")
     
     def save_kandidaten_liste(self, output_file: str = "kandidaten_bezirke.csv"):
         """Speichert die Kandidaten-Bezirk-Zuordnung"""
+        import pandas as pd
+        from geodesy import streuung
+
         data = []
         for wbz_key, wbz_data in sorted(self.wahlbezirke.items()):
             anzahl_strassen = len([s for s in self.strassen_mit_bezirk if s['wbz'] == wbz_key])
@@ -356,10 +345,16 @@ class WahlbezirkeMapConverter:
             })
         
         df = pd.DataFrame(data)
+        
+        # Lage und Streuung der Straßen je Bezirk (ohne Ersatzkoordinaten)
+        if self.strassen_mit_bezirk:
+            lage = streuung(pd.DataFrame(self.strassen_mit_bezirk), 'wbz')
+            df = df.merge(lage, on='wbz', how='left')
+        
         df.to_csv(output_file, index=False, encoding='utf-8')
         logger.info(f"Kandidatenliste gespeichert als: {output_file}")
     
-    def process(self):
+    def process(self, ausgabe_verzeichnis: str = '.'):
         """Hauptprozess"""
         try:
             # Wahlbezirk-Zuordnung laden
@@ -380,13 +375,13 @@ class WahlbezirkeMapConverter:
                 return
             
             # Karte erstellen
-            self.create_wahlbezirke_map()
+            self.create_wahlbezirke_map(os.path.join(ausgabe_verzeichnis, "wahlbezirke_map.html"))
             
             # Kandidatenliste speichern
-            self.save_kandidaten_liste()
+            self.save_kandidaten_liste(os.path.join(ausgabe_verzeichnis, "kandidaten_bezirke.csv"))
             
             logger.info("Verarbeitung abgeschlossen!")
-            logger.info("Ergebnisse:")
+            logger.info(f"Ergebnisse in {ausgabe_verzeichnis}:")
             logger.info("- Karte: wahlbezirke_map.html")
             logger.info("- CSV: wahlbezirke_map.csv")
             logger.info("- GeoJSON: wahlbezirke_map.geojson")
@@ -399,8 +394,16 @@ class WahlbezirkeMapConverter:
 
 def main():
     """Hauptfunktion"""
-    strassen_pdf = "/Users/marcelgaertner/Desktop/Arbeit/Markus schmitz/marcus-call-agent/Nümbrecht straßengenau.pdf"
-    zuordnung_json = "/Users/marcelgaertner/Desktop/Arbeit/Markus schmitz/marcus-call-agent/wahlbezirke_zuordnung.json"
+    parser = argparse.ArgumentParser(description='Erstellt die Wahlbezirke-Karte aus Straßen-PDF und Zuordnung')
+    parser.add_argument('pdf', nargs='?', default=STANDARD_PDF, help='Straßen-PDF')
+    parser.add_argument('zuordnung', nargs='?', default=STANDARD_ZUORDNUNG, help='Wahlbezirk-Zuordnung (JSON)')
+    parser.add_argument('--plz', default=None, help='Postleitzahl der Gemeinde (Standard: konfiguration.json)')
+    parser.add_argument('--ort', default=None, help='Name der Gemeinde (Standard: konfiguration.json)')
+    parser.add_argument('--ausgabe', default='.', help='Verzeichnis für Karte, CSV und GeoJSON')
+    parser.add_argument('--cache', default=None, help='OCR- und Geocoding-Cache (SQLite), z.B. .cache/verarbeitung.sqlite')
+    args = parser.parse_args()
+    strassen_pdf = args.pdf
+    zuordnung_json = args.zuordnung
     
     if not os.path.exists(strassen_pdf):
         logger.error(f"Straßen-PDF nicht gefunden: {strassen_pdf}")
@@ -410,8 +413,9 @@ def main():
         logger.error(f"Zuordnungs-JSON nicht gefunden: {zuordnung_json}")
         return
     
-    converter = WahlbezirkeMapConverter(strassen_pdf, zuordnung_json)
-    converter.process()
+    cache = VerarbeitungsCache(args.cache) if args.cache else None
+    converter = WahlbezirkeMapConverter(strassen_pdf, zuordnung_json, args.plz, args.ort, cache)
+    converter.process(args.ausgabe)
 
 
 if __name__ == "__main__":
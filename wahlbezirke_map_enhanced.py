@@ -9,9 +9,6 @@ import re
 import json
 import time
 from typing import List, Dict, Tuple, Optional
-import pytesseract
-from pdf2image import convert_from_path
-from PIL import Image
 import pandas as pd
 import folium
 from folium.plugins import MarkerCluster
@@ -19,30 +16,23 @@ from geopy.geocoders import Nominatim
 from geopy.exc import GeocoderTimedOut, GeocoderServiceError
 import logging
 from collections import defaultdict
+from map_output import save_map
+from lazy_popups import lazy_popups_aktiv, add_lazy_markers
+from street_store import schreibe_strassen
+from ocr_engine import pdf_text
+from geojson_writer import schreibe_punkte, geojson_optionen
+from konfiguration import konfiguration
 
 # Logging konfigurieren
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Farbpalette für Kandidaten (nicht mehr für einzelne Bezirke)
-KANDIDATEN_FARBEN = {
-    'Gisa Hauschildt': '#FF6B6B',
-    'Christopher Seinsche': '#4ECDC4',
-    'Björn Dittich': '#45B7D1',
-    'Titzian Crisci': '#FFA07A',
-    'Stephan Rühl': '#98D8C8',
-    'Roger Adolphs': '#6C5CE7',
-    'Frank Schmitz': '#A8E6CF',
-    'Thomas Schlegel': '#FF8B94',  # Hervorgehoben
-    'Jörg Reintsema': '#C7CEEA',
-    'Dagmar Schmitz': '#FFDAB9',
-    'Jörg Menne': '#E8B4B8',
-    'Markus Lang': '#95E1D3',
-    'Ulrike Herrgesell': '#F38181',
-    'Thomas Hellbusch': '#AA96DA',
-    'Philipp Beck': '#FCBAD3',
-    'Manfred Henry Daub': '#FFD93D'
-}
+# Properties je Straße im GeoJSON-Export
+GEOJSON_EIGENSCHAFTEN = ['street', 'original', 'postal_code', 'city', 'full_address',
+                         'wbz', 'bezirk', 'kandidat', 'wahlberechtigte', 'farbe']
+
+# Farbpalette für Kandidaten (nicht mehr für einzelne Bezirke), siehe konfiguration.json
+KANDIDATEN_FARBEN = konfiguration().kandidaten_farben_einzeln
 
 class EnhancedWahlbezirkeMapConverter:
     def __init__(self, strassen_pdf: str, zuordnung_json: str):
@@ -72,23 +62,8 @@ class EnhancedWahlbezirkeMapConverter:
         logger.info(f"Geladen: {len(self.wahlbezirke)} Wahlbezirke für {len(self.kandidaten_bezirke)} Kandidaten")
     
     def extract_text_from_pdf(self, pdf_path: str) -> str:
-        """Extrahiert Text aus PDF mittels OCR"""
-        logger.info(f"Starte PDF-Extraktion: {pdf_path}")
-        
-        try:
-            pages = convert_from_path(pdf_path, dpi=300)
-            
-            full_text = ""
-            for i, page in enumerate(pages):
-                logger.info(f"Verarbeite Seite {i+1}/{len(pages)}")
-                text = pytesseract.image_to_string(page, lang='deu')
-                full_text += text + "\n"
-            
-            return full_text
-            
-        except Exception as e:
-            logger.error(f"Fehler bei PDF-Extraktion: {e}")
-            raise
+        """Extrahiert Text aus PDF mittels OCR (eine Tesseract-Engine für alle Seiten)"""
+        return pdf_text(pdf_path)
     
     def extract_strassen(self, text: str) -> List[Dict[str, str]]:
         """Extrahiert Straßen aus dem Text"""
@@ -198,30 +173,37 @@ class EnhancedWahlbezirkeMapConverter:
             kandidaten_groups[kandidat] = folium.FeatureGroup(name=f"CDU: {kandidat}", show=True)
         
         # Marker für jede Straße
-        for strasse in self.strassen_mit_bezirk:
-            popup_text = f"""
-            <b>{strasse['street']}</b><br>
-            {strasse['original']}<br>
-            {strasse['postal_code']} {strasse['city']}<br>
-            <hr>
-            <b>Wahlbezirk:</b> {strasse['bezirk']}<br>
-            <b>CDU-Kandidat/in:</b> {strasse['kandidat']}<br>
-            <b>Wahlberechtigte im Bezirk:</b> {strasse['wahlberechtigte']}<br>
-            <small>Lat: {strasse['latitude']:.6f}, Lon: {strasse['longitude']:.6f}</small>
-            """
+        if lazy_popups_aktiv():
+            df = pd.DataFrame(self.strassen_mit_bezirk)
+            for kandidat, gruppe in df.groupby('kandidat'):
+                add_lazy_markers(m, kandidaten_groups[kandidat], gruppe, popup='basis',
+                                 stil={'radius': 8, 'fill': True, 'fillOpacity': 0.7, 'weight': 2},
+                                 dynamischer_stil={'color': 'farbe', 'fillColor': 'farbe'})
+        else:
+            for strasse in self.strassen_mit_bezirk:
+                popup_text = f"""
+                <b>{strasse['street']}</b><br>
+                {strasse['original']}<br>
+                {strasse['postal_code']} {strasse['city']}<br>
+                <hr>
+                <b>Wahlbezirk:</b> {strasse['bezirk']}<br>
+                <b>CDU-Kandidat/in:</b> {strasse['kandidat']}<br>
+                <b>Wahlberechtigte im Bezirk:</b> {strasse['wahlberechtigte']}<br>
+                <small>Lat: {strasse['latitude']:.6f}, Lon: {strasse['longitude']:.6f}</small>
+                """
             
-            # Marker zum Kandidaten-Group hinzufügen
-            folium.CircleMarker(
-                location=[strasse['latitude'], strasse['longitude']],
-                radius=8,
-                popup=folium.Popup(popup_text, max_width=300),
-                tooltip=f"{strasse['street']} ({strasse['wbz']})",
-                color=strasse['farbe'],
-                fill=True,
-                fillColor=strasse['farbe'],
-                fillOpacity=0.7,
-                weight=2
-            ).add_to(kandidaten_groups[strasse['kandidat']])
+                # Marker zum Kandidaten-Group hinzufügen
+                folium.CircleMarker(
+                    location=[strasse['latitude'], strasse['longitude']],
+                    radius=8,
+                    popup=folium.Popup(popup_text, max_width=300),
+                    tooltip=f"{strasse['street']} ({strasse['wbz']})",
+                    color=strasse['farbe'],
+                    fill=True,
+                    fillColor=strasse['farbe'],
+                    fillOpacity=0.7,
+                    weight=2
+                ).add_to(kandidaten_groups[strasse['kandidat']])
         
         # Feature Groups zur Karte hinzufügen
         for group in kandidaten_groups.values():
@@ -349,7 +331,7 @@ class EnhancedWahlbezirkeMapConverter:
         m.get_root().html.add_child(folium.Element(legend_html))
         
         # Karte speichern
-        m.save(output_file)
+        save_map(m, output_file)
         logger.info(f"Erweiterte Karte gespeichert als: {output_file}")
         
         # GeoJSON speichern
@@ -382,38 +364,8 @@ class EnhancedWahlbezirkeMapConverter:
         logger.info(f"Kandidaten-Übersicht gespeichert als: {output_file}")
     
     def save_as_geojson(self, output_file: str):
-        """Speichert die Daten als GeoJSON"""
-        features = []
-        
-        for strasse in self.strassen_mit_bezirk:
-            feature = {
-                "type": "Feature",
-                "geometry": {
-                    "type": "Point",
-                    "coordinates": [strasse['longitude'], strasse['latitude']]
-                },
-                "properties": {
-                    "street": strasse['street'],
-                    "original": strasse['original'],
-                    "postal_code": strasse['postal_code'],
-                    "city": strasse['city'],
-                    "full_address": strasse['full_address'],
-                    "wbz": strasse['wbz'],
-                    "bezirk": strasse['bezirk'],
-                    "kandidat": strasse['kandidat'],
-                    "wahlberechtigte": strasse['wahlberechtigte'],
-                    "farbe": strasse['farbe']
-                }
-            }
-            features.append(feature)
-        
-        geojson = {
-            "type": "FeatureCollection",
-            "features": features
-        }
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(geojson, f, ensure_ascii=False, indent=2)
+        """Speichert die Daten als GeoJSON (Format siehe geojson_writer)"""
+        schreibe_punkte(output_file, self.strassen_mit_bezirk, GEOJSON_EIGENSCHAFTEN, **geojson_optionen())
         
         logger.info(f"GeoJSON gespeichert als: {output_file}")
     
@@ -421,7 +373,7 @@ class EnhancedWahlbezirkeMapConverter:
         """Speichert die Daten als CSV"""
         if self.strassen_mit_bezirk:
             df = pd.DataFrame(self.strassen_mit_bezirk)
-            df.to_csv(output_file, index=False, encoding='utf-8')
+            schreibe_strassen(df, output_file)
             logger.info(f"CSV gespeichert als: {output_file}")
     
     def process(self):
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Gemeinsame Kommandozeile für die Verarbeitungsschritte
+Statt jedes Skript einzeln aufzurufen, gibt es einen Einstieg mit Unterbefehlen:
+
+    python wahlkarte.py ocr strassen.pdf --output strassen.txt
+    python wahlkarte.py assign wahlbezirke_zuordnung.json --text strassen.txt
+    python wahlkarte.py geocode strassen_zugeordnet.json --cache .cache/verarbeitung.sqlite
+    python wahlkarte.py render kreistag final
+    python wahlkarte.py stats
+    python wahlkarte.py startzeit
+
+Jeder Unterbefehl importiert erst beim Aufruf, was er braucht (OCR, pandas, folium, geopy).
+Für jeden ist ein Startzeit-Budget hinterlegt, das "startzeit" in frischen Prozessen nachmisst.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import importlib
+import logging
+import subprocess
+from typing import Dict, List
+
+# Logging konfigurieren
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Unterbefehl -> Module, die er vor der eigentlichen Arbeit lädt, und Budget in Sekunden vom
+# Start des Interpreters, bis diese geladen sind
+BEFEHLE = {
+    'ocr': (('ocr_engine', 'verarbeitungs_cache'), 2.0),
+    'assign': (('wahlbezirke_map',), 0.5),
+    'geocode': (('wahlbezirke_map', 'geopy.geocoders', 'pandas', 'street_store', 'geojson_writer'), 2.5),
+    'render': (('build_maps', 'folium'), 4.0),
+    'stats': (('street_store', 'geodesy'), 2.5),
+}
+
+MESSUNGEN = 3  # frische Prozesse je Unterbefehl, gewertet wird der schnellste
+
+
+def lade(befehl: str):
+    """Importiert die Module eines Unterbefehls"""
+    for modul in BEFEHLE[befehl][0]:
+        importlib.import_module(modul)
+
+
+def ocr(args):
+    """PDF -> Text"""
+    from ocr_engine import pdf_text
+    from verarbeitungs_cache import VerarbeitungsCache
+
+    cache = VerarbeitungsCache(args.cache) if args.cache else None
+    text = pdf_text(args.pdf, cache=cache)
+    output_file = args.output or f"{os.path.splitext(args.pdf)[0]}.txt"
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(text)
+    print(f"✓ Text gespeichert: {output_file} ({len(text)} Zeichen)")
+
+
+def assign(args):
+    """Zuordnung (+ OCR-Text) -> Straßen mit Wahlbezirk"""
+    from wahlbezirke_map import WahlbezirkeMapConverter
+    from konfiguration import konfiguration
+
+    zuordnung = args.zuordnung or konfiguration().datei('wahlbezirke')
+    converter = WahlbezirkeMapConverter(None, zuordnung, args.plz, args.ort)
+    converter.load_wahlbezirke_zuordnung()
+    text = ''
+    if args.text:
+        with open(args.text, 'r', encoding='utf-8') as f:
+            text = f.read()
+    converter.strassen = converter.extract_strassen(text)
+    converter.zuordne_strassen_zu_bezirken()
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(converter.strassen_mit_bezirk, f, ensure_ascii=False, indent=2)
+    print(f"✓ Zuordnung gespeichert: {args.output} "
+          f"({len(converter.strassen_mit_bezirk)} von {len(converter.strassen)} Straßen zugeordnet)")
+
+
+def geocode(args):
+    """Straßen mit Wahlbezirk -> Koordinaten (CSV und GeoJSON)"""
+    from wahlbezirke_map import WahlbezirkeMapConverter
+    from verarbeitungs_cache import VerarbeitungsCache
+
+    with open(args.strassen, 'r', encoding='utf-8') as f:
+        strassen = json.load(f)
+    cache = VerarbeitungsCache(args.cache) if args.cache else None
+    converter = WahlbezirkeMapConverter(None, None, cache=cache)
+    converter.strassen_mit_bezirk = strassen
+    converter.geocode_strassen()
+
+    converter.save_as_csv(args.output)
+    converter.save_as_geojson(f"{os.path.splitext(args.output)[0]}.geojson")
+    print(f"✓ {len(converter.strassen_mit_bezirk)} von {len(strassen)} Straßen geocodiert: {args.output}")
+
+
+def render(args):
+    """Kartenansichten aus den Straßentabellen"""
+    from build_maps import ANSICHTEN, build
+
+    unbekannt = [name for name in args.ansichten if name not in ANSICHTEN]
+    if unbekannt:
+        logger.error(f"Unbekannte Ansicht(en): {', '.join(unbekannt)} (verfügbar: {', '.join(ANSICHTEN)})")
+        return 2
+    ansichten = list(dict.fromkeys(args.ansichten)) or list(ANSICHTEN)
+    return 0 if build(ansichten, args.worker) else 1
+
+
+def stats(args):
+    """Kennzahlen je Wahlbezirk"""
+    from street_store import lade_strassen
+    from geodesy import streuung
+
+    df = lade_strassen(args.csv)
+    kennzahlen = df.groupby(args.gruppe, observed=True).size().rename('strassen').reset_index()
+    kennzahlen = kennzahlen.merge(streuung(df, args.gruppe), on=args.gruppe, how='left')
+    spalten = [args.gruppe, 'strassen', 'punkte_mit_koordinaten', 'streuradius_m',
+               'ausdehnung_ns_m', 'ausdehnung_ow_m', 'kompaktheit']
+    print(kennzahlen[spalten].to_string(index=False))
+    if args.output:
+        kennzahlen.to_csv(args.output, index=False, encoding='utf-8')
+        print(f"✓ Kennzahlen gespeichert: {args.output}")
+
+
+def miss_startzeit(befehl: str) -> float:
+    """Zeit vom Start eines frischen Interpreters, bis der Unterbefehl seine Module geladen hat"""
+    code = f"import wahlkarte; wahlkarte.lade({befehl!r})"
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', code], check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    return time.perf_counter() - start
+
+
+def startzeit(args):
+    """Misst die Startzeit je Unterbefehl gegen das Budget"""
+    befehle: List[str] = args.befehle or list(BEFEHLE)
+    unbekannt = [befehl for befehl in befehle if befehl not in BEFEHLE]
+    if unbekannt:
+        logger.error(f"Unbekannte Unterbefehle: {', '.join(unbekannt)}")
+        return 2
+    ergebnisse: Dict[str, float] = {}
+    for befehl in befehle:
+        ergebnisse[befehl] = min(miss_startzeit(befehl) for _ in range(MESSUNGEN))
+
+    ueberschritten = []
+    for befehl, dauer in ergebnisse.items():
+        budget = BEFEHLE[befehl][1]
+        zeichen = '✓' if dauer <= budget else '✗'
+        print(f"{zeichen} {befehl:8s} {dauer:.2f} s (Budget {budget:.1f} s)")
+        if dauer > budget:
+            ueberschritten.append(befehl)
+    return 1 if ueberschritten else 0
+
+
+def main():
+    """Hauptfunktion"""
+    parser = argparse.ArgumentParser(description='Wahlbezirke-Karten: OCR, Zuordnung, Geocoding, Karten und Statistik')
+    befehle = parser.add_subparsers(dest='befehl', required=True)
+
+    p = befehle.add_parser('ocr', help='Text aus einem PDF erkennen')
+    p.add_argument('pdf', help='PDF-Datei')
+    p.add_argument('--output', default=None, help='Textdatei (Standard: <pdf>.txt)')
+    p.add_argument('--cache', default=None, help='OCR- und Geocoding-Cache (SQLite)')
+    p.set_defaults(funktion=ocr)
+
+    p = befehle.add_parser('assign', help='Straßen den Wahlbezirken zuordnen')
+    p.add_argument('zuordnung', nargs='?', default=None,
+                   help='Wahlbezirk-Zuordnung (JSON, Standard: aus konfiguration.json)')
+    p.add_argument('--text', default=None, help='OCR-Text des Straßen-PDFs (aus "ocr")')
+    p.add_argument('--plz', default=None, help='Postleitzahl der Gemeinde (Standard: konfiguration.json)')
+    p.add_argument('--ort', default=None, help='Name der Gemeinde (Standard: konfiguration.json)')
+    p.add_argument('--output', default='strassen_zugeordnet.json', help='Zugeordnete Straßen (JSON)')
+    p.set_defaults(funktion=assign)
+
+    p = befehle.add_parser('geocode', help='Zugeordnete Straßen geocodieren')
+    p.add_argument('strassen', nargs='?', default='strassen_zugeordnet.json', help='Zugeordnete Straßen (aus "assign")')
+    p.add_argument('--output', default='wahlbezirke_map.csv', help='Straßentabelle (CSV, dazu GeoJSON)')
+    p.add_argument('--cache', default=None, help='OCR- und Geocoding-Cache (SQLite)')
+    p.set_defaults(funktion=geocode)
+
+    p = befehle.add_parser('render', help='Kartenansichten erstellen (wie build_maps.py)')
+    p.add_argument('ansichten', nargs='*', help='Zu erstellende Ansichten (Standard: alle)')
+    p.add_argument('--worker', type=int, default=None, help='Anzahl paralleler Prozesse')
+    p.set_defaults(funktion=render)
+
+    p = befehle.add_parser('stats', help='Kennzahlen je Wahlbezirk ausgeben')
+    p.add_argument('--csv', default='wahlbezirke_map.csv', help='Straßentabelle')
+    p.add_argument('--gruppe', default='wbz', help='Gruppierungsspalte, z.B. wbz oder kandidat')
+    p.add_argument('--output', default=None, help='Kennzahlen zusätzlich als CSV speichern')
+    p.set_defaults(funktion=stats)
+
+    p = befehle.add_parser('startzeit', help='Startzeit je Unterbefehl gegen das Budget messen')
+    p.add_argument('befehle', nargs='*', help=f"Unterbefehle (Standard: alle): {', '.join(BEFEHLE)}")
+    p.set_defaults(funktion=startzeit)
+
+    args = parser.parse_args()
+    sys.exit(args.funktion(args) or 0)
+
+
+if __name__ == "__main__":
+    main()